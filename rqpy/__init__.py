@@ -1,15 +1,51 @@
-from ._globals import HAS_RAWIO, HAS_TRIGSIM
-from . import core
-from .core import *
-from . import plotting
-from .plotting._core_plotting import *
-from . import process
-from . import io
-from . import sim
-from . import utils
-from . import limit
-from . import constants
-
-# load seaborn colormaps
-from seaborn import cm
-del cm
+import importlib
+
+from ._globals import HAS_RAWIO, HAS_TRIGSIM, HAS_PYARROW
+
+# the submodules are only imported when they are first used, such that importing rqpy
+# (e.g. in each process of a multiprocessing pool) does not import the heavy dependencies
+# of the submodules that are not needed
+_SUBMODULES = ["core", "plotting", "process", "io", "sim", "utils", "limit", "constants"]
+
+_toplevel = None
+
+
+def _toplevel_names():
+    """
+    Helper function for getting the functions and classes of `rqpy.core` and
+    `rqpy.plotting._core_plotting` that are available at the top level of the package,
+    and the module that each is from.
+
+    """
+
+    global _toplevel
+
+    if _toplevel is None:
+        core = importlib.import_module(".core", __name__)
+        core_plotting = importlib.import_module(".plotting._core_plotting", __name__)
+
+        _toplevel = {}
+        for module in [core, core_plotting]:
+            names = getattr(module, "__all__", [name for name in vars(module) if not name.startswith("_")])
+            _toplevel.update({name: module for name in names})
+
+    return _toplevel
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+
+    if name == "__all__":
+        return ["HAS_RAWIO", "HAS_TRIGSIM", "HAS_PYARROW"] + _SUBMODULES + list(_toplevel_names())
+
+    if not name.startswith("_") and name in _toplevel_names():
+        value = getattr(_toplevel_names()[name], name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES) | set(_toplevel_names()))
@@ -17,6 +17,14 @@ if spec is None:
 else:
     HAS_TRIGSIM = True
 
+package_req = 'pyarrow'
+spec = find_spec(package_req)
+
+if spec is None:
+    HAS_PYARROW = False
+else:
+    HAS_PYARROW = True
+
 del find_spec
 del sys
 del package_req
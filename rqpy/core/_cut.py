@@ -2,7 +2,6 @@ import warnings
 import numpy as np
 import pandas as pd
 from scipy import stats, interpolate, optimize
-from skimage import measure
 
 from qetpy.cut import removeoutliers
 
@@ -252,6 +251,9 @@ def binnedcut(x, y, cut=None, nbins=100, cut_eff=0.9, keep_large_vals=True, lgce
             )
             params = None
         else: 
+            # scikit-image is slow to import, so it is only imported when it is needed
+            from skimage import measure
+
             if model=="linear":
                 ModelClass = measure.LineModelND
                 if min_samples is None:
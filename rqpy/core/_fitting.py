@@ -1,7 +1,6 @@
 import numpy as np
 from scipy.optimize import curve_fit
 from rqpy import plotting, utils
-import iminuit
 
 
 __all__ = [
@@ -301,6 +300,8 @@ def ext_max_llhd(x, func, guess, guess_err=None, limits=None):
 
     input_dict = {**fit_dict, **err_dict, **limit_dict}
 
+    import iminuit
+
     m = iminuit.Minuit(
         lambda p: func(x, p),
         use_array_call=True,
@@ -8,7 +8,6 @@ from collections import Counter
 import pprint
 from scipy import constants
 from scipy.signal import savgol_filter
-from lmfit import Model
 
 import rqpy as rp
 import rqpy.plotting as plot 
@@ -957,6 +956,8 @@ class IVanalysis(object):
             xdata = f[ind_lower:ind_upper]
             ydata = _flatten_psd(f,psd)[ind_lower:ind_upper]
 
+            from lmfit import Model
+
             model = Model(_normal_noise, independent_vars=['freqs'])
             params = model.make_params(
                 squiddc=squiddc0,
@@ -1062,6 +1063,8 @@ class IVanalysis(object):
             xdata = f[ind_lower:ind_upper]
             ydata = _flatten_psd(f,psd)[ind_lower:ind_upper]
 
+            from lmfit import Model
+
             model = Model(_sc_noise, independent_vars=['freqs'])
             params = model.make_params(
                 tload=0.03,
@@ -1,2 +1,9 @@
+from ._adc import *
+from ._writer import *
+from ._cache import *
+from ._rqd import *
+from ._index import *
 from ._load import *
+from ._dataset import *
 from ._save import *
+from ._rqstore import *
@@ -0,0 +1,150 @@
+import numpy as np
+
+
+__all__ = ["ADCTraces"]
+
+
+class ADCTraces(object):
+    """
+    Class for lazily converting traces stored as integer ADC bins to units of TES current. The
+    traces are only converted when they are accessed (by indexing or by converting to an ndarray),
+    such that only the requested traces are ever expanded to floats.
+
+    Attributes
+    ----------
+    adc : ndarray
+        The traces in units of ADC bins, with shape (number of traces, number of channels,
+        bins in each trace). This can be a memory-map.
+    convtoamps : ndarray
+        The conversion factor from ADC bins to TES current in Amps for each channel, with shape
+        (number of channels,), or for each trace and channel, with shape (number of traces,
+        number of channels).
+    dtype : numpy.dtype
+        The floating point type that the traces are converted to.
+
+    """
+
+    def __init__(self, adc, convtoamps, dtype=np.float64):
+        """
+        Initialization of the ADCTraces class.
+
+        Parameters
+        ----------
+        adc : ndarray
+            The traces in units of ADC bins, with shape (number of traces, number of channels,
+            bins in each trace).
+        convtoamps : float, array_like
+            The conversion factor from ADC bins to TES current in Amps. Can be a single value,
+            a value for each channel, or a value for each trace and channel.
+        dtype : numpy.dtype, optional
+            The floating point type that the traces are converted to. Setting this to np.float32
+            halves the memory of the converted traces. Default is np.float64.
+
+        """
+
+        if np.ndim(adc) != 3:
+            raise ValueError("adc should have shape (number of traces, number of channels, bins in each trace).")
+
+        convtoamps = np.asarray(convtoamps, dtype=float)
+
+        if convtoamps.ndim == 0:
+            convtoamps = np.full(adc.shape[1], float(convtoamps))
+
+        if convtoamps.shape not in [adc.shape[1:2], adc.shape[:2]]:
+            raise ValueError("convtoamps should have a value for each channel, or for each trace and channel.")
+
+        self.adc = adc
+        self.convtoamps = convtoamps
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def shape(self):
+        return self.adc.shape
+
+    @property
+    def ndim(self):
+        return self.adc.ndim
+
+    @property
+    def size(self):
+        return self.adc.size
+
+    def __len__(self):
+        return len(self.adc)
+
+    def __getitem__(self, key):
+        scale = np.broadcast_to(self.convtoamps[..., np.newaxis], self.adc.shape)
+        return np.multiply(self.adc[key], scale[key], dtype=self.dtype)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.astype(self.dtype if dtype is None else dtype)
+
+    def astype(self, dtype):
+        """
+        Method for converting all of the traces to units of TES current.
+
+        Parameters
+        ----------
+        dtype : numpy.dtype
+            The floating point type to convert the traces to, e.g. np.float32.
+
+        Returns
+        -------
+        traces : ndarray
+            The converted traces.
+
+        """
+
+        return ADCTraces(self.adc, self.convtoamps, dtype=dtype)[...]
+
+
+def _toadc(traces, convtoamps, dtype="int16"):
+    """
+    Helper function for converting traces in units of TES current to integer ADC bins.
+
+    Parameters
+    ----------
+    traces : ndarray, rqpy.io.ADCTraces
+        The traces to convert, with shape (number of traces, number of channels, bins in each trace).
+        If an ADCTraces object with the same conversion factors is passed, then its ADC bins are used
+        directly.
+    convtoamps : float, array_like
+        The conversion factor from ADC bins to TES current in Amps, as a single value or a value for
+        each channel.
+    dtype : str, numpy.dtype, optional
+        The integer type to store the ADC bins as. Default is "int16", which is sufficient for 16-bit
+        ADCs. "int32" should be used if the traces are outside of this range, e.g. for simulated pulses.
+
+    Returns
+    -------
+    adc : ndarray
+        The traces in units of ADC bins.
+    convtoamps : ndarray
+        The conversion factor for each channel, with shape (number of channels,).
+
+    Raises
+    ------
+    ValueError
+        If the traces cannot be represented by `dtype`.
+
+    """
+
+    dtype = np.dtype(dtype)
+
+    if not np.issubdtype(dtype, np.integer):
+        raise ValueError("dtype should be an integer type.")
+
+    nchan = np.shape(traces)[1]
+    convtoamps = np.asarray(convtoamps, dtype=float)
+    convtoamps = np.full(nchan, float(convtoamps)) if convtoamps.ndim == 0 else convtoamps.reshape(nchan)
+
+    if isinstance(traces, ADCTraces) and traces.convtoamps.ndim == 1 and np.array_equal(traces.convtoamps, convtoamps):
+        adc = traces.adc
+    else:
+        adc = np.rint(np.asarray(traces) / convtoamps[:, np.newaxis])
+
+    info = np.iinfo(dtype)
+    if adc.size > 0 and (adc.min() < info.min or adc.max() > info.max):
+        raise ValueError(f"The traces are outside of the range of {dtype}, a larger integer type should be used.")
+
+    return np.asarray(adc).astype(dtype, copy=False), convtoamps
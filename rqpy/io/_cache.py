@@ -0,0 +1,253 @@
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from rqpy.io._adc import ADCTraces
+
+
+__all__ = ["TraceCache"]
+
+
+def _nbytes(block):
+    """
+    Helper function for getting the number of bytes of a cached block of traces.
+
+    """
+
+    return block.adc.nbytes if isinstance(block, ADCTraces) else block.nbytes
+
+
+class TraceCache(object):
+    """
+    Class for caching decoded blocks of traces (e.g. all of the traces of a dump) in memory, such
+    that reading traces from the same dumps again (e.g. when plotting and then simulating pulses
+    with the same cut) does not decompress the dumps again. The blocks are kept up to a memory limit,
+    past which the least recently used blocks are evicted. Optionally, the evicted blocks can be
+    spilled to memory-mapped files in a local scratch directory, from which they are read instead of
+    being decoded again.
+
+    The blocks are keyed by the absolute path of their file, and hold all of the channels of the file
+    as they are stored, so they should not be modified. Only compressed npz dumps are cached by
+    `rqpy.io.getrandevents` and `rqpy.io.EventIndex.read`, as the traces of uncompressed npz and rqd
+    dumps are memory-mapped, and only the requested events of mid.gz dumps are read.
+
+    Attributes
+    ----------
+    maxbytes : int
+        The maximum number of bytes of the blocks held in memory.
+    scratchpath : str, NoneType
+        The directory that evicted blocks are spilled to, or None if they are not spilled.
+    maxspillbytes : int, NoneType
+        The maximum number of bytes of the spilled blocks, or None if not limited.
+    hits : int
+        The number of times that a block was found in the cache (in memory or spilled).
+    misses : int
+        The number of times that a block was not found in the cache, and had to be decoded.
+    spillhits : int
+        The number of hits that were read from the spilled blocks.
+    evictions : int
+        The number of blocks that have been evicted from memory.
+
+    """
+
+    def __init__(self, maxbytes=2**30, scratchpath=None, maxspillbytes=None):
+        """
+        Initialization of the TraceCache class.
+
+        Parameters
+        ----------
+        maxbytes : int, optional
+            The maximum number of bytes of the blocks to hold in memory. Blocks that are larger
+            than this are not cached. Default is 2**30 (1 GiB).
+        scratchpath : str, NoneType, optional
+            Path to a local directory to spill the evicted blocks to as temporary memory-mapped files,
+            which are deleted once they are evicted from the scratch directory (or the cache is cleared
+            or garbage collected). If left as None, then evicted blocks are discarded.
+        maxspillbytes : int, NoneType, optional
+            The maximum number of bytes of the spilled blocks, past which the least recently used spilled
+            blocks are deleted. If left as None, then the spilled blocks are not limited.
+
+        """
+
+        self.maxbytes = maxbytes
+        self.scratchpath = scratchpath
+        self.maxspillbytes = maxspillbytes
+
+        self.hits = 0
+        self.misses = 0
+        self.spillhits = 0
+        self.evictions = 0
+
+        self._blocks = OrderedDict()
+        self._spilled = OrderedDict()
+        self._nbytes = 0
+        self._spillbytes = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._blocks) + len(self._spilled)
+
+    def __contains__(self, key):
+        return key in self._blocks or key in self._spilled
+
+    @property
+    def nbytes(self):
+        """
+        The number of bytes of the blocks held in memory.
+
+        """
+
+        return self._nbytes
+
+    @property
+    def stats(self):
+        """
+        Dictionary of the hit and miss statistics of the cache, and of the blocks that it holds.
+
+        """
+
+        ntotal = self.hits + self.misses
+
+        return {
+            "hits" : self.hits,
+            "misses" : self.misses,
+            "hitrate" : self.hits / ntotal if ntotal > 0 else 0.0,
+            "spillhits" : self.spillhits,
+            "evictions" : self.evictions,
+            "nblocks" : len(self._blocks),
+            "nbytes" : self._nbytes,
+            "nspilled" : len(self._spilled),
+            "spillbytes" : self._spillbytes,
+        }
+
+    def get(self, key, loader):
+        """
+        Method for getting a block from the cache, where the block is loaded with `loader` (and
+        added to the cache) if it is not in the cache.
+
+        Parameters
+        ----------
+        key : str
+            The key of the block, which should be the absolute path of its file.
+        loader : callable
+            Function with no arguments that decodes and returns the block, as an ndarray or a
+            `rqpy.io.ADCTraces` object.
+
+        Returns
+        -------
+        block : ndarray, rqpy.io.ADCTraces
+            The block of traces. For spilled blocks, this is memory-mapped.
+
+        """
+
+        with self._lock:
+            if key in self._blocks:
+                self.hits += 1
+                self._blocks.move_to_end(key)
+                return self._blocks[key]
+
+            if key in self._spilled:
+                self.hits += 1
+                self.spillhits += 1
+                self._spilled.move_to_end(key)
+                return self._spilled[key][0]
+
+            self.misses += 1
+
+        block = loader()
+        self.put(key, block)
+
+        return block
+
+    def put(self, key, block):
+        """
+        Method for adding a block to the cache, evicting the least recently used blocks as needed.
+
+        Parameters
+        ----------
+        key : str
+            The key of the block, which should be the absolute path of its file.
+        block : ndarray, rqpy.io.ADCTraces
+            The block of traces.
+
+        """
+
+        nbytes = _nbytes(block)
+
+        if nbytes > self.maxbytes:
+            return
+
+        with self._lock:
+            self._remove(key)
+
+            self._blocks[key] = block
+            self._nbytes += nbytes
+
+            while self._nbytes > self.maxbytes:
+                oldkey, oldblock = self._blocks.popitem(last=False)
+                self._nbytes -= _nbytes(oldblock)
+                self.evictions += 1
+
+                if self.scratchpath is not None:
+                    self._spill(oldkey, oldblock)
+
+    def _spill(self, key, block):
+        """
+        Hidden method for spilling a block to a temporary memory-mapped file in the scratch directory.
+
+        """
+
+        nbytes = _nbytes(block)
+
+        if self.maxspillbytes is not None and nbytes > self.maxspillbytes:
+            return
+
+        arr = block.adc if isinstance(block, ADCTraces) else block
+
+        # the file is deleted once it is closed, i.e. when the block is removed from the cache
+        file = tempfile.TemporaryFile(dir=self.scratchpath)
+        mmap = np.memmap(file, dtype=arr.dtype, mode="w+", shape=arr.shape)
+        mmap[...] = arr
+        mmap.flush()
+
+        if isinstance(block, ADCTraces):
+            mmap = ADCTraces(mmap, block.convtoamps, dtype=block.dtype)
+
+        self._spilled[key] = (mmap, file)
+        self._spillbytes += nbytes
+
+        while self.maxspillbytes is not None and self._spillbytes > self.maxspillbytes:
+            _, (oldmmap, oldfile) = self._spilled.popitem(last=False)
+            self._spillbytes -= _nbytes(oldmmap)
+            oldfile.close()
+
+    def _remove(self, key):
+        """
+        Hidden method for removing a block from the cache, if it is in the cache.
+
+        """
+
+        if key in self._blocks:
+            self._nbytes -= _nbytes(self._blocks.pop(key))
+
+        if key in self._spilled:
+            mmap, file = self._spilled.pop(key)
+            self._spillbytes -= _nbytes(mmap)
+            file.close()
+
+    def clear(self):
+        """
+        Method for removing all of the blocks from the cache (including the spilled blocks), and
+        resetting the statistics.
+
+        """
+
+        with self._lock:
+            for key in list(self._blocks) + list(self._spilled):
+                self._remove(key)
+
+            self.hits = 0
+            self.misses = 0
+            self.spillhits = 0
+            self.evictions = 0
@@ -0,0 +1,397 @@
+import os
+from glob import glob
+import numpy as np
+
+from rqpy.io._rqd import _read_rqd_header
+from rqpy.io._index import EventIndex, _npz_traces_info
+from rqpy.io._load import get_traces_npz, get_traces_rqd, get_traces_midgz, load_h5_dump, loadstanfordfile, _h5_nevents
+
+
+__all__ = ["Dataset"]
+
+
+_EXTENSIONS = {
+    "npz" : "npz",
+    "rqd" : "rqd",
+    "h5" : "h5",
+    "mid.gz" : "mid.gz",
+    "stanford" : "mat",
+}
+
+
+class Dataset(object):
+    """
+    Class for lazily accessing the events of a dataset made up of many dumps, such that only the
+    dumps that contain the requested events are read. The events are numbered consecutively over
+    all of the dumps (in the order of `files`), and can be selected by indexing the object or
+    streamed with `iter_chunks`.
+
+    For h5 dumps, only the requested channels and events are read from each dump. For the other file
+    types, at most one dump is held in memory at a time (the most recently read dump is kept, such that
+    reading chunks that are smaller than a dump does not read the dump again). For npz, rqd, and h5 dumps,
+    the number of events is read from the file headers. For mid.gz and stanford dumps, each dump has to be
+    read once to count its events, which is only done when the length of the dataset is needed. Streaming
+    the events with `iter_chunks` does not need the length, and counts the events of each dump as it is read.
+
+    Attributes
+    ----------
+    files : list of str
+        The paths to each dump in the dataset.
+    filetype : str
+        The type of the dumps, one of "npz", "rqd", "h5", "mid.gz", or "stanford".
+    basepath : str
+        The base path to the directory that contains the folders that the dumps are in.
+    channels : ndarray, list of str, NoneType
+        The channels that are loaded. These are indices of the channels, except for mid.gz dumps,
+        for which these are the channel names.
+    indstart : int, NoneType
+        The index of the first bin of each trace that is loaded.
+    indstop : int, NoneType
+        The index of the bin at which to stop loading each trace.
+    det : str, list of str
+        The detector name(s) of the channels, only used for mid.gz dumps.
+    convtoamps : float, list of floats, NoneType
+        The conversion factor from ADC bins to Amps, only used for mid.gz and stanford dumps.
+
+    """
+
+    def __init__(self, path, filetype="npz", channels=None, indstart=None, indstop=None, det="Z1",
+                 convtoamps=None):
+        """
+        Initialization of the Dataset class.
+
+        Parameters
+        ----------
+        path : str, list of str
+            The base path to the directory that contains the folders that the event dumps are in,
+            where the folders in this directory should be the series numbers (dumps directly in
+            the directory are also used). Alternatively, a list of the paths to each dump.
+        filetype : str, optional
+            The type of the dumps, one of "npz" (default), "rqd", "h5", "mid.gz", or "stanford"
+            (Stanford DAQ .mat files).
+        channels : int, list of int, str, list of str, NoneType, optional
+            The indices of the channels to load. If left as None, then all channels are loaded. For
+            mid.gz dumps, this should be the name(s) of the channel(s) to load, and must be set.
+        indstart : int, NoneType, optional
+            The index of the first bin of each trace to load. If left as None, then the traces are
+            loaded from the beginning.
+        indstop : int, NoneType, optional
+            The index of the bin at which to stop loading each trace. If left as None, then the traces
+            are loaded to the end.
+        det : str, list of str, optional
+            The detector name(s) of the channels, only used for mid.gz dumps, see
+            `rqpy.io.get_traces_midgz`. Default is "Z1".
+        convtoamps : float, list of floats, NoneType, optional
+            The conversion factor from ADC bins to Amps. Only used for mid.gz dumps, where if left as
+            None, then it is found with `rqpy.io.get_trace_gain`, and for stanford dumps, where if left
+            as None, then it is set to 1.
+
+        """
+
+        if filetype not in _EXTENSIONS:
+            raise ValueError(f"Unrecognized filetype {filetype}, should be one of {list(_EXTENSIONS)}.")
+
+        if isinstance(path, str):
+            ext = _EXTENSIONS[filetype]
+            files = sorted(glob(os.path.join(path, "*", f"*.{ext}"))) + sorted(glob(os.path.join(path, f"*.{ext}")))
+        else:
+            files = list(path)
+
+        if len(files) == 0:
+            raise IOError(f"No {filetype} dumps were found.")
+
+        if filetype == "mid.gz":
+            if channels is None:
+                raise ValueError("The channel names must be set for mid.gz dumps.")
+            if isinstance(channels, str):
+                channels = [channels]
+        elif channels is not None:
+            channels = np.atleast_1d(channels)
+
+        self.files = files
+        self.filetype = filetype
+        self.basepath = os.path.join(os.path.commonpath([os.path.dirname(os.path.dirname(os.path.abspath(f)))
+                                                         for f in files]), "")
+        self.channels = channels
+        self.indstart = indstart
+        self.indstop = indstop
+        self.det = det
+        self.convtoamps = convtoamps
+
+        self._nevents = None
+        self._index = None
+        self._cached = (None, None)
+
+    def __len__(self):
+        return int(np.sum(self.nevents))
+
+    def __getitem__(self, key):
+        if np.isscalar(key) and np.issubdtype(type(key), np.integer):
+            return self.read([key], lgcreturndict=False)[0]
+
+        return self.read(key, lgcreturndict=False)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the cached dump is not sent to other processes
+        state["_cached"] = (None, None)
+        return state
+
+    @property
+    def nevents(self):
+        """
+        The number of events in each dump.
+
+        """
+
+        if self._nevents is None:
+            self._nevents = np.array([self._count(file) for file in self.files], dtype=int)
+
+        return self._nevents
+
+    @property
+    def index(self):
+        """
+        The `rqpy.io.EventIndex` of the dumps, which is built the first time that it is used.
+
+        """
+
+        if self.filetype not in ["npz", "rqd", "mid.gz"]:
+            raise ValueError(f"An EventIndex cannot be built for {self.filetype} dumps.")
+
+        if self._index is None:
+            self._index = EventIndex.build(self.files, filetype=self.filetype)
+
+        return self._index
+
+    def _count(self, file):
+        """
+        Hidden method for getting the number of events in a dump.
+
+        """
+
+        if self.filetype == "npz":
+            return _npz_traces_info(file)[0][0]
+
+        if self.filetype == "rqd":
+            return _read_rqd_header(file)["arrays"]["traces"]["shape"][0]
+
+        if self.filetype == "h5":
+            import tables
+
+            with tables.open_file(file, mode="r") as f:
+                return _h5_nevents(f)
+
+        # the other file types have to be read to count the events
+        return len(self._readfile(file)[0])
+
+    def _readfile(self, file):
+        """
+        Hidden method for reading all of the events of a dump, where the last dump that was read
+        is cached.
+
+        Returns
+        -------
+        traces : ndarray, rqpy.io.ADCTraces
+            The traces of the dump, with the channel and bin selection applied only for npz dumps.
+        info_dict : dict
+            The event information of the dump.
+        lgcselected : bool
+            Whether or not the channel and bin selection has been applied to `traces`.
+
+        """
+
+        if self._cached[0] == file:
+            return self._cached[1]
+
+        lgcselected = False
+
+        if self.filetype == "npz":
+            traces, info_dict = get_traces_npz(file, channels=self.channels, indstart=self.indstart,
+                                               indstop=self.indstop, lgcadc=True)
+            lgcselected = True
+        elif self.filetype == "rqd":
+            traces, info_dict = get_traces_rqd(file, lgcadc=True)
+        elif self.filetype == "mid.gz":
+            traces, info_dict = get_traces_midgz([file], self.channels, self.det, convtoamps=self.convtoamps,
+                                                 lgcskip_empty=False, lgcreturndict=True)
+            lgcselected = self.indstart is None and self.indstop is None
+        elif self.filetype == "stanford":
+            convtoamps = 1 if self.convtoamps is None else self.convtoamps
+            traces, times, fs, _ = loadstanfordfile(file, convtoamps=convtoamps)
+            info_dict = {"eventtime" : times}
+
+        info_dict = {key: np.asarray(val) for key, val in info_dict.items()}
+
+        self._cached = (file, (traces, info_dict, lgcselected))
+
+        return traces, info_dict, lgcselected
+
+    def read(self, key, lgcreturndict=True):
+        """
+        Method for reading the specified events.
+
+        Parameters
+        ----------
+        key : slice, array_like
+            The indices of the events to read, as a slice, an array of indices, or a boolean mask.
+        lgcreturndict : bool, optional
+            If True (default), then the event information of the events is also returned.
+
+        Returns
+        -------
+        traces : ndarray
+            The traces of the events in units of Amps, with the channel and bin selection applied.
+            Dimensions are (number of events, number of channels, bins in each trace).
+        info_dict : dict, optional
+            The event information of the events, with the same keys as the loader of the file type,
+            e.g. `rqpy.io.get_traces_npz`. Only returned if `lgcreturndict` is True.
+
+        """
+
+        if isinstance(key, slice):
+            inds = np.arange(len(self))[key]
+        else:
+            inds = np.asarray(key)
+            if inds.dtype == bool:
+                inds = np.flatnonzero(inds)
+            inds = np.where(inds < 0, inds + len(self), inds).astype(int)
+
+        if np.any(inds < 0) or np.any(inds >= len(self)):
+            raise IndexError("Event index out of range for the dataset.")
+
+        starts = np.cumsum(np.concatenate(([0], self.nevents)))
+        fileinds = np.searchsorted(starts, inds, side="right") - 1
+
+        traces = []
+        info_dicts = []
+        order = []
+
+        for fileind in np.unique(fileinds):
+            cfile = np.flatnonzero(fileinds == fileind)
+            evtinds = inds[cfile] - starts[fileind]
+
+            x, info_dict = self._readevents(self.files[fileind], evtinds)
+            traces.append(x)
+            info_dicts.append(info_dict)
+            order.append(cfile)
+
+        if len(order) == 0:
+            raise IndexError("No events were selected.")
+
+        # put the events back in the order they were requested
+        order = np.argsort(np.concatenate(order), kind="stable")
+        traces = np.concatenate(traces)[order]
+
+        if not lgcreturndict:
+            return traces
+
+        info_dict = {key: np.concatenate([d[key] for d in info_dicts])[order] for key in info_dicts[0]}
+
+        return traces, info_dict
+
+    def _readevents(self, file, evtinds):
+        """
+        Hidden method for reading the specified events of a dump, with the channel and bin
+        selection applied.
+
+        """
+
+        if self.filetype == "h5":
+            # only the requested channels and events are read from the file
+            x, info_dict = load_h5_dump(file, lgcskip_empty=False, lgcreturndict=True,
+                                        channels=self.channels, evtinds=evtinds, lgcadc=True)
+            x = np.asarray(x[:, :, self.indstart:self.indstop], dtype=float)
+
+            return x, {key: np.asarray(val) for key, val in info_dict.items()}
+
+        x, info_dict, lgcselected = self._readfile(file)
+
+        return self._select(x, evtinds, lgcselected), {key: val[evtinds] for key, val in info_dict.items()}
+
+    def _select(self, traces, evtinds, lgcselected):
+        """
+        Hidden method for selecting events from the traces of a dump, and applying the channel and
+        bin selection if it has not been applied yet.
+
+        """
+
+        bins = slice(self.indstart, self.indstop)
+
+        if lgcselected:
+            x = traces[evtinds]
+        elif self.channels is None or self.filetype == "mid.gz":
+            x = traces[evtinds, :, bins]
+        else:
+            x = traces[evtinds[:, np.newaxis], self.channels[np.newaxis, :], bins]
+
+        return np.asarray(x, dtype=float)
+
+    def iter_chunks(self, n, lgcreturndict=False):
+        """
+        Method for streaming the events of the dataset in chunks, such that the memory used is set
+        by the size of the chunks rather than the size of the dataset. The dumps are read one at a
+        time, in order, such that the events of each dump are only counted when the dump is reached,
+        and mid.gz and stanford dumps are only read once.
+
+        Parameters
+        ----------
+        n : int
+            The number of events in each chunk. The last chunk can have fewer events.
+        lgcreturndict : bool, optional
+            If True, then the event information of each chunk is also returned. Default is False.
+
+        Yields
+        ------
+        traces : ndarray
+            The traces of the events in the chunk, see `rqpy.io.Dataset.read`.
+        info_dict : dict, optional
+            The event information of the events in the chunk. Only returned if `lgcreturndict` is True.
+
+        """
+
+        nevents = []
+        traces = []
+        info_dicts = []
+        nchunk = 0
+
+        for ii, file in enumerate(self.files):
+            # for mid.gz and stanford dumps, counting the events reads the dump, which is then kept
+            nevts = self._nevents[ii] if self._nevents is not None else self._count(file)
+            nevents.append(nevts)
+
+            start = 0
+
+            while start < nevts:
+                stop = min(nevts, start + n - nchunk)
+                x, info_dict = self._readevents(file, np.arange(start, stop))
+                traces.append(x)
+                info_dicts.append(info_dict)
+                nchunk += stop - start
+                start = stop
+
+                if nchunk == n:
+                    yield self._concatenate(traces, info_dicts, lgcreturndict)
+                    traces = []
+                    info_dicts = []
+                    nchunk = 0
+
+        if self._nevents is None:
+            self._nevents = np.array(nevents, dtype=int)
+
+        if nchunk > 0:
+            yield self._concatenate(traces, info_dicts, lgcreturndict)
+
+    @staticmethod
+    def _concatenate(traces, info_dicts, lgcreturndict):
+        """
+        Hidden method for joining the traces and event information read from several dumps.
+
+        """
+
+        traces = np.concatenate(traces)
+
+        if not lgcreturndict:
+            return traces
+
+        return traces, {key: np.concatenate([d[key] for d in info_dicts]) for key in info_dicts[0]}
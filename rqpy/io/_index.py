@@ -0,0 +1,458 @@
+import os
+import re
+import struct
+import zipfile
+from glob import glob
+import numpy as np
+
+from rqpy.io._rqd import _read_rqd_header, load_rqd
+from rqpy.io._adc import ADCTraces
+
+
+__all__ = ["EventIndex"]
+
+
+def _npz_traces_info(path, key="traces"):
+    """
+    Helper function for getting the location of an array inside of an npz file without loading it.
+
+    Parameters
+    ----------
+    path : str
+        Absolute path to the npz file.
+    key : str, optional
+        The name of the array in the npz file. Default is "traces".
+
+    Returns
+    -------
+    shape : tuple
+        The shape of the array.
+    dtype : numpy.dtype
+        The data type of the array.
+    dataoffset : int
+        The byte offset of the start of the array data in the file. This is -1 if the array
+        cannot be memory-mapped, i.e. if it is compressed or not C-ordered.
+
+    """
+
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(f"{key}.npy")
+
+        if info.compress_type != zipfile.ZIP_STORED:
+            with zf.open(info) as member:
+                version = np.lib.format.read_magic(member)
+                shape, fortran_order, dtype = _read_npy_header(member, version)
+            return shape, dtype, -1
+
+    with open(path, "rb") as f:
+        # the local file header has a fixed size of 30 bytes, followed by the file name and extra field
+        f.seek(info.header_offset + 26)
+        namelen, extralen = struct.unpack("<HH", f.read(4))
+        f.seek(info.header_offset + 30 + namelen + extralen)
+
+        version = np.lib.format.read_magic(f)
+        shape, fortran_order, dtype = _read_npy_header(f, version)
+        dataoffset = f.tell()
+
+    if fortran_order or dtype.hasobject:
+        dataoffset = -1
+
+    return shape, dtype, dataoffset
+
+
+def _read_npy_header(f, version):
+    """
+    Helper function for reading the header of an npy file for any format version.
+
+    """
+
+    if version == (1, 0):
+        return np.lib.format.read_array_header_1_0(f)
+
+    return np.lib.format.read_array_header_2_0(f)
+
+
+def _load_npz_traces(path):
+    """
+    Helper function for loading all of the traces of an npz dump, where the traces of dumps saved
+    as ADC bins are returned as a `rqpy.io.ADCTraces` object.
+
+    """
+
+    with np.load(path) as data:
+        if "convtoamps" in data.files:
+            return ADCTraces(data["traces"], data["convtoamps"])
+        return data["traces"]
+
+
+class EventIndex(object):
+    """
+    Class for a persistent index of the dumps of a dataset, which maps each (seriesnumber, eventnumber)
+    to the file that contains the event and, for npz and rqd dumps, the byte offset and size of its trace. The
+    index is built once per dataset, after which only the requested traces need to be read.
+
+    The event numbers are assumed to follow the convention of `rqpy.io.get_traces_npz`, where the
+    event number is 10000*dumpnumber + (index of the event in the dump) + 1. The rqd dumps (see 
+    `rqpy.io.saveevents_rqd`) follow the same convention.
+
+    Attributes
+    ----------
+    filetype : str
+        The type of the indexed dumps, either "npz", "rqd", or "mid.gz".
+    files : ndarray
+        The path to each indexed dump.
+    seriesnumber : ndarray
+        The series number of each dump.
+    dumpnumber : ndarray
+        The dump number of each dump.
+    nevents : ndarray
+        The number of events in each dump. This is -1 for mid.gz dumps.
+    dataoffset : ndarray
+        The byte offset of the first trace in each dump. This is -1 if the traces cannot be
+        memory-mapped, e.g. for compressed npz or mid.gz dumps.
+    recordsize : ndarray
+        The size in bytes of a single trace (all channels) in each dump. This is 0 for mid.gz dumps.
+    traceshape : ndarray
+        The (number of channels, number of bins) of the traces in each dump. This is (0, 0) for
+        mid.gz dumps.
+    dtype : ndarray
+        The data type (as a string) of the traces in each dump.
+
+    """
+
+    def __init__(self, filetype, files, seriesnumber, dumpnumber, nevents, dataoffset, recordsize,
+                 traceshape, dtype):
+        """
+        Initialization of the index from its columns, see `EventIndex.build` for creating an index
+        of a dataset.
+
+        Parameters
+        ----------
+        filetype : str
+            The type of the indexed dumps, either "npz", "rqd", or "mid.gz".
+        files : array_like
+            The path to each indexed dump.
+        seriesnumber : array_like
+            The series number of each dump.
+        dumpnumber : array_like
+            The dump number of each dump.
+        nevents : array_like
+            The number of events in each dump.
+        dataoffset : array_like
+            The byte offset of the first trace in each dump.
+        recordsize : array_like
+            The size in bytes of a single trace in each dump.
+        traceshape : array_like
+            The (number of channels, number of bins) of the traces in each dump.
+        dtype : array_like
+            The data type (as a string) of the traces in each dump.
+
+        """
+
+        self.filetype = str(filetype)
+        self.files = np.asarray(files, dtype=str)
+        self.seriesnumber = np.asarray(seriesnumber, dtype=np.int64)
+        self.dumpnumber = np.asarray(dumpnumber, dtype=np.int64)
+        self.nevents = np.asarray(nevents, dtype=np.int64)
+        self.dataoffset = np.asarray(dataoffset, dtype=np.int64)
+        self.recordsize = np.asarray(recordsize, dtype=np.int64)
+        self.traceshape = np.asarray(traceshape, dtype=np.int64).reshape(-1, 2)
+        self.dtype = np.asarray(dtype, dtype=str)
+
+        # sorted keys for looking up the dump of each event
+        self._keys = self.seriesnumber * 100000 + self.dumpnumber
+        self._order = np.argsort(self._keys, kind="stable")
+
+        if np.any(np.diff(self._keys[self._order]) == 0):
+            raise IOError("There are multiple dumps with the same series number and dump number in the index.")
+
+    def __len__(self):
+        return len(self.files)
+
+    @classmethod
+    def build(cls, basepath, filetype="npz"):
+        """
+        Method for building the index of a dataset, which only reads the headers of the dumps.
+
+        Parameters
+        ----------
+        basepath : str, list of str
+            The base path to the directory that contains the folders that the event dumps are in,
+            where the folders in this directory should be the series numbers. Alternatively, a list
+            of the paths to the dumps to index.
+        filetype : str, optional
+            The type of the dumps to index, either "npz" (default), "rqd", or "mid.gz".
+
+        Returns
+        -------
+        index : EventIndex
+            The index of the dataset.
+
+        """
+
+        if filetype not in ["npz", "rqd", "mid.gz"]:
+            raise ValueError("Only npz, rqd, and mid.gz file types are currently supported by EventIndex")
+
+        if isinstance(basepath, list):
+            files = sorted(basepath)
+        else:
+            files = sorted(glob(os.path.join(basepath, "*", f"*.{filetype}")))
+
+        if len(files) == 0:
+            raise IOError(f"No {filetype} dumps were found to index.")
+
+        seriesnumber = []
+        dumpnumber = []
+        nevents = []
+        dataoffset = []
+        recordsize = []
+        traceshape = []
+        dtype = []
+
+        for file in files:
+            if filetype in ["npz", "rqd"]:
+                # same naming convention as `rqpy.io.get_traces_npz`
+                filename = os.path.basename(file).split('.')[0]
+                seriesnumber.append(int(str().join(filename.split('_')[:2])))
+                dumpnumber.append(int(filename.split('_')[-1]))
+
+                if filetype == "npz":
+                    shape, dt, offset = _npz_traces_info(file)
+                else:
+                    meta = _read_rqd_header(file)["arrays"]["traces"]
+                    shape, dt, offset = meta["shape"], np.dtype(meta["dtype"]), meta["offset"]
+
+                nevents.append(shape[0])
+                dataoffset.append(offset)
+                recordsize.append(int(np.prod(shape[1:])) * dt.itemsize)
+                traceshape.append(shape[1:])
+                dtype.append(dt.str)
+            else:
+                # the series number is the folder name, and the dump number follows "_F" in the file name
+                seriesnumber.append(int(os.path.basename(os.path.dirname(file)).replace('_', '')))
+                dumpnumber.append(int(re.search(r"_F(\d+)", os.path.basename(file)).group(1)))
+
+                nevents.append(-1)
+                dataoffset.append(-1)
+                recordsize.append(0)
+                traceshape.append((0, 0))
+                dtype.append("")
+
+        return cls(filetype, files, seriesnumber, dumpnumber, nevents, dataoffset, recordsize, traceshape, dtype)
+
+    def save(self, path):
+        """
+        Method for saving the index to an npz file.
+
+        Parameters
+        ----------
+        path : str
+            The path to save the index to.
+
+        """
+
+        np.savez(
+            path,
+            filetype=self.filetype,
+            files=self.files,
+            seriesnumber=self.seriesnumber,
+            dumpnumber=self.dumpnumber,
+            nevents=self.nevents,
+            dataoffset=self.dataoffset,
+            recordsize=self.recordsize,
+            traceshape=self.traceshape,
+            dtype=self.dtype,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Method for loading an index that was saved with `EventIndex.save`.
+
+        Parameters
+        ----------
+        path : str
+            The path to the saved index.
+
+        Returns
+        -------
+        index : EventIndex
+            The loaded index.
+
+        """
+
+        with np.load(path) as data:
+            return cls(**{key: data[key] for key in data.files})
+
+    def _lookup(self, seriesnumbers, eventnumbers):
+        """
+        Helper method for finding the dump and the index in the dump of each event.
+
+        Parameters
+        ----------
+        seriesnumbers : array_like
+            The series number of each event.
+        eventnumbers : array_like
+            The event number of each event.
+
+        Returns
+        -------
+        rows : ndarray
+            The index of the dump of each event in the index.
+        evtinds : ndarray
+            The index of each event in its dump.
+
+        """
+
+        seriesnumbers = np.asarray(seriesnumbers, dtype=np.int64)
+        eventnumbers = np.asarray(eventnumbers, dtype=np.int64)
+
+        keys = seriesnumbers * 100000 + eventnumbers//10000
+        sortedkeys = self._keys[self._order]
+
+        pos = np.clip(np.searchsorted(sortedkeys, keys), 0, len(sortedkeys) - 1)
+        found = sortedkeys[pos] == keys
+
+        if not np.all(found):
+            missing = np.flatnonzero(~found)[0]
+            raise KeyError(
+                f"The event with series number {seriesnumbers[missing]} and event number "
+                f"{eventnumbers[missing]} is not in any of the indexed dumps."
+            )
+
+        rows = self._order[pos]
+        evtinds = np.mod(eventnumbers, 10000) - 1
+
+        if self.filetype != "mid.gz" and np.any(evtinds >= self.nevents[rows]):
+            raise KeyError("Some of the event numbers are larger than the number of events in their dumps.")
+
+        return rows, evtinds
+
+    def locate(self, seriesnumbers, eventnumbers):
+        """
+        Method for finding the file, byte offset, and record size of each event.
+
+        Parameters
+        ----------
+        seriesnumbers : array_like
+            The series number of each event.
+        eventnumbers : array_like
+            The event number of each event.
+
+        Returns
+        -------
+        files : ndarray
+            The path to the dump that contains each event.
+        offsets : ndarray
+            The byte offset of the trace of each event in its file. This is -1 if the traces of
+            the dump cannot be memory-mapped.
+        recordsize : ndarray
+            The size in bytes of the trace of each event.
+
+        """
+
+        rows, evtinds = self._lookup(seriesnumbers, eventnumbers)
+
+        offsets = self.dataoffset[rows] + evtinds * self.recordsize[rows]
+        offsets[self.dataoffset[rows] < 0] = -1
+
+        return self.files[rows], offsets, self.recordsize[rows]
+
+    def getfiles(self, seriesnumbers, eventnumbers):
+        """
+        Method for getting the dumps that contain the specified events.
+
+        Parameters
+        ----------
+        seriesnumbers : array_like
+            The series number of each event.
+        eventnumbers : array_like
+            The event number of each event.
+
+        Returns
+        -------
+        files : list of str
+            The sorted paths to the dumps that contain the events.
+
+        """
+
+        rows = self._lookup(seriesnumbers, eventnumbers)[0]
+
+        return sorted(set(self.files[rows]))
+
+    def read(self, seriesnumbers, eventnumbers, cache=None):
+        """
+        Method for reading the traces of the specified events from npz or rqd dumps, where only the
+        requested traces are read using memory-mapping (if the dumps are uncompressed).
+
+        Parameters
+        ----------
+        seriesnumbers : array_like
+            The series number of each event.
+        eventnumbers : array_like
+            The event number of each event.
+        cache : NoneType, rqpy.io.TraceCache, optional
+            A cache of the decompressed traces of compressed dumps, such that each compressed dump is
+            only decompressed once while it is in the cache. If left as None, then no cache is used.
+
+        Returns
+        -------
+        traces : ndarray
+            The traces of the events, in the same order as the inputted events, with shape
+            (number of events, number of channels, number of bins). Traces of dumps saved as
+            ADC bins are converted to Amps.
+
+        """
+
+        if self.filetype == "mid.gz":
+            raise ValueError("Only the traces of npz and rqd dumps can be read from the index.")
+
+        rows, evtinds = self._lookup(seriesnumbers, eventnumbers)
+
+        if len(rows) == 0:
+            raise ValueError("No events were inputted.")
+
+        if len(set(map(tuple, self.traceshape[rows]))) > 1 or len(set(self.dtype[rows])) > 1:
+            raise ValueError("The traces of the inputted events have different shapes or data types.")
+
+        traceshape = tuple(self.traceshape[rows[0]])
+        dtype = np.dtype(self.dtype[rows[0]])
+        lgcadc = np.issubdtype(dtype, np.integer)
+        traces = np.empty((len(rows),) + traceshape, dtype=float if lgcadc else dtype)
+
+        for row in np.unique(rows):
+            crow = rows == row
+
+            if self.dataoffset[row] >= 0:
+                data = np.memmap(self.files[row], dtype=dtype, mode="r", offset=self.dataoffset[row],
+                                 shape=(self.nevents[row],) + traceshape)
+                traces[crow] = data[evtinds[crow]]
+                del data
+            elif cache is not None:
+                # the cached traces of dumps saved as ADC bins are converted to Amps when indexed
+                block = cache.get(os.path.abspath(self.files[row]),
+                                  lambda: _load_npz_traces(self.files[row]))
+                traces[crow] = block[evtinds[crow]]
+                continue
+            else:
+                with np.load(self.files[row]) as data:
+                    traces[crow] = data["traces"][evtinds[crow]]
+
+            if lgcadc:
+                # dumps saved as ADC bins store the conversion factor to Amps of each channel
+                traces[crow] *= self._convtoamps(row)[:, np.newaxis]
+
+        return traces
+
+    def _convtoamps(self, row):
+        """
+        Helper method for reading the conversion factor from ADC bins to Amps of each channel
+        of a dump that was saved as ADC bins.
+
+        """
+
+        if self.filetype == "rqd":
+            return np.array(load_rqd(self.files[row])[0]["convtoamps"])
+
+        with np.load(self.files[row]) as data:
+            return data["convtoamps"]
@@ -1,13 +1,18 @@
 import os
+import time
+import pickle
 import numpy as np
 import pandas as pd
 from scipy.io import loadmat
-import matplotlib.pyplot as plt
 from glob import glob
+from operator import itemgetter
 import warnings
-import deepdish as dd
+from concurrent.futures import ThreadPoolExecutor
 
 from rqpy import HAS_RAWIO
+from rqpy.io._index import EventIndex, _npz_traces_info, _load_npz_traces
+from rqpy.io._rqd import load_rqd
+from rqpy.io._adc import ADCTraces
 
 if HAS_RAWIO:
     from rawio.IO import getRawEvents, getDetectorSettings
@@ -16,25 +21,36 @@ if HAS_RAWIO:
 __all__ = [
     "getrandevents",
     "get_trace_gain",
+    "get_detector_settings",
+    "clear_settings_cache",
     "get_traces_midgz",
     "get_traces_npz",
+    "get_traces_rqd",
     "loadstanfordfile",
+    "StanfordFiles",
     "load_h5_dump",
+    "get_livetime",
 ]
 
 
+# detector settings of each series that have been loaded in this process,
+# keyed by the normalized absolute path of the folder of the series
+_SETTINGS_CACHE = {}
+
+
 def getrandevents(basepath, evtnums, seriesnums, cut=None, channels=["PDS1"], det="Z1", sumchans=False, 
                   convtoamps=1, fs=625e3, lgcplot=False, ntraces=1, nplot=20, seed=None, indbasepre=None,
-                  filetype="mid.gz"):
+                  filetype="mid.gz", index=None, cache=None):
     """
     Function for loading (and plotting) random events from a datasets. Has functionality to pull
     randomly from a specified cut. For use with `rawio.IO.getRawEvents`
 
     Parameters
     ----------
-    basepath : str
+    basepath : str, rqpy.io.Dataset
         The base path to the directory that contains the folders that the event dumps
-        are in. The folders in this directory should be the series numbers.
+        are in. The folders in this directory should be the series numbers. Alternatively,
+        a `rqpy.io.Dataset` of the dumps, in which case its index is used if `index` is None.
     evtnums : array_like
         An array of all event numbers for the events in all datasets.
     seriesnums : array_like
@@ -71,8 +87,20 @@ def getrandevents(basepath, evtnums, seriesnums, cut=None, channels=["PDS1"], de
         This baseline will then be subtracted from the traces when plotting. If left as None, no
         baseline subtraction will be done.
     filetype : str, optional
-        The string that corresponds to the file type that will be opened. Supports two 
-        types -"mid.gz" and "npz". "mid.gz" is the default.
+        The string that corresponds to the file type that will be opened. Supports three 
+        types -"mid.gz", "npz", and "rqd". "mid.gz" is the default.
+    index : NoneType, str, rqpy.io.EventIndex, optional
+        The event index of the dataset, or the path to a saved index, see `rqpy.io.EventIndex`. If
+        passed, then only the requested traces are read from npz dumps, and only the mid.gz dumps
+        that contain the requested events are opened. For npz dumps, the traces are then returned
+        in the same order as the events in `evtnums`. If left as None, then the dumps are searched 
+        for in `basepath`.
+    cache : NoneType, rqpy.io.TraceCache, optional
+        A cache of the decompressed traces of npz dumps, which can be shared between calls (e.g. when
+        plotting and then simulating pulses with `rqpy.sim.buildfakepulses` for the same cut), such that
+        each dump is only decompressed once while it is in the cache. This is only used for npz dumps, 
+        as the traces of rqd dumps are memory-mapped and only the requested events of mid.gz dumps are
+        read. If left as None, then no cache is used.
 
     Returns
     -------
@@ -120,8 +148,34 @@ def getrandevents(basepath, evtnums, seriesnums, cut=None, channels=["PDS1"], de
     crand = np.zeros(len(evtnums), dtype=bool)
     crand[inds] = True
 
+    if isinstance(index, str):
+        index = EventIndex.load(index)
+
+    from rqpy.io._dataset import Dataset
+
+    if isinstance(basepath, Dataset):
+        if basepath.filetype != filetype:
+            raise ValueError(f"The inputted dataset has {basepath.filetype} dumps, but filetype is {filetype}.")
+        if index is None:
+            index = basepath.index
+        basepath = basepath.basepath
+
+    if index is None and filetype == "rqd":
+        # the rqd headers are small, so the index is quick to build
+        index = EventIndex.build(basepath, filetype="rqd")
+
+    if index is not None and index.filetype != filetype:
+        raise ValueError(f"The inputted index is for {index.filetype} dumps, but filetype is {filetype}.")
+
     arrs = list()
-    for snum in seriesnums[crand].unique():
+    if index is not None and filetype in ["npz", "rqd"]:
+        # only the requested traces are read, so there is no need to loop over the series
+        arrs.append(index.read(seriesnums[crand], evtnums[crand], cache=cache))
+        snums = []
+    else:
+        snums = seriesnums[crand].unique()
+
+    for snum in snums:
         cseries = crand & (seriesnums == snum)
 
         if filetype == "mid.gz":
@@ -140,6 +194,19 @@ def getrandevents(basepath, evtnums, seriesnums, cut=None, channels=["PDS1"], de
 
             dets = [int("".join(filter(str.isdigit, d))) for d in det]
 
+            if index is not None:
+                # only open the dumps that contain the requested events
+                for file in index.getfiles(seriesnums[cseries], evtnums[cseries]):
+                    arrs.append(getRawEvents(
+                        f"{os.path.dirname(file)}/",
+                        os.path.basename(file),
+                        channelList=channels,
+                        detectorList=list(set(dets)),
+                        outputFormat=3,
+                        eventNumbers=evtnums[cseries].astype(int).tolist(),
+                    ))
+                continue
+
             arr = getRawEvents(
                 f"{basepath}{snum_str}/",
                 "",
@@ -168,8 +235,17 @@ def getrandevents(basepath, evtnums, seriesnums, cut=None, channels=["PDS1"], de
                         "it unclear which one to open."
                     )
 
+                if cache is not None:
+                    block = cache.get(os.path.abspath(matching_files[0]),
+                                      lambda: _load_npz_traces(matching_files[0]))
+                    arr.append(block[inds])
+                    continue
+
                 with np.load(matching_files[0]) as f:
-                    arr.append(f["traces"][inds])
+                    if "convtoamps" in f.files:
+                        arr.append(ADCTraces(f["traces"][inds], f["convtoamps"])[...])
+                    else:
+                        arr.append(f["traces"][inds])
 
             arr = np.vstack(arr)
 
@@ -193,7 +269,7 @@ def getrandevents(basepath, evtnums, seriesnums, cut=None, channels=["PDS1"], de
 
         x = np.vstack(xs)
 
-    elif filetype == "npz":
+    elif filetype in ["npz", "rqd"]:
         x = np.vstack(arrs).astype(float)
         channels = list(range(x.shape[1]))
 
@@ -202,6 +278,8 @@ def getrandevents(basepath, evtnums, seriesnums, cut=None, channels=["PDS1"], de
     x*=convtoamps_arr
 
     if lgcplot:
+        import matplotlib.pyplot as plt
+
         if nplot>ntraces:
             nplot = ntraces
 
@@ -237,7 +315,92 @@ def getrandevents(basepath, evtnums, seriesnums, cut=None, channels=["PDS1"], de
     return t, x, crand
 
 
-def get_trace_gain(path, chan, det, rfb=5000, loopgain=2.4, adcpervolt=2**(16)/8, lowpassgain=4):
+def _series_folder(path):
+    """
+    Helper function for getting the normalized absolute path of the folder of a series,
+    given either the folder or the path to one of its dumps.
+
+    """
+
+    path = os.path.normpath(os.path.abspath(path))
+
+    if os.path.splitext(path)[-1]:
+        path = os.path.dirname(path)
+
+    return path
+
+
+def get_detector_settings(path, lgcpersist=False):
+    """
+    Function for loading the detector settings of a series of mid.gz files. The settings
+    are cached by series for the rest of the process, such that they are only parsed from
+    the raw files the first time that they are requested for each series, regardless of
+    which dump of the series is passed.
+
+    Parameters
+    ----------
+    path : str
+        Absolute path to the folder that contains the dumps of the series, or to one of
+        the dumps of the series.
+    lgcpersist : bool, optional
+        If True, then the settings are also saved to a pickle file in the folder of the
+        series (named "<series>_detector_settings.pkl"), which is loaded instead of parsing
+        the raw files if it already exists, e.g. in another process. If the file cannot be
+        written, then a warning is raised and the settings are only cached in memory.
+        Default is False.
+
+    Returns
+    -------
+    settings : dict
+        The detector settings, as returned by `rawio.IO.getDetectorSettings`. This is
+        the cached object, and should be copied before it is modified.
+
+    """
+
+    folder = _series_folder(path)
+
+    if folder in _SETTINGS_CACHE:
+        return _SETTINGS_CACHE[folder]
+
+    settingsfile = os.path.join(folder, f"{os.path.basename(folder)}_detector_settings.pkl")
+
+    if lgcpersist and os.path.isfile(settingsfile):
+        with open(settingsfile, "rb") as f:
+            settings = pickle.load(f)
+    else:
+        if not HAS_RAWIO:
+            raise ImportError("Cannot use get_detector_settings because cdms rawio is not installed.")
+
+        # the settings are parsed from the passed dump, or from the dumps in the folder
+        if os.path.splitext(path)[-1]:
+            settings = getDetectorSettings(os.path.dirname(path), os.path.basename(path))
+        else:
+            settings = getDetectorSettings(path, "")
+
+        if lgcpersist:
+            try:
+                with open(settingsfile, "wb") as f:
+                    pickle.dump(settings, f)
+            except OSError as e:
+                warnings.warn(f"Could not save the detector settings to {settingsfile}: {e}")
+
+    _SETTINGS_CACHE[folder] = settings
+
+    return settings
+
+
+def clear_settings_cache():
+    """
+    Function for clearing the detector settings that have been cached in this process
+    by `rqpy.io.get_detector_settings`. The persisted files are not removed.
+
+    """
+
+    _SETTINGS_CACHE.clear()
+
+
+def get_trace_gain(path, chan, det, rfb=5000, loopgain=2.4, adcpervolt=2**(16)/8, lowpassgain=4,
+                   lgcpersist=False):
     """
     Calculates the conversion from ADC bins to TES current for mid.gz files.
 
@@ -265,6 +428,9 @@ def get_trace_gain(path, chan, det, rfb=5000, loopgain=2.4, adcpervolt=2**(16)/8
             For RevD, this is 2
             For RevE, this is 4
         This parameter defaults to RevE.
+    lgcpersist : bool, optional
+        If True, then the detector settings are persisted next to the data, see
+        `rqpy.io.get_detector_settings`. Default is False.
 
     Returns
     -------
@@ -277,15 +443,8 @@ def get_trace_gain(path, chan, det, rfb=5000, loopgain=2.4, adcpervolt=2**(16)/8
 
     """
 
-    if not HAS_RAWIO:
-        raise ImportError("Cannot use get_trace_gain because cdms rawio is not installed.")
-
-    series = path.split('/')[-1]
-
-    if os.path.splitext(path)[-1]:
-        path = os.path.dirname(path)
-
-    settings = getDetectorSettings(path, series)
+    # the settings are cached by series, so only the first call for each series parses the raw files
+    settings = get_detector_settings(path, lgcpersist=lgcpersist)
     qetbias = settings[det][chan]['qetBias']
     drivergain = settings[det][chan]['driverGain']
     convtoamps = 1 / (rfb * loopgain * drivergain * lowpassgain * adcpervolt)
@@ -407,102 +566,153 @@ def get_traces_midgz(path, channels, det, convtoamps=None, lgcskip_empty=True, l
     x*=convtoamps_arr
 
     if lgcreturndict:
-
-        columns = [
-            "eventnumber",
-            "seriesnumber",
-            "eventtime",
-            "triggertype",
-            "pollingendtime",
-            "triggertime",
-            "triggeramp",
-            "triggermask",
-            "triggerdetnum",
-        ]
-
-        columns_trigveto = [
-            "readoutstatus",
-            "deadtime",
-            "livetime",
-            "triggervetoreadouttime",
-            "seriestime",
-            "waveformreadendtime",
-            "waveformreadstarttime",
-        ]
-
-        for item in columns_trigveto:
-            for d in set(det):
-                columns.append(f"{item}{d}")
-
-        info_dict = {}
-        for item in columns:
-            info_dict[item] = []
-
-        for ev, trig, trigv in zip(events["event"], events["trigger"], events["trigger_veto"]):
-            info_dict["eventnumber"].append(ev["EventNumber"])
-            info_dict["seriesnumber"].append(ev["SeriesNumber"])
-            info_dict["eventtime"].append(ev["EventTime"])
-            info_dict["triggertype"].append(ev["TriggerType"])
-            info_dict["triggeramp"].append(trig['TriggerAmplitude'])
-            info_dict["pollingendtime"].append(ev["PollingEndTime"])
-            info_dict["triggertime"].append(trig["TriggerTime"])
-            info_dict["triggermask"].append(trig["TriggerMask"])
-            info_dict["triggerdetnum"].append(trig["TriggerDetNum"])
-
-            for d in set(det):
-                try:
-                    info_dict[f"readoutstatus{d}"].append(trigv[d]["ReadoutStatus"])
-                except:
-                    info_dict[f"readoutstatus{d}"].append(-999999.0)
-
-                try:
-                    info_dict[f"deadtime{d}"].append(trigv[d]["DeadTime0"])
-                except:
-                    info_dict[f"deadtime{d}"].append(-999999.0)
-
-                try:
-                    info_dict[f"livetime{d}"].append(trigv[d]["LiveTime0"])
-                except:
-                    info_dict[f"livetime{d}"].append(-999999.0)
-
-                try:
-                    info_dict[f"triggervetoreadouttime{d}"].append(trigv[d]["TriggerVetoReadoutTime0"])
-                except:
-                    info_dict[f"triggervetoreadouttime{d}"].append(-999999.0)
-
-                try:
-                    info_dict[f"seriestime{d}"].append(trigv[d]["SeriesTime"])
-                except:
-                    info_dict[f"seriestime{d}"].append(-999999.0)
-
-                try:
-                    info_dict[f"waveformreadendtime{d}"].append(trigv[d]["WaveformReadEndTime"])
-                except:
-                    info_dict[f"waveformreadendtime{d}"].append(-999999.0)
-
-                try:
-                    info_dict[f"waveformreadstarttime{d}"].append(trigv[d]["WaveformReadStartTime"])
-                except:
-                    info_dict[f"waveformreadstarttime{d}"].append(-999999.0)
-
+        info_dict = _midgz_info_dict(events, det)
         return x, info_dict
     else:
         return x
 
 
-def get_traces_npz(path):
+def _midgz_info_dict(events, det):
+    """
+    Helper function for extracting the event information of each event returned by `getRawEvents`
+    as columns, see `rqpy.io.get_traces_midgz` for the keys. Trigger veto information that is missing
+    for a detector is set to -999999.0.
+
+    Parameters
+    ----------
+    events : dict
+        The events returned by `getRawEvents` with outputFormat=3.
+    det : list of str
+        The detector name of each channel.
+
+    Returns
+    -------
+    info_dict : dict
+        Dictionary of the event information, where each value is an ndarray.
+
+    """
+
+    columns_event = {
+        "eventnumber" : "EventNumber",
+        "seriesnumber" : "SeriesNumber",
+        "eventtime" : "EventTime",
+        "triggertype" : "TriggerType",
+        "pollingendtime" : "PollingEndTime",
+    }
+
+    columns_trigger = {
+        "triggertime" : "TriggerTime",
+        "triggeramp" : "TriggerAmplitude",
+        "triggermask" : "TriggerMask",
+        "triggerdetnum" : "TriggerDetNum",
+    }
+
+    columns_trigveto = {
+        "readoutstatus" : "ReadoutStatus",
+        "deadtime" : "DeadTime0",
+        "livetime" : "LiveTime0",
+        "triggervetoreadouttime" : "TriggerVetoReadoutTime0",
+        "seriestime" : "SeriesTime",
+        "waveformreadendtime" : "WaveformReadEndTime",
+        "waveformreadstarttime" : "WaveformReadStartTime",
+    }
+
+    info_dict = {}
+
+    for key, col in columns_event.items():
+        info_dict[key] = np.array(list(map(itemgetter(col), events["event"])))
+
+    for key, col in columns_trigger.items():
+        info_dict[key] = np.array(list(map(itemgetter(col), events["trigger"])))
+
+    trigveto = {}
+    for d in set(det):
+        trigveto[d] = [trigv.get(d) if isinstance(trigv, dict) else None for trigv in events["trigger_veto"]]
+        trigveto[d] = [rec if isinstance(rec, dict) else {} for rec in trigveto[d]]
+
+    for key, col in columns_trigveto.items():
+        for d in set(det):
+            # events without trigger veto information for this detector are filled with the sentinel value
+            info_dict[f"{key}{d}"] = np.array([rec.get(col, -999999.0) for rec in trigveto[d]])
+
+    return info_dict
+
+
+def _read_npz_dump(file, header, out, chans, bins):
+    """
+    Helper function for reading a single npz dump for `rqpy.io.get_traces_npz`, where the selected
+    channels and bins of the traces are written directly into `out`.
+
+    Parameters
+    ----------
+    file : str
+        Absolute path to the dump.
+    header : tuple
+        The shape, data type, and data offset of the traces in the dump, see `_npz_traces_info`.
+    out : ndarray
+        The array to write the selected traces to.
+    chans : slice, ndarray
+        The channels to read.
+    bins : slice
+        The bins to read.
+
+    Returns
+    -------
+    data : dict
+        Dictionary of the other arrays in the dump.
+
+    """
+
+    shape, dtype, dataoffset = header
+
+    with np.load(file) as data:
+        if shape[0] == 0:
+            pass
+        elif dataoffset >= 0:
+            # uncompressed traces are memory-mapped, so only the selected channels and bins are read
+            traces = np.memmap(file, dtype=dtype, mode="r", offset=dataoffset, shape=shape)
+            out[:] = traces[:, chans, bins]
+            del traces
+        else:
+            out[:] = data["traces"][:, chans, bins]
+
+        return {key: data[key] for key in data.files if key != "traces"}
+
+def get_traces_npz(path, channels=None, indstart=None, indstop=None, nthreads=1, lgcadc=False, dtype=np.float64):
     """
     Function to return raw traces and event information for a single channel for `npz` files.
 
+    The headers of the dumps are read first, such that the traces are written directly into a
+    preallocated array. Uncompressed dumps (e.g. saved by `rqpy.io.saveevents_npz`) are memory-mapped,
+    such that only the selected channels and bins are read from disk.
+
     Parameters
     ----------
     path : str, list of str
         Absolute path, or list of paths, to the dump to open.
+    channels : int, list of int, NoneType, optional
+        The indices of the channels to load. If left as None, then all channels are loaded.
+    indstart : int, NoneType, optional
+        The index of the first bin of each trace to load. If left as None, then the traces are
+        loaded from the beginning.
+    indstop : int, NoneType, optional
+        The index of the bin at which to stop loading each trace. If left as None, then the traces 
+        are loaded to the end.
+    nthreads : int, optional
+        The number of threads to use to read (and decompress) the dumps in parallel. Default is 1.
+    lgcadc : bool, optional
+        If True, then traces that were saved as integer ADC bins are returned as a `rqpy.io.ADCTraces`
+        object, which converts the traces to units of TES current only when they are indexed. If False
+        (default), then the traces are converted to units of TES current when loaded.
+    dtype : numpy.dtype, optional
+        The floating point type that traces saved as ADC bins are converted to. Default is np.float64.
 
     Returns
     -------
-    traces : ndarray
+    traces : ndarray, rqpy.io.ADCTraces
         Array of traces in the specified dump. Dimensions are (number of traces, number of channels, bins in each trace)
+        If the traces were saved as integer ADC bins and `lgcadc` is True, then this is a `rqpy.io.ADCTraces`
+        object.
     info_dict : dict
         Dictionary that contains extra information on each event. Includes timing and trigger information.
         The keys in the dictionary are as follows.
@@ -522,62 +732,167 @@ def get_traces_npz(path):
     if not isinstance(path, list):
         path = [path]
 
-    info_dict = {}
+    headers = [_npz_traces_info(file) for file in path]
+
+    if len(set(header[0][1:] for header in headers)) > 1:
+        raise ValueError("The traces in the inputted dumps have different shapes.")
+
+    nevts = [header[0][0] for header in headers]
+    nchan, nbins = headers[0][0][1:]
+
+    chans = slice(None) if channels is None else np.atleast_1d(channels)
+    bins = slice(indstart, indstop)
+
+    traces = np.empty(
+        (sum(nevts), nchan if channels is None else len(chans), len(range(nbins)[bins])),
+        dtype=np.result_type(*[header[1] for header in headers]),
+    )
+    starts = np.cumsum([0] + nevts)
+
+    with ThreadPoolExecutor(max_workers=nthreads) as executor:
+        dumps = list(executor.map(
+            lambda ii: _read_npz_dump(path[ii], headers[ii], traces[starts[ii]:starts[ii+1]], chans, bins),
+            range(len(path)),
+        ))
 
-    traces = []
     eventnumber = []
     seriesnumber = []
-    trigtimes = []
-    trigamps = []
-    pulsetimes = []
-    pulseamps = []
-    randomstimes = []
-    trigtypes = []
-    truthamps = []
-    truthtdelay = []
 
-    for file in path:
+    for file, nevt in zip(path, nevts):
         filename = file.split('/')[-1].split('.')[0]
         seriesnum = int(str().join(filename.split('_')[:2]))
         dumpnum = int(filename.split('_')[-1])
-    
-        with np.load(file) as data:
-            has_sim_data = "truthamps" in data.keys() and "truthtdelay" in data.keys()
 
-            trigtimes.append(data["trigtimes"])
-            trigamps.append(data["trigamps"])
-            pulsetimes.append(data["pulsetimes"])
-            pulseamps.append(data["pulseamps"])
-            randomstimes.append(data["randomstimes"])
-            trigtypes.append(data["trigtypes"])
-            traces.append(data["traces"])
-            nevts = len(data["traces"])
+        eventnumber.append(10000*dumpnum + 1 + np.arange(nevt))
+        seriesnumber.append(np.full(nevt, seriesnum))
+
+    info_dict = {}
+
+    info_dict["eventnumber"] = np.concatenate(eventnumber)
+    info_dict["ttltimes"] = np.concatenate([dump["trigtimes"] for dump in dumps])
+    info_dict["ttlamps"] = np.concatenate([dump["trigamps"] for dump in dumps])
+    info_dict["pulsetimes"] = np.concatenate([dump["pulsetimes"] for dump in dumps])
+    info_dict["pulseamps"] = np.concatenate([dump["pulseamps"] for dump in dumps])
+    info_dict["randomstimes"] = np.concatenate([dump["randomstimes"] for dump in dumps])
+
+    info_dict["seriesnumber"] = np.concatenate(seriesnumber)
+    trigtypes = np.concatenate([dump["trigtypes"] for dump in dumps])
+    info_dict["randomstrigger"] = trigtypes[:, 0]
+    info_dict["pulsestrigger"] = trigtypes[:, 1]
+    info_dict["ttltrigger"] = trigtypes[:, 2]
+
+    has_adc = ["convtoamps" in dump for dump in dumps]
+
+    if all(has_adc):
+        convtoamps = [np.tile(dump["convtoamps"][chans], (nevt, 1)) for dump, nevt in zip(dumps, nevts)]
+        traces = _adctraces(traces, np.vstack(convtoamps), lgcadc, dtype)
+    elif any(has_adc):
+        raise IOError("Cannot load dumps saved as ADC bins together with dumps saved in Amps.")
+
+    if all("truthamps" in dump and "truthtdelay" in dump for dump in dumps):
+        truthamps = np.concatenate([dump["truthamps"] for dump in dumps])
+        truthtdelay = np.concatenate([dump["truthtdelay"] for dump in dumps])
+
+        for ii in range(truthamps.shape[-1]):
+            info_dict[f"truthamps{ii+1}"] = truthamps[:, ii]
+            info_dict[f"truthtdelay{ii+1}"] = truthtdelay[:, ii]
+
+    return traces, info_dict
+
+def get_traces_rqd(path, lgcmemmap=True, lgcadc=False, dtype=np.float64):
+    """
+    Function to return raw traces and event information for `rqd` files, e.g. saved by 
+    `rqpy.io.saveevents_rqd` or converted by `rqpy.io.convert_to_rqd`.
+
+    Parameters
+    ----------
+    path : str, list of str
+        Absolute path, or list of paths, to the dump to open.
+    lgcmemmap : bool, optional
+        If True and a single dump is opened, then the returned traces are a read-only memory-map of the
+        file, such that only the traces that are accessed are read. If False, or if multiple dumps are
+        opened, then the traces are read into memory. Default is True. For traces saved as ADC bins,
+        the memory-map is only kept if `lgcadc` is True.
+    lgcadc : bool, optional
+        If True, then traces that were saved as integer ADC bins are returned as a `rqpy.io.ADCTraces`
+        object, which converts the traces to units of TES current only when they are indexed. If False
+        (default), then the traces are converted to units of TES current when loaded.
+    dtype : numpy.dtype, optional
+        The floating point type that traces saved as ADC bins are converted to. Default is np.float64.
+
+    Returns
+    -------
+    traces : ndarray, rqpy.io.ADCTraces
+        Array of traces in the specified dump. Dimensions are (number of traces, number of channels, bins in each trace)
+        If the traces were saved as integer ADC bins and `lgcadc` is True, then this is a `rqpy.io.ADCTraces`
+        object.
+    info_dict : dict
+        Dictionary that contains extra information on each event. For dumps saved by `rqpy.io.saveevents_rqd`,
+        the keys are the same as `rqpy.io.get_traces_npz`. For converted HDF5 dumps, the keys are the same
+        as `rqpy.io.load_h5_dump`.
+
+    """
 
-            if has_sim_data:
-                truthamps.append(data["truthamps"])
-                truthtdelay.append(data["truthtdelay"])
+    if not isinstance(path, list):
+        path = [path]
+
+    dumps = [load_rqd(file, mmap_mode="r" if lgcmemmap else None)[0] for file in path]
+
+    nevts = [len(dump["traces"]) for dump in dumps]
+
+    has_adc = ["convtoamps" in dump for dump in dumps]
+
+    if any(has_adc) and not all(has_adc):
+        raise IOError("Cannot load dumps saved as ADC bins together with dumps saved in Amps.")
+
+    if len(dumps) == 1:
+        traces = dumps[0].pop("traces")
+    else:
+        traces = np.empty((sum(nevts),) + dumps[0]["traces"].shape[1:], dtype=dumps[0]["traces"].dtype)
+        for dump, start, nevt in zip(dumps, np.cumsum([0] + nevts), nevts):
+            traces[start:start + nevt] = dump.pop("traces")
+
+    info_dict = {}
+
+    if all(has_adc):
+        convtoamps = [np.tile(dump.pop("convtoamps"), (nevt, 1)) for dump, nevt in zip(dumps, nevts)]
+        traces = _adctraces(traces, np.vstack(convtoamps), lgcadc, dtype)
+
+    if "eventnumber" in dumps[0]:
+        # converted HDF5 dumps already have the event information
+        for key in dumps[0]:
+            info_dict[key] = np.concatenate([dump[key] for dump in dumps])
+        return traces, info_dict
+
+    eventnumber = []
+    seriesnumber = []
+
+    for file, dump in zip(path, dumps):
+        # same naming convention as `rqpy.io.get_traces_npz`
+        filename = file.split('/')[-1].split('.')[0]
+        seriesnum = int(str().join(filename.split('_')[:2]))
+        dumpnum = int(filename.split('_')[-1])
+        nevts = len(dump["trigtypes"])
 
         eventnumber.append(10000*dumpnum + 1 + np.arange(nevts))
-        seriesnumber.extend([seriesnum] * nevts)
+        seriesnumber.append(np.full(nevts, seriesnum))
 
     info_dict["eventnumber"] = np.concatenate(eventnumber)
-    info_dict["ttltimes"] = np.concatenate(trigtimes)
-    info_dict["ttlamps"] = np.concatenate(trigamps)
-    info_dict["pulsetimes"] = np.concatenate(pulsetimes)
-    info_dict["pulseamps"] = np.concatenate(pulseamps)
-    info_dict["randomstimes"] = np.concatenate(randomstimes)
-
-    info_dict["seriesnumber"] = seriesnumber
-    trigtypes = np.vstack(trigtypes)
+    info_dict["seriesnumber"] = np.concatenate(seriesnumber)
+    info_dict["ttltimes"] = np.concatenate([dump["trigtimes"] for dump in dumps])
+    info_dict["ttlamps"] = np.concatenate([dump["trigamps"] for dump in dumps])
+    info_dict["pulsetimes"] = np.concatenate([dump["pulsetimes"] for dump in dumps])
+    info_dict["pulseamps"] = np.concatenate([dump["pulseamps"] for dump in dumps])
+    info_dict["randomstimes"] = np.concatenate([dump["randomstimes"] for dump in dumps])
+
+    trigtypes = np.concatenate([dump["trigtypes"] for dump in dumps])
     info_dict["randomstrigger"] = trigtypes[:, 0]
     info_dict["pulsestrigger"] = trigtypes[:, 1]
     info_dict["ttltrigger"] = trigtypes[:, 2]
 
-    traces = np.vstack(traces)
-
-    if has_sim_data:
-        truthamps = np.vstack(truthamps)
-        truthtdelay = np.vstack(truthtdelay)
+    if "truthamps" in dumps[0] and "truthtdelay" in dumps[0]:
+        truthamps = np.concatenate([dump["truthamps"] for dump in dumps])
+        truthtdelay = np.concatenate([dump["truthtdelay"] for dump in dumps])
 
         for ii in range(truthamps.shape[-1]):
             info_dict[f"truthamps{ii+1}"] = truthamps[:, ii]
@@ -585,9 +900,187 @@ def get_traces_npz(path):
 
     return traces, info_dict
 
-def load_h5_dump(path, lgcskip_empty=True, lgcreturndict=False):
+def _adctraces(adc, convtoamps, lgcadc=True, dtype=np.float64):
     """
-    Function to load HDF5 dumps
+    Helper function for wrapping traces loaded as ADC bins, where `convtoamps` has the conversion
+    factor of each event and channel. The conversion factor of each channel is kept if it is the 
+    same for every event. If `lgcadc` is False, then the traces are converted to `dtype` instead.
+
+    """
+
+    if len(convtoamps) > 0 and np.all(convtoamps == convtoamps[0]):
+        convtoamps = convtoamps[0]
+    elif len(convtoamps) == 0:
+        convtoamps = np.ones(adc.shape[1])
+
+    traces = ADCTraces(adc, convtoamps, dtype=dtype)
+
+    return traces if lgcadc else traces[...]
+
+def get_livetime(path, tstart=None, tstop=None, lgcreturnintervals=False):
+    """
+    Function to calculate the live time of continuous-trigger output from the live-time index
+    saved next to each dump by `rqpy.process.acquire_pulses`.
+
+    Parameters
+    ----------
+    path : str, list of str
+        Absolute path, or list of paths, to the dumps (or directly to the ".livetime" files) to use.
+        Dumps without a live-time index are skipped, as the index of each file is only saved with
+        one of the dumps.
+    tstart : float, NoneType, optional
+        The start time (in s) of the window in which to calculate the live time. If left as None, 
+        then there is no lower bound.
+    tstop : float, NoneType, optional
+        The end time (in s) of the window in which to calculate the live time. If left as None, 
+        then there is no upper bound.
+    lgcreturnintervals : bool, optional
+        If True, then the concatenated live and vetoed intervals are also returned. Default is False.
+
+    Returns
+    -------
+    livetime : float
+        The total time (in s) in the window that could be triggered on, i.e. the usable sections of
+        the traces minus the sections in which overlapping events were skipped. Multiply by the detector 
+        mass and divide by 86400 for the exposure (in kg*days) used by `rqpy.limit.optimuminterval`.
+    liveintervals : ndarray, optional
+        The start and end times (in s) of the usable sections of the traces. Only returned if
+        `lgcreturnintervals` is True.
+    vetointervals : ndarray, optional
+        The start and end times (in s) of the sections in which events were skipped. Only returned if
+        `lgcreturnintervals` is True.
+
+    """
+
+    if not isinstance(path, list):
+        path = [path]
+
+    liveintervals = []
+    vetointervals = []
+
+    for file in path:
+        if not file.endswith(".livetime"):
+            file = os.path.splitext(file)[0] + ".livetime"
+            # the index of a file is saved with only one of the dumps of its events
+            if not os.path.isfile(file):
+                continue
+
+        with np.load(file) as data:
+            liveintervals.append(data["liveintervals"])
+            vetointervals.append(data["vetointervals"])
+
+    if len(liveintervals) == 0:
+        raise IOError("No live-time index was found for the inputted dumps.")
+
+    liveintervals = np.concatenate(liveintervals)
+    vetointervals = np.concatenate(vetointervals)
+
+    tstart = -np.inf if tstart is None else tstart
+    tstop = np.inf if tstop is None else tstop
+
+    livetime = 0
+    for intervals, sign in zip([liveintervals, vetointervals], [1, -1]):
+        overlap = np.minimum(intervals[:, 1], tstop) - np.maximum(intervals[:, 0], tstart)
+        livetime += sign * np.sum(np.clip(overlap, 0, None))
+
+    if lgcreturnintervals:
+        return livetime, liveintervals, vetointervals
+
+    return livetime
+
+def _read_h5_key(f, path, key, inds=None):
+    """
+    Helper function for reading a single key of an HDF5 file saved in the layout of `deepdish`,
+    where only the events in `inds` are read if the key is stored as an array.
+
+    Parameters
+    ----------
+    f : tables.File
+        The open HDF5 file.
+    path : str
+        The path of the HDF5 file, used to load keys that are not stored as arrays.
+    key : str
+        The key to read.
+    inds : NoneType, slice, ndarray, optional
+        The indices of the events to read. If left as None, then all of the events are read.
+
+    Returns
+    -------
+    arr : ndarray
+        The array that was read. Scalars are returned as 0-d arrays, without selecting events.
+
+    """
+
+    import tables
+
+    node = f.root._f_get_child(key) if key in f.root else None
+
+    if not isinstance(node, tables.Array):
+        # other objects (e.g. lists or scalars) are loaded with deepdish
+        import deepdish as dd
+
+        arr = np.asarray(dd.io.load(path, f"/{key}"))
+    elif "zeroarray_dtype" in node._v_attrs:
+        # empty arrays are saved as their shape
+        arr = np.zeros(tuple(node.read()), dtype=np.dtype(node._v_attrs.zeroarray_dtype))
+    elif inds is None:
+        return node.read()
+    else:
+        inds = _asslice(inds)
+
+        if isinstance(inds, slice):
+            return node[inds]
+
+        start, stop = inds.min(), inds.max() + 1
+
+        if node.ndim == 1 or stop - start <= 4 * len(inds):
+            # reading the range that covers the events is faster than selecting each event
+            return node[start:stop][inds - start]
+
+        return node[(list(inds), Ellipsis)]
+
+    return arr if inds is None or arr.ndim == 0 else arr[inds]
+
+
+def _asslice(inds):
+    """
+    Helper function for converting an array of event indices to a slice, if the indices are
+    contiguous and increasing, as slices are much faster to read from an HDF5 file.
+
+    """
+
+    if isinstance(inds, slice):
+        return inds
+
+    if len(inds) == 0:
+        return slice(0, 0)
+
+    if inds[-1] - inds[0] + 1 == len(inds) and np.all(np.diff(inds) == 1):
+        return slice(int(inds[0]), int(inds[-1]) + 1)
+
+    return inds
+
+
+def _h5_nevents(f):
+    """
+    Helper function for getting the number of events in an open HDF5 dump from the shape of
+    the traces, without reading them.
+
+    """
+
+    # empty arrays are saved as their shape by deepdish
+    if "zeroarray_dtype" in f.root.traces._v_attrs:
+        return int(f.root.traces.read()[0])
+
+    return f.root.traces.shape[0]
+
+
+def load_h5_dump(path, lgcskip_empty=True, lgcreturndict=False, keys=None, channels=None, evtinds=None,
+                 chunksize=1000, lgcadc=False, dtype=np.float64):
+    """
+    Function to load HDF5 dumps. Only the requested keys, channels, and events are read from the file,
+    and the traces are read in blocks of events, such that the memory used does not depend on the size
+    of the dump.
 
     Parameters
     ----------
@@ -596,15 +1089,35 @@ def load_h5_dump(path, lgcskip_empty=True, lgcreturndict=False):
     lgcskip_empty : bool, optional
         Boolean flag on whether or not to skip empty events. Should be set to True if user only wants the traces.
         If the user also wants to pull extra timing information (primarily for live time calculations), then set
-        to False. Default is True.
+        to False. Default is True. An event is empty if any of its channels (including channels that are
+        not loaded) are all zeros. If the dump has the "lgcempty" flag for each event (saved by
+        `rqpy.io.convert_midgz_to_h5`), then the flag is used and empty events are not read at all.
     lgcreturndict : bool, optional
         Boolean flag on whether or not to return the info_dict that has extra information on every event.
         By default, this is False
+    keys : str, list of str, NoneType, optional
+        The keys of the info_dict to load, if `lgcreturndict` is True. If left as None, then all of the keys are
+        loaded (except "lgcempty").
+    channels : int, list of int, NoneType, optional
+        The indices of the channels to load. If left as None, then all channels are loaded.
+    evtinds : slice, array_like, NoneType, optional
+        The indices of the events to load in the dump, as a slice, an array of indices, or a boolean mask.
+        The events are returned in this order. If left as None, then all events are loaded.
+    chunksize : int, optional
+        The number of events to read from the file at a time. Default is 1000.
+    lgcadc : bool, optional
+        If True, then traces that were saved as integer ADC bins are returned as a `rqpy.io.ADCTraces`
+        object, which converts the traces to units of TES current only when they are indexed. If False
+        (default), then the traces are converted to units of TES current when loaded.
+    dtype : numpy.dtype, optional
+        The floating point type that traces saved as ADC bins are converted to. Default is np.float64.
 
     Returns
     -------
-    traces : ndarray
+    traces : ndarray, rqpy.io.ADCTraces
         Array of traces in the specified dump. Dimensions are (number of traces, number of channels, bins in each trace)
+        If the traces were saved as integer ADC bins and `lgcadc` is True, then this is a `rqpy.io.ADCTraces`
+        object.
     info_dict : dict, optional
         Dictionary that contains extra information on each event. Includes timing and trigger information.
         The keys in the dictionary are as follows.
@@ -621,20 +1134,80 @@ def load_h5_dump(path, lgcskip_empty=True, lgcreturndict=False):
 
     """
 
-    info_dict = dd.io.load(path)
-    traces = info_dict.pop('traces')
-    if lgcskip_empty:
-        cchans = ~np.all(traces[:,:,:] == 0, axis=-1)
-        cut = np.all(cchans, axis = -1)
-        traces = traces[cut]
-        for key in info_dict:
-            info_dict[key] = info_dict[key][cut]
+    # the HDF5 libraries are only imported when they are needed, as they are slow to import
+    import tables
+    import deepdish as dd
+
+    if isinstance(keys, str):
+        keys = [keys]
+
+    with tables.open_file(path, mode="r") as f:
+        nevents = _h5_nevents(f)
+
+        if evtinds is None:
+            inds = np.arange(nevents)
+        elif isinstance(evtinds, slice):
+            inds = np.arange(nevents)[evtinds]
+        else:
+            inds = np.asarray(evtinds)
+            if inds.dtype == bool:
+                inds = np.flatnonzero(inds)
+            inds = np.where(inds < 0, inds + nevents, inds).astype(int)
+
+        if lgcskip_empty and "lgcempty" in f.root:
+            inds = inds[~_read_h5_key(f, path, "lgcempty")[inds]]
+
+        chans = slice(None) if channels is None else np.atleast_1d(channels)
+
+        # the traces are read in blocks of events, in sorted order, and then put in the requested order
+        readinds, order = np.unique(inds, return_inverse=True)
+
+        lgcsorted = np.array_equal(readinds, inds)
+        lgcblockmask = lgcskip_empty and "lgcempty" not in f.root
+
+        tracelist = [_read_h5_key(f, path, "traces", readinds[:0])[:, chans]]
+        emptylist = [np.zeros(0, dtype=bool)]
+
+        for start in range(0, len(readinds), chunksize):
+            x = _read_h5_key(f, path, "traces", readinds[start:start + chunksize])
+            if lgcblockmask:
+                # the empty events are found block by block, without the flag
+                empty = np.any(np.all(x == 0, axis=-1), axis=-1)
+                emptylist.append(empty)
+                if lgcsorted:
+                    x = x[~empty]
+            tracelist.append(x[:, chans])
+
+        traces = np.concatenate(tracelist)
+
+        if not lgcsorted:
+            traces = traces[order]
+
+        if lgcblockmask:
+            cut = ~np.concatenate(emptylist)[order]
+            if not lgcsorted:
+                traces = traces[cut]
+            inds = inds[cut]
+
+        convtoamps = _read_h5_key(f, path, "convtoamps") if "convtoamps" in f.root else None
+
+        if lgcreturndict:
+            if keys is None:
+                keys = [key for key in f.root._v_children if key not in ["traces", "convtoamps", "lgcempty"]]
+                keys += [key for key in f.root._v_attrs._v_attrnamesuser if key != dd.io.hdf5io.DEEPDISH_IO_VERSION_STR]
+
+            info_dict = {key: _read_h5_key(f, path, key, inds) for key in keys}
+
+    if convtoamps is not None:
+        traces = ADCTraces(traces, convtoamps[chans], dtype=dtype)
+        if not lgcadc:
+            traces = traces[...]
     if lgcreturndict:
         return traces, info_dict
     return traces
 
 
-def loadstanfordfile(f, convtoamps=1, lgcfullrtn=False):
+def loadstanfordfile(f, convtoamps=1, lgcfullrtn=False, lgcskip_failed=False):
     """
     Function that opens a Stanford .mat file and extracts the useful
     parameters. There is an option to return a dictionary that includes
@@ -652,6 +1225,10 @@ def loadstanfordfile(f, convtoamps=1, lgcfullrtn=False):
     lgcfullrtn : bool, optional
         Boolean flag that also returns a dict of all extracted data
         from the file(s). Set to False by default.
+    lgcskip_failed : bool, optional
+        If True, then files that cannot be opened are skipped with a
+        warning, see `rqpy.io.StanfordFiles`. If False (default), then
+        the error of a file that cannot be opened is raised.
 
     Returns
     -------
@@ -673,19 +1250,215 @@ def loadstanfordfile(f, convtoamps=1, lgcfullrtn=False):
 
     """
 
-    data = _getchannels(f)
-    fs = data["prop"]["sample_rate"][0][0][0][0]
-    times = data["time"]
-    traces = np.stack((data["A"], data["B"]), axis=1)*convtoamps
-    try:
+    if lgcfullrtn:
+        data = _getchannels(f)
+        fs = data["prop"]["sample_rate"][0][0][0][0]
+        times = data["time"]
+        traces = np.stack((data["A"], data["B"]), axis=1)*convtoamps
         ttl = data["T"]*convtoamps
-    except:
-        ttl = None
 
-    if lgcfullrtn:
         return traces, times, fs, ttl, data
+
+    if isinstance(f, str):
+        f = [f]
+
+    files = StanfordFiles(f, convtoamps=convtoamps, lgcreusebuffer=False, lgcskip_failed=lgcskip_failed)
+    out = list(files)
+
+    if len(out) == 0:
+        raise IOError(f"None of the inputted files could be opened: {files.failed}")
+
+    if len(out) == 1:
+        return out[0]
+
+    traces, times, fs, ttl = zip(*out)
+
+    return np.concatenate(traces), np.concatenate(times), fs[0], np.concatenate(ttl)
+
+
+class StanfordFiles(object):
+    """
+    Class for iterating over Stanford DAQ .mat files, where each file is opened and calibrated
+    only when it is reached, such that the memory used is set by a single file. By default, the
+    error of a file that cannot be opened is raised. If `lgcskip_failed` is True, then such files
+    are instead skipped with a warning, and are recorded in `failed`.
+
+    Attributes
+    ----------
+    filelist : list of str
+        The files to iterate over.
+    convtoamps : float
+        Correction factor to convert the data to Amps, see `rqpy.io.loadstanfordfile`.
+    lgctotal : bool
+        If True, then the sum of the two channels is included as a third channel of the traces.
+    lgcreusebuffer : bool
+        If True, then the traces of each file are written into the same array whenever the
+        files have the same shape, such that the traces of a file are overwritten by the next file.
+    lgcskip_failed : bool
+        If True, then files that cannot be opened are skipped, rather than raising their error.
+    decodetimes : dict
+        The time (in s) that it took to open and calibrate each file that was opened.
+    failed : dict
+        The error raised by each file that could not be opened and was skipped.
+
+    """
+
+    def __init__(self, filelist, convtoamps=1, lgctotal=False, lgcreusebuffer=True, lgcskip_failed=False):
+        """
+        Initialization of the StanfordFiles class.
+
+        Parameters
+        ----------
+        filelist : str, list of str
+            The file(s) to iterate over. These files should be Stanford DAQ .mat files.
+        convtoamps : float, optional
+            Correction factor to convert the data to Amps. The traces are multiplied by this
+            factor, as is the TTL channel (if it exists). Default is 1.
+        lgctotal : bool, optional
+            If True, then the sum of the two channels is included as a third channel of the
+            traces. Default is False.
+        lgcreusebuffer : bool, optional
+            If True (default), then the traces of each file are written into the same array
+            (if the files have the same shape), which avoids allocating memory for every file.
+            In this case, the yielded traces should be copied if they are needed after the 
+            next file is opened.
+        lgcskip_failed : bool, optional
+            If True, then files that cannot be opened are skipped with a warning, which shortens
+            the data (and its live time). If False (default), then the error is raised.
+
+        """
+
+        if isinstance(filelist, str):
+            filelist = [filelist]
+
+        self.filelist = filelist
+        self.convtoamps = convtoamps
+        self.lgctotal = lgctotal
+        self.lgcreusebuffer = lgcreusebuffer
+        self.lgcskip_failed = lgcskip_failed
+        self.decodetimes = {}
+        self.failed = {}
+
+    def __len__(self):
+        return len(self.filelist)
+
+    def __iter__(self):
+        """
+        Iterates over the files.
+
+        Yields
+        ------
+        traces : ndarray
+            An array of shape (# of traces, # of channels, # of bins) that contains the 
+            calibrated traces of the file.
+        times : ndarray
+            An array of shape (# of traces,) that contains the starting time (in s) of each
+            trace.
+        fs : float
+            The digitization rate (in Hz) of the data.
+        ttl : ndarray
+            The TTL channel data, which is an empty array if the file has no TTL channel.
+
+        """
+
+        out = None
+
+        for f in self.filelist:
+            start = time.time()
+
+            try:
+                traces, times, fs, ttl = _decodestanfordfile(
+                    f, convtoamps=self.convtoamps, lgctotal=self.lgctotal, out=out,
+                )
+            except Exception as e:
+                if not self.lgcskip_failed:
+                    raise
+                self.failed[f] = e
+                warnings.warn(f"Could not open {f}, skipping it: {e!r}")
+                continue
+
+            self.decodetimes[f] = time.time() - start
+
+            if self.lgcreusebuffer:
+                out = traces
+
+            yield traces, times, fs, ttl
+
+
+def _decodestanfordfile(filename, convtoamps=1, lgctotal=False, out=None):
+    """
+    Helper function for opening and calibrating a single Stanford DAQ .mat file, where only the
+    variables that are needed are read. The calibration is the same as `_getchannels_singlefile`.
+
+    Parameters
+    ----------
+    filename : str
+        The file to open.
+    convtoamps : float, optional
+        Correction factor to convert the data to Amps. Default is 1.
+    lgctotal : bool, optional
+        If True, then the sum of the two channels is included as a third channel. Default is False.
+    out : ndarray, NoneType, optional
+        Array to write the traces to, which is only used if it has the correct shape.
+
+    Returns
+    -------
+    traces : ndarray
+        The calibrated traces.
+    times : ndarray
+        The starting time of each trace.
+    fs : float
+        The digitization rate (in Hz) of the data.
+    ttl : ndarray
+        The calibrated TTL channel, or an empty array if there is none.
+
+    """
+
+    res = loadmat(filename, squeeze_me=False, variable_names=['exp_prop', 'data_post', 't_rel_trig', 't_abs_trig'])
+    prop = res['exp_prop']
+    data = res['data_post']
+
+    gains = np.array(prop['SRS'][0][0][0], dtype='f')
+    rfbs = np.array(prop['Rfb'][0][0][0], dtype='f')
+    turns = np.array(prop['turn_ratio'][0][0][0], dtype='f')
+    fs = prop['sample_rate'][0][0][0][0]
+    minnum = min(len(gains), len(rfbs), len(turns))
+
+    if 'daqrange' in prop.dtype.names:
+        #The factor of 2 is because the range is +/-
+        convert = 2 * prop['daqrange'][0][0][0][0] / 2**12
     else:
-        return traces, times, fs, ttl
+        convert = 1
+
+    didv = 1.0/(turns[:minnum]*rfbs[:minnum]*gains[:minnum])
+
+    shape = (data.shape[0], 3 if lgctotal else 2, data.shape[1])
+    if out is None or out.shape != shape:
+        out = np.empty(shape)
+
+    # same order of operations as `_getchannels_singlefile` and `loadstanfordfile`
+    for ii in range(2):
+        np.multiply(data[:, :, ii], convert, out=out[:, ii])
+        out[:, ii] *= didv[ii]
+        out[:, ii] *= convtoamps
+
+    if lgctotal:
+        np.add(out[:, 0], out[:, 1], out=out[:, 2])
+
+    if data.shape[-1] > 2:
+        ttl = data[:, :, 2] * convert * convtoamps
+    else:
+        ttl = np.array([])
+
+    try:
+        ttable  = np.array([24*3600.0, 3600.0, 60.0, 1.0])
+        reltime = res['t_rel_trig'].squeeze()
+        abstime = res['t_abs_trig'].squeeze()
+        times = abstime[:,2:].dot(ttable)+reltime
+    except (KeyError, IndexError, ValueError):
+        times = np.arange(0, data.shape[0])
+
+    return out, times, fs, ttl
 
 def _getchannels_singlefile(filename):
     """
@@ -803,13 +1576,14 @@ def _getchannels(filelist):
         for i in range(1,len(filelist)):
             try:
                 res=_getchannels_singlefile(filelist[i])
-                combined['A'].append(res['A'])
-                combined['B'].append(res['B'])
-                combined['Total'].append(res['Total'])
-                combined['T'].append(res['T'])
-                combined['time'].append(res['time'])
-            except:
-                pass
+            except Exception as e:
+                warnings.warn(f"Could not open {filelist[i]}, skipping it: {e!r}")
+                continue
+            combined['A'].append(res['A'])
+            combined['B'].append(res['B'])
+            combined['Total'].append(res['Total'])
+            combined['T'].append(res['T'])
+            combined['time'].append(res['time'])
 
         combined['A']=np.concatenate(combined['A'])
         combined['B']=np.concatenate(combined['B'])
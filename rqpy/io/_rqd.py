@@ -0,0 +1,141 @@
+import json
+import struct
+import numpy as np
+
+
+__all__ = ["load_rqd"]
+
+
+_MAGIC = b"RQPYDUMP"
+_VERSION = 1
+_PREFIX = struct.Struct("<IIQ")
+_ALIGN = 64
+
+
+def _align(nbytes):
+    """
+    Helper function for rounding up a number of bytes to the alignment of the arrays in an rqd file.
+
+    """
+
+    return -(-nbytes // _ALIGN) * _ALIGN
+
+
+def _write_rqd(filename, arrays, attrs=None):
+    """
+    Helper function for writing arrays to an rqd file. The file starts with a magic string, the format
+    version, and the length of a JSON header, which contains the data type, shape, and offset of each
+    array, as well as any extra attributes. Each array is then stored uncompressed in C order, aligned
+    to 64 bytes, such that it can be memory-mapped.
+
+    Parameters
+    ----------
+    filename : str
+        The path of the file to write.
+    arrays : dict
+        Dictionary of the arrays to save. Values that are None are skipped.
+    attrs : dict, NoneType, optional
+        Dictionary of extra JSON-serializable attributes to save.
+
+    """
+
+    arrays = {key: np.asarray(val) for key, val in arrays.items() if val is not None}
+
+    meta = {}
+    nbytes = 0
+
+    for key, arr in arrays.items():
+        if arr.dtype.hasobject:
+            raise ValueError(f"Cannot save {key}, arrays of objects are not supported.")
+
+        meta[key] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": nbytes}
+        nbytes = _align(nbytes + arr.nbytes)
+
+    header = json.dumps({"arrays": meta, "attrs": attrs if attrs is not None else {}}).encode()
+    datastart = _align(len(_MAGIC) + _PREFIX.size + len(header))
+
+    with open(filename, "wb") as f:
+        f.write(_MAGIC)
+        f.write(_PREFIX.pack(_VERSION, 0, len(header)))
+        f.write(header)
+
+        for key, arr in arrays.items():
+            f.seek(datastart + meta[key]["offset"])
+            np.ascontiguousarray(arr).tofile(f)
+
+
+def _read_rqd_header(path):
+    """
+    Helper function for reading the header of an rqd file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the rqd file.
+
+    Returns
+    -------
+    header : dict
+        The header of the file, where header["arrays"] contains the data type, shape, and absolute
+        offset of each array, and header["attrs"] contains the extra attributes.
+
+    """
+
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise IOError(f"{path} is not an rqd file.")
+
+        version, _, headerlen = _PREFIX.unpack(f.read(_PREFIX.size))
+
+        if version > _VERSION:
+            raise IOError(f"{path} has rqd format version {version}, which is newer than this version of rqpy.")
+
+        header = json.loads(f.read(headerlen).decode())
+
+    datastart = _align(len(_MAGIC) + _PREFIX.size + headerlen)
+
+    for meta in header["arrays"].values():
+        meta["offset"] += datastart
+        meta["shape"] = tuple(meta["shape"])
+
+    return header
+
+
+def load_rqd(path, mmap_mode="r"):
+    """
+    Function for loading the arrays of an rqd file, e.g. saved by `rqpy.io.saveevents_rqd`.
+
+    Parameters
+    ----------
+    path : str
+        The path of the rqd file.
+    mmap_mode : str, NoneType, optional
+        The mode to memory-map the arrays with (see `numpy.memmap`), such that no data is read until
+        it is accessed. If None, then the arrays are read into memory. Default is "r".
+
+    Returns
+    -------
+    arrays : dict
+        Dictionary of the arrays in the file.
+    attrs : dict
+        Dictionary of the extra attributes saved in the file.
+
+    """
+
+    header = _read_rqd_header(path)
+    arrays = {}
+
+    for key, meta in header["arrays"].items():
+        dtype = np.dtype(meta["dtype"])
+        shape = meta["shape"]
+
+        if int(np.prod(shape)) == 0:
+            arrays[key] = np.zeros(shape, dtype=dtype)
+        elif mmap_mode is None:
+            with open(path, "rb") as f:
+                f.seek(meta["offset"])
+                arrays[key] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+        else:
+            arrays[key] = np.memmap(path, dtype=dtype, mode=mmap_mode, offset=meta["offset"], shape=shape)
+
+    return arrays, header["attrs"]
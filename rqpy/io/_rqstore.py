@@ -0,0 +1,194 @@
+import os
+from glob import glob
+import numpy as np
+import pandas as pd
+
+from rqpy import HAS_PYARROW
+
+
+__all__ = [
+    "save_rqs",
+    "load_rqs",
+    "get_rq_statistics",
+]
+
+
+def _partitioning():
+    """
+    Helper function for getting the partitioning of the RQ store, which is a folder for
+    each series named as "seriesnumber=<series number>".
+
+    """
+
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([("seriesnumber", pa.int64())]), flavor="hive")
+
+
+def save_rqs(rq_df, savepath, savename="rq_df", row_group_size=100000):
+    """
+    Function for saving a DataFrame of RQs to a Parquet store that is partitioned by series,
+    such that the RQs can be loaded by column and the partitions can be skipped by predicate
+    with `rqpy.io.load_rqs`.
+
+    The RQs of each series are saved to a file in the folder "seriesnumber=<series number>"
+    in `savepath`, and the minimum and maximum of each column of each row group is stored in
+    the footer of the file. Saving multiple DataFrames to the same store (e.g. one for each dump)
+    adds files to the partitions, as long as `savename` is different for each DataFrame.
+
+    Parameters
+    ----------
+    rq_df : pandas.DataFrame
+        The DataFrame of RQs to save, which must have the "seriesnumber" column.
+    savepath : str
+        The path to the folder of the store, which is created if it does not exist.
+    savename : str, optional
+        The name of the file saved to each partition (without the extension). A file with
+        the same name in a partition is overwritten. Default is "rq_df".
+    row_group_size : int, optional
+        The maximum number of events in each row group of the files, which are the blocks that
+        are skipped using the stored statistics. Smaller row groups allow more events to be skipped
+        by a cut, at the cost of larger footers. Default is 100000.
+
+    Raises
+    ------
+    ImportError
+        If pyarrow is not installed.
+    ValueError
+        If `rq_df` does not have the "seriesnumber" column.
+
+    """
+
+    if not HAS_PYARROW:
+        raise ImportError("Cannot use save_rqs because pyarrow is not installed.")
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if "seriesnumber" not in rq_df.columns:
+        raise ValueError("rq_df should have the seriesnumber column, which is used to partition the RQs.")
+
+    for snum, df in rq_df.groupby("seriesnumber", sort=False):
+        partpath = os.path.join(savepath, f"seriesnumber={int(snum)}")
+        os.makedirs(partpath, exist_ok=True)
+
+        # the series number is stored in the name of the partition
+        table = pa.Table.from_pandas(df.drop(columns="seriesnumber"), preserve_index=False)
+        pq.write_table(table, os.path.join(partpath, f"{savename}.parquet"), row_group_size=row_group_size)
+
+
+def load_rqs(path, columns=None, filters=None):
+    """
+    Function for loading RQs from a Parquet store saved by `rqpy.io.save_rqs`. Only the
+    requested columns are read, and the partitions (series) and row groups that cannot pass
+    the filters are skipped without being read, using the series number of each partition and
+    the statistics stored in the footer of each file.
+
+    Parameters
+    ----------
+    path : str
+        The path to the folder of the store.
+    columns : list of str, NoneType, optional
+        The RQs to load. If left as None, then all of the RQs are loaded.
+    filters : list of tuple, list of list of tuple, NoneType, optional
+        The cuts to apply to the events, where each cut is a tuple of (column, op, value), where
+        op is one of "==", "!=", "<", ">", "<=", ">=", "in", or "not in". A list of tuples is
+        combined with a logical and, and a list of lists of tuples is combined with a logical or
+        of the inner lists. For example, `[("seriesnumber", ">=", 190101120000), ("ofamp_constrain_PDS1",
+        ">", 1e-7)]`. The columns used in the cuts do not have to be loaded. If left as None, then
+        all of the events are loaded.
+
+    Returns
+    -------
+    rq_df : pandas.DataFrame
+        The DataFrame of the loaded RQs, with the series number in the "seriesnumber" column
+        if all columns are loaded or if it is in `columns`.
+
+    Raises
+    ------
+    ImportError
+        If pyarrow is not installed.
+
+    """
+
+    if not HAS_PYARROW:
+        raise ImportError("Cannot use load_rqs because pyarrow is not installed.")
+
+    import pyarrow.parquet as pq
+
+    if isinstance(columns, str):
+        columns = [columns]
+
+    table = pq.read_table(path, columns=columns, filters=filters, partitioning=_partitioning())
+
+    return table.to_pandas()
+
+
+def get_rq_statistics(path, columns=None):
+    """
+    Function for getting the statistics of the RQs in each file of a Parquet store saved by
+    `rqpy.io.save_rqs`, which are read from the footers of the files without reading the RQs.
+
+    Parameters
+    ----------
+    path : str
+        The path to the folder of the store.
+    columns : list of str, NoneType, optional
+        The RQs to get the statistics of. If left as None, then the statistics of all of the RQs
+        are returned.
+
+    Returns
+    -------
+    stats_df : pandas.DataFrame
+        A DataFrame with a row for each column of each file, with the series number, the file,
+        the column, the number of events, and the minimum and maximum of the column (over all of the
+        row groups of the file, NaN if not stored).
+
+    Raises
+    ------
+    ImportError
+        If pyarrow is not installed.
+
+    """
+
+    if not HAS_PYARROW:
+        raise ImportError("Cannot use get_rq_statistics because pyarrow is not installed.")
+
+    import pyarrow.parquet as pq
+
+    if isinstance(columns, str):
+        columns = [columns]
+
+    rows = []
+
+    for file in sorted(glob(os.path.join(path, "seriesnumber=*", "*.parquet"))):
+        snum = int(os.path.basename(os.path.dirname(file)).split("=")[-1])
+        metadata = pq.ParquetFile(file).metadata
+        names = metadata.schema.names
+
+        for ii, name in enumerate(names):
+            if columns is not None and name not in columns:
+                continue
+
+            mins = []
+            maxs = []
+            for jj in range(metadata.num_row_groups):
+                stats = metadata.row_group(jj).column(ii).statistics
+                if stats is not None and stats.has_min_max:
+                    mins.append(stats.min)
+                    maxs.append(stats.max)
+
+            # the range is only known if every row group has statistics
+            lgcstats = 0 < len(mins) == metadata.num_row_groups
+
+            rows.append({
+                "seriesnumber" : snum,
+                "file" : file,
+                "column" : name,
+                "nevents" : metadata.num_rows,
+                "min" : min(mins) if lgcstats else np.nan,
+                "max" : max(maxs) if lgcstats else np.nan,
+            })
+
+    return pd.DataFrame(rows, columns=["seriesnumber", "file", "column", "nevents", "min", "max"])
@@ -1,14 +1,18 @@
+import os
+import multiprocessing
 import numpy as np
-from rqpy.io import get_traces_midgz
+from rqpy.io import get_traces_midgz, get_trace_gain, load_h5_dump
+from rqpy.io._rqd import _write_rqd
+from rqpy.io._adc import ADCTraces, _toadc
 from rqpy import HAS_RAWIO
-import deepdish as dd
 
 if HAS_RAWIO:
     from rawio import DataWriter
     from rawio.IO import getRawEvents
 
 
-__all__ = ["saveevents_npz", "saveevents_midgz", "convert_midgz_to_h5"]
+__all__ = ["saveevents_npz", "saveevents_rqd", "saveevents_midgz", "convert_midgz_to_h5", "convert_to_rqd", 
+           "savelivetime"]
 
 
 def _check_kwargs_npz(**kwargs):
@@ -37,7 +41,7 @@ def _check_kwargs_npz(**kwargs):
 
 def saveevents_npz(pulsetimes=None, pulseamps=None, trigtimes=None, trigamps=None, randomstimes=None, 
                    traces=None, trigtypes=None, truthamps=None, truthtdelay=None,
-                   savepath=None, savename=None, dumpnum=None):
+                   savepath=None, savename=None, dumpnum=None, convtoamps=None, adcdtype="int16"):
     """
     Function for simple saving of events to .npz file.
     
@@ -70,11 +74,41 @@ def saveevents_npz(pulsetimes=None, pulseamps=None, trigtimes=None, trigamps=Non
         Filename to save the events as.
     dumpnum : int, optional
         The dump number of the current file.
+    convtoamps : float, list of floats, NoneType, optional
+        If not None, the conversion factor (for each channel) from ADC bins to TES current in Amps, 
+        such that the traces are stored as integer ADC bins (with `convtoamps` saved alongside them)
+        rather than as floats. The traces are then converted back to Amps when loaded (or lazily, 
+        see `rqpy.io.ADCTraces`). If `traces` is an ADCTraces object, then it is always stored as ADC bins.
+        Default is None.
+    adcdtype : str, numpy.dtype, optional
+        The integer type to store the ADC bins as. Default is "int16", which covers 16-bit ADCs.
         
     """
     
     filename = f"{savepath}{savename}_{dumpnum:04d}.npz"
     
+    events = _events_dict(pulsetimes=pulsetimes, pulseamps=pulseamps, trigtimes=trigtimes, 
+                          trigamps=trigamps, randomstimes=randomstimes, traces=traces, 
+                          trigtypes=trigtypes, truthamps=truthamps, truthtdelay=truthtdelay, 
+                          convtoamps=convtoamps, adcdtype=adcdtype)
+    
+    np.savez(filename, **{key: np.asarray(val) for key, val in events.items() if val is not None})
+
+
+def _events_dict(pulsetimes=None, pulseamps=None, trigtimes=None, trigamps=None, randomstimes=None, 
+                 traces=None, trigtypes=None, truthamps=None, truthtdelay=None, convtoamps=None, 
+                 adcdtype="int16"):
+    """
+    Helper function for setting the default values of the arrays saved in a dump, see 
+    `rqpy.io.saveevents_npz` for the parameters.
+    
+    Returns
+    -------
+    events : dict
+        Dictionary of the arrays to save.
+    
+    """
+    
     arr_len = _check_kwargs_npz(pulsetimes=pulsetimes, pulseamps=pulseamps, trigtimes=trigtimes, 
                                 trigamps=trigamps, randomstimes=randomstimes, traces=traces,
                                 trigtypes=trigtypes, truthamps=truthamps, truthtdelay=truthtdelay)
@@ -94,16 +128,150 @@ def saveevents_npz(pulsetimes=None, pulseamps=None, trigtimes=None, trigamps=Non
     if truthtdelay is None:
         truthtdelay = np.zeros((arr_len, 1))
     
-    np.savez(filename, 
-             pulsetimes=pulsetimes, 
-             pulseamps=pulseamps, 
-             trigtimes=trigtimes, 
-             trigamps=trigamps, 
-             randomstimes=randomstimes, 
-             traces=traces, 
-             trigtypes=trigtypes,
-             truthamps=truthamps,
-             truthtdelay=truthtdelay)
+    if isinstance(traces, ADCTraces) and convtoamps is None and traces.convtoamps.ndim == 1:
+        convtoamps = traces.convtoamps
+    
+    if traces is not None and convtoamps is not None:
+        traces, convtoamps = _toadc(traces, convtoamps, dtype=adcdtype)
+    
+    return dict(pulsetimes=pulsetimes, 
+                pulseamps=pulseamps, 
+                trigtimes=trigtimes, 
+                trigamps=trigamps, 
+                randomstimes=randomstimes, 
+                traces=traces, 
+                trigtypes=trigtypes,
+                truthamps=truthamps,
+                truthtdelay=truthtdelay,
+                convtoamps=convtoamps)
+
+
+def saveevents_rqd(pulsetimes=None, pulseamps=None, trigtimes=None, trigamps=None, randomstimes=None, 
+                   traces=None, trigtypes=None, truthamps=None, truthtdelay=None,
+                   savepath=None, savename=None, dumpnum=None, convtoamps=None, adcdtype="int16"):
+    """
+    Function for saving events to an uncompressed .rqd file, which stores the same arrays as 
+    `rqpy.io.saveevents_npz`, but can be memory-mapped when loading, see `rqpy.io.get_traces_rqd`.
+    
+    Parameters
+    ----------
+    pulsetimes : ndarray, NoneType, optional
+        If we triggered on a pulse, the time of the pulse trigger in seconds. Otherwise this is zero.
+    pulseamps : ndarray, NoneType, optional
+        If we triggered on a pulse, the optimum amplitude at the pulse trigger time. Otherwise this is zero.
+    trigtimes : ndarray, NoneType, optional
+        If we triggered due to ttl, the time of the ttl trigger in seconds. Otherwise this is zero.
+    trigamps : ndarray, NoneType, optional
+        If we triggered due to ttl, the optimum amplitude at the ttl trigger time. Otherwise this is zero.
+    randomstimes : ndarray, NoneType, optional
+        Array of the corresponding event times for each section, if this is a random.
+    traces : ndarray, NoneType, optional
+        The corresponding trace for each detected event.
+    trigtypes : ndarray, NoneType, optional
+        Array of boolean vectors each of length 3. The first value indicates if the trace is a random or not.
+        The second value indicates if we had a pulse trigger. The third value indicates if we had a ttl trigger.
+    truthamps : ndarray, NoneType, optional
+        If the data being saved is simulated data, this is a 2-d ndarray of the true amplitudes for each trace,
+        where the shape is (number of traces, number of templates). Otherwise, this is zero.
+    truthtdelay : ndarray, NoneType, optional
+        If the data being saved is simulated data, this is a 2-d ndarray of the true tdelay for each trace,
+        where the shape is (number of traces, number of templates). Otherwise, this is zero.
+    savepath : str, NoneType, optional
+        Path to save the events to.
+    savename : str, NoneType, optional
+        Filename to save the events as.
+    dumpnum : int, optional
+        The dump number of the current file.
+    convtoamps : float, list of floats, NoneType, optional
+        If not None, the conversion factor (for each channel) from ADC bins to TES current in Amps, 
+        such that the traces are stored as integer ADC bins (with `convtoamps` saved alongside them)
+        rather than as floats. The traces are then converted back to Amps when loaded (or lazily, 
+        see `rqpy.io.ADCTraces`). If `traces` is an ADCTraces object, then it is always stored as ADC bins.
+        Default is None.
+    adcdtype : str, numpy.dtype, optional
+        The integer type to store the ADC bins as. Default is "int16", which covers 16-bit ADCs.
+        
+    """
+    
+    filename = f"{savepath}{savename}_{dumpnum:04d}.rqd"
+    
+    _write_rqd(filename, _events_dict(pulsetimes=pulsetimes, pulseamps=pulseamps, trigtimes=trigtimes, 
+                                      trigamps=trigamps, randomstimes=randomstimes, traces=traces, 
+                                      trigtypes=trigtypes, truthamps=truthamps, truthtdelay=truthtdelay, 
+                                      convtoamps=convtoamps, adcdtype=adcdtype))
+
+
+def convert_to_rqd(path, savepath):
+    """
+    Function to convert npz or HDF5 dumps to the memory-mappable .rqd format. The converted dumps keep
+    the same file names (with the extension changed), so that the series and dump numbers are unchanged.
+    
+    Parameters
+    ----------
+    path : str, list of str
+        Absolute path, or list of paths, to the npz (saved by `rqpy.io.saveevents_npz`) or HDF5 (saved 
+        by `rqpy.io.convert_midgz_to_h5`) dumps to convert.
+    savepath : str
+        Absolute path to where the converted dumps should be saved.
+    
+    Returns
+    -------
+    None
+    
+    """
+    
+    if not isinstance(path, list):
+        path = [path]
+    
+    for p in path:
+        savename, ext = os.path.splitext(os.path.basename(p))
+        
+        if ext == ".npz":
+            with np.load(p) as data:
+                arrays = {key: data[key] for key in data.files}
+        elif ext == ".h5":
+            traces, arrays = load_h5_dump(p, lgcskip_empty=False, lgcreturndict=True, lgcadc=True)
+            arrays = {key: np.asarray(val) for key, val in arrays.items()}
+            if isinstance(traces, ADCTraces):
+                arrays['traces'] = traces.adc
+                arrays['convtoamps'] = traces.convtoamps
+            else:
+                arrays['traces'] = traces
+        else:
+            raise ValueError(f"Cannot convert {p}, only npz and h5 dumps are supported.")
+        
+        _write_rqd(os.path.join(savepath, f"{savename}.rqd"), arrays)
+
+
+def savelivetime(liveintervals, vetointervals, savepath, savename, dumpnum):
+    """
+    Function for saving the live-time index of a dump next to the dump, as a small .npz formatted file 
+    with the extension ".livetime" (so that it is not picked up when loading the dumps themselves).
+    
+    Parameters
+    ----------
+    liveintervals : ndarray
+        The start and end times (in s) of the sections of the traces that were searched for events,
+        with shape (# of intervals, 2).
+    vetointervals : ndarray
+        The start and end times (in s) of the sections of the traces in which events were skipped, with
+        shape (# of intervals, 2). These should be contained in `liveintervals`.
+    savepath : str
+        Path to save the live-time index to.
+    savename : str
+        Filename of the corresponding dump.
+    dumpnum : int
+        The dump number of the corresponding dump.
+    
+    """
+    
+    filename = f"{savepath}{savename}_{dumpnum:04d}.livetime"
+    
+    # passing a file object stops numpy from appending the .npz extension
+    with open(filename, "wb") as f:
+        np.savez(f, 
+                 liveintervals=np.asarray(liveintervals, dtype=float).reshape(-1, 2), 
+                 vetointervals=np.asarray(vetointervals, dtype=float).reshape(-1, 2))
 
 
 def saveevents_midgz(events, settings, savepath, savename, dumpnum):
@@ -142,14 +310,170 @@ def saveevents_midgz(events, settings, savepath, savename, dumpnum):
     mywriter.close_file()  
 
 
-def convert_midgz_to_h5(path, savepath, channels, det, lgcskip_empty=False):
+def _write_h5(filename, arrays, chunkevents=1, complib="blosc:lz4", complevel=5):
+    """
+    Helper function for writing a dictionary of arrays to an HDF5 file in the layout used by `deepdish`,
+    such that it can be loaded with `deepdish.io.load` (and `rqpy.io.load_h5_dump`), but where the
+    traces are chunked by event and compressed with the specified codec.
+
+    Parameters
+    ----------
+    filename : str
+        The path of the file to write.
+    arrays : dict
+        Dictionary of the arrays to save.
+    chunkevents : int, optional
+        The number of events in each chunk of the traces. Default is 1.
+    complib : str, optional
+        The compression library to use, see `tables.Filters`. Default is "blosc:lz4".
+    complevel : int, optional
+        The compression level, from 0 (no compression) to 9. Default is 5.
+
+    """
+
+    # the HDF5 libraries are only imported when they are needed, as they are slow to import
+    import tables
+    import deepdish as dd
+
+    filters = tables.Filters(complib=complib, complevel=complevel, shuffle=True) if complevel > 0 else None
+
+    with tables.open_file(filename, mode="w") as f:
+        f.root._v_attrs[dd.io.hdf5io.DEEPDISH_IO_VERSION_STR] = dd.io.hdf5io.IO_VERSION
+
+        for key, arr in arrays.items():
+            arr = np.asarray(arr)
+
+            if arr.ndim > 0 and min(arr.shape) == 0:
+                # empty arrays are saved as their shape, same as deepdish
+                node = f.create_array(f.root, key, obj=np.array(arr.shape, dtype=np.int64))
+                node._v_attrs.zeroarray_dtype = arr.dtype.str.encode('ascii')
+            elif key == "traces":
+                chunkshape = (min(chunkevents, len(arr)),) + arr.shape[1:]
+                f.create_carray(f.root, key, obj=arr, chunkshape=chunkshape, filters=filters)
+            elif filters is not None and arr.size > 300:
+                f.create_carray(f.root, key, obj=arr, filters=filters)
+            else:
+                f.create_array(f.root, key, obj=arr)
+
+
+def _verify_h5_file(filename, p, channels, det, lgcskip_empty, chunkevents):
+    """
+    Helper function for checking that the traces saved in an HDF5 file by `rqpy.io.convert_midgz_to_h5`
+    round-trip to the traces in the mid.gz source. The saved traces are compared to the source traces in
+    units of TES current, within half of an ADC bin if they were saved as ADC bins, and are loaded a chunk
+    of events at a time.
+
+    Parameters
+    ----------
+    filename : str
+        The path of the saved HDF5 file.
+    p : str
+        The path of the mid.gz source.
+    channels : list of str
+        The channels that were saved.
+    det : list of str
+        The detector of each channel.
+    lgcskip_empty : bool
+        Whether or not the empty events were skipped when saving.
+    chunkevents : int
+        The number of events in each HDF5 chunk, the saved traces are loaded in multiples of this.
+
+    Raises
+    ------
+    IOError
+        If the saved traces or event numbers do not match the mid.gz source.
+
+    """
+
+    x, info_dict = get_traces_midgz(p, channels, det, lgcskip_empty=lgcskip_empty, lgcreturndict=True)
+    eventnumber = np.asarray(info_dict['eventnumber'])
+
+    nchunk = max(1, 1000 // chunkevents) * chunkevents
+    nevents = len(x)
+
+    for start in range(0, nevents + 1, nchunk):
+        # the last chunk also checks that there are no extra events saved after the source events
+        evtinds = slice(start, start + nchunk)
+        saved, saved_dict = load_h5_dump(filename, lgcskip_empty=False, lgcreturndict=True,
+                                         keys=['eventnumber'], evtinds=evtinds, lgcadc=True)
+
+        if len(saved) != len(x[evtinds]):
+            raise IOError(f"Verification of {filename} failed, the number of events does not match {p}.")
+
+        if not np.array_equal(saved_dict['eventnumber'], eventnumber[evtinds]):
+            raise IOError(f"Verification of {filename} failed, the event numbers do not match {p}.")
+
+        if isinstance(saved, ADCTraces):
+            # the ADC bins are rounded, so the traces can differ by up to half of a bin
+            tol = 0.5 * np.abs(saved.convtoamps).reshape(-1, 1) * (1 + 1e-6)
+        else:
+            tol = 0
+
+        if not np.all(np.abs(np.asarray(saved) - x[evtinds]) <= tol):
+            raise IOError(f"Verification of {filename} failed, the traces do not match {p}.")
+
+
+def _convert_midgz_to_h5_file(args):
+    """
+    Helper function for converting a single mid.gz dump to HDF5 for `rqpy.io.convert_midgz_to_h5`.
+
+    Parameters
+    ----------
+    args : tuple
+        Tuple of (p, savepath, channels, det, lgcskip_empty, adcdtype, chunkevents, complib, complevel,
+        lgcverify), see `rqpy.io.convert_midgz_to_h5`.
+
+    Returns
+    -------
+    filename : str
+        The path of the saved HDF5 file.
+
+    """
+
+    p, savepath, channels, det, lgcskip_empty, adcdtype, chunkevents, complib, complevel, lgcverify = args
+
+    savename = p.split('/')[-1].split('.')[0]
+    filename = f'{savepath}{savename}.h5'
+
+    if adcdtype is None:
+        x, info_dict = get_traces_midgz(p, channels, det, lgcskip_empty=lgcskip_empty, lgcreturndict=True)
+    else:
+        x, info_dict = get_traces_midgz(p, channels, det, convtoamps=1, lgcskip_empty=lgcskip_empty, 
+                                        lgcreturndict=True)
+        convtoamps = [get_trace_gain(p, chan, d)[0] for chan, d in zip(channels, det)]
+        x, _ = _toadc(x, 1, dtype=adcdtype)
+        info_dict['convtoamps'] = np.asarray(convtoamps, dtype=float)
+
+    for key in info_dict:
+        info_dict[key] = np.asarray(info_dict[key])
+    info_dict['traces'] = x
+    # flag the empty events, such that load_h5_dump can skip them without reading the traces
+    info_dict['lgcempty'] = np.any(np.all(x == 0, axis=-1), axis=-1)
+
+    _write_h5(filename, info_dict, chunkevents=chunkevents, complib=complib, complevel=complevel)
+
+    if lgcverify:
+        _verify_h5_file(filename, p, channels, det, lgcskip_empty, chunkevents)
+
+    return filename
+
+
+def convert_midgz_to_h5(path, savepath, channels, det, lgcskip_empty=False, adcdtype=None, nprocess=1,
+                        chunkevents=1, complib="blosc:lz4", complevel=5, lgcverify=False):
     """
     Function to convert raw traces and event numbers for a single dump from mid.gz to HDF5.
     
-    Saves the ndarray of traces, converted to units of TES current, and saves a corresponding
-    array of event numbers. Note, since event numbers are not unique, the series number is
+    Saves the ndarray of traces in units of TES current (or as ADC bins with the conversion factor
+    to units of TES current of each channel, if `adcdtype` is set), and saves a 
+    corresponding array of event numbers. Note, since event numbers are not unique, the series number is
     appended to the front of the event number, ie. seriesnumber_eventnumber (as an integer
     withough the underscore) 
+
+    The files are saved in the same layout as `deepdish`, such that they can be loaded with 
+    `rqpy.io.load_h5_dump`, but the traces are chunked by event and compressed with the specified
+    codec, such that single events can be read without decompressing the rest of the dump. A flag
+    for whether or not each event is empty is saved as "lgcempty", such that empty events can be
+    skipped without reading their traces.
     
     Parameters
     ----------
@@ -169,6 +493,26 @@ def convert_midgz_to_h5(path, savepath, channels, det, lgcskip_empty=False):
         Boolean flag on whether or not to skip empty events. Should be set to True if user only wants the traces.
         If the user also wants to pull extra timing information (primarily for live time calculations), then set
         to False. Default is False.
+    adcdtype : str, numpy.dtype, NoneType, optional
+        If set, the integer type to store the traces as, in units of ADC bins (e.g. "int16"). The
+        conversion factors to TES current are saved as "convtoamps", such that `rqpy.io.load_h5_dump`
+        converts the traces back to TES current when loading them. Default is None, in which case the traces
+        are converted to TES current and stored as floats.
+    nprocess : int, optional
+        The number of processes to use to convert the dumps in parallel. Default is 1.
+    chunkevents : int, optional
+        The number of events in each HDF5 chunk of the traces. A value of 1 (default) gives the fastest
+        access to single events (e.g. for `rqpy.io.getrandevents`), while larger values compress better
+        and are faster to read in full (e.g. for `rqpy.process.rq`).
+    complib : str, optional
+        The compression library to use, see `tables.Filters`. Default is "blosc:lz4", which is fast to
+        decompress. "zlib" gives files that can be read without blosc.
+    complevel : int, optional
+        The compression level, from 0 (no compression) to 9. Default is 5.
+    lgcverify : bool, optional
+        If True, then the traces and event numbers of each saved file are read back in chunks and compared
+        to the mid.gz source in units of TES current (within half of an ADC bin if `adcdtype` is set),
+        raising an IOError if they do not match. Default is False.
     
     Returns
     -------
@@ -179,17 +523,18 @@ def convert_midgz_to_h5(path, savepath, channels, det, lgcskip_empty=False):
     if not isinstance(path, list):
         path = [path]
 
-    savename = []
-    for p in path:
-        savename.append(p.split('/')[-1].split('.')[0])
+    if not isinstance(channels, list):
+        channels = [channels]
 
-    for jj, p in enumerate(path):
-        x, info_dict = get_traces_midgz(p, channels, det, lgcskip_empty=lgcskip_empty, lgcreturndict=True)
-        for key in info_dict:
-            info_dict[key] = np.asarray(info_dict[key])
-        info_dict['traces'] = x
-        dd.io.save(f'{savepath}{savename[jj]}.h5', info_dict)
-        
-        
-    
+    if isinstance(det, str):
+        det = [det]*len(channels)
+
+    args = [(p, savepath, channels, det, lgcskip_empty, adcdtype, chunkevents, complib, complevel, 
+             lgcverify) for p in path]
 
+    if nprocess == 1:
+        for arg in args:
+            _convert_midgz_to_h5_file(arg)
+    else:
+        with multiprocessing.Pool(processes=nprocess) as pool:
+            pool.map(_convert_midgz_to_h5_file, args)
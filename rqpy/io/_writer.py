@@ -0,0 +1,164 @@
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+
+
+__all__ = ["AsyncWriter"]
+
+
+class AsyncWriter(object):
+    """
+    Class for writing files in a background thread, such that the computation of the next
+    output can continue while the previous outputs are being compressed and written to disk.
+
+    The writes are run in the order that they are submitted. The number of writes that can be
+    waiting in the queue is bounded, such that submitting a write blocks while the queue is full
+    (i.e. when the computation outpaces the disk), which bounds the memory held by pending writes.
+    The data passed to a write should not be modified until the write has finished.
+
+    If a write fails, then the error is raised by every later call to `submit`, `flush`, or `close`,
+    and the writes that were still queued are not run. The pending writes are flushed when the
+    writer is closed, when exiting a `with` block, or at interpreter exit.
+
+    Attributes
+    ----------
+    maxqueue : int
+        The maximum number of writes that can be waiting in the queue.
+
+    """
+
+    def __init__(self, maxqueue=2):
+        """
+        Initialization of the AsyncWriter class, which starts the background thread.
+
+        Parameters
+        ----------
+        maxqueue : int, optional
+            The maximum number of writes that can be waiting in the queue, not including the write
+            that is running. Default is 2.
+
+        """
+
+        if maxqueue < 1:
+            raise ValueError("maxqueue should be at least 1.")
+
+        self.maxqueue = maxqueue
+
+        self._queue = queue.Queue(maxsize=maxqueue)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # an error in the with block takes precedence over errors from the writes
+            try:
+                self.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        """
+        Hidden method for running the writes in the background thread.
+
+        """
+
+        while True:
+            task = self._queue.get()
+
+            if task is None:
+                self._queue.task_done()
+                break
+
+            future, func, args, kwargs = task
+
+            if self._error is not None:
+                # the writes after a failed write are not run
+                future.cancel()
+            elif future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except BaseException as e:
+                    self._error = e
+                    future.set_exception(e)
+
+            self._queue.task_done()
+
+    def _raise(self):
+        """
+        Hidden method for raising the error of a failed write, if any.
+
+        """
+
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Method for adding a write to the queue, which blocks if the queue is full.
+
+        Parameters
+        ----------
+        func : callable
+            The function that writes the output, e.g. `rqpy.io.saveevents_npz`.
+        args, kwargs
+            The arguments to call `func` with.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            The future of the write, which can be used to wait for this write to finish.
+
+        Raises
+        ------
+        ValueError
+            If the writer has been closed.
+
+        """
+
+        self._raise()
+
+        if self._closed:
+            raise ValueError("Cannot submit a write to a closed AsyncWriter.")
+
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+
+        return future
+
+    def flush(self):
+        """
+        Method for waiting for all of the submitted writes to finish, raising the error of
+        a failed write, if any.
+
+        """
+
+        self._queue.join()
+        self._raise()
+
+    def close(self):
+        """
+        Method for flushing the submitted writes and stopping the background thread. Calling
+        this method more than once only raises the error of a failed write again, if any.
+
+        """
+
+        if self._closed:
+            self._raise()
+            return
+
+        self._closed = True
+        atexit.unregister(self.close)
+
+        self._queue.put(None)
+        self._thread.join()
+        self._raise()
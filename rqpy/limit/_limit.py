@@ -5,12 +5,13 @@ import os
 from pathlib import Path
 import types
 import contextlib
-from scipy import stats, signal, interpolate, special, integrate
+import functools
+from collections import namedtuple
+from scipy import stats, interpolate, special, integrate, fftpack
 
 import rqpy as rp
 from rqpy import constants
 from rqpy.limit import _upper
-import mendeleev
 
 
 __all__ = [
@@ -19,6 +20,8 @@ __all__ = [
     "drde",
     "drde_max_q",
     "helmfactor",
+    "TargetMaterial",
+    "get_target_material",
     "upper",
     "drde_gauss_smear2d",
     "optimuminterval_2dsmear",
@@ -121,6 +124,84 @@ def upper(fc, cl=0.9):
     return ulout, endpoints[0], endpoints[1]
 
 
+# nucleon mass (1 amu) [GeV]
+_MN = constants.atomic_mass * constants.c**2 / constants.e * 1e-9
+
+# parameters of the Helm form factor as defined in L&S [fm]
+_HELM_S = 0.9
+_HELM_A = 0.52
+
+# the maximum number of elements of the (mass, energy) rate arrays that are calculated at once,
+# which bounds the memory used when the rates of many masses are calculated together
+_MAX_RATE_SIZE = 2**22
+
+# the length of the Gaussian kernel up to which `gauss_smear` uses a direct convolution, as
+# opposed to an FFT convolution, when the method is chosen automatically
+_MAX_DIRECT_KERNEL = 64
+
+
+TargetMaterial = namedtuple(
+    "TargetMaterial",
+    ["symbol", "atomic_weight", "density", "mtarget", "rn"],
+)
+TargetMaterial.__doc__ = """
+    Properties of a target material, as returned by `rqpy.limit.get_target_material`.
+
+    Attributes
+    ----------
+    symbol : str
+        The atomic symbol of the element.
+    atomic_weight : float
+        The atomic weight of the element, in amu.
+    density : float
+        The density of the element, in g/cm^3.
+    mtarget : float
+        The mass of the nucleus, in GeV.
+    rn : float
+        The effective nuclear radius used in the Helm form factor, in fm.
+
+    """
+
+
+@functools.lru_cache(maxsize=None)
+def get_target_material(tm='Si'):
+    """
+    Function for getting the properties of a target material that are used in the rate calculations.
+    The properties are looked up with mendeleev only once for each value of `tm`, and are then
+    memoized, such that calculating the rates does not query the mendeleev database each time.
+
+    Parameters
+    ----------
+    tm : str, int, optional
+        The target material of the detector. Can be passed as either the atomic symbol, the
+        atomic number, or the full name of the element. Default is 'Si'.
+
+    Returns
+    -------
+    target : TargetMaterial
+        Named tuple of the symbol, atomic weight [amu], density [g/cm^3], nuclear mass [GeV],
+        and effective nuclear radius of the Helm form factor [fm] of the target material.
+
+    """
+
+    import mendeleev
+
+    element = mendeleev.element(tm)
+    atomic_weight = element.atomic_weight
+
+    # approximation of rn [Eq. 4.11 of L&S]
+    c = 1.23 * atomic_weight**(1 / 3) - 0.60 # [fm]
+    rn = np.sqrt(c**2 + 7 / 3 * np.pi**2 * _HELM_A**2 - 5 * _HELM_S**2)
+
+    return TargetMaterial(
+        symbol=element.symbol,
+        atomic_weight=atomic_weight,
+        density=element.density,
+        mtarget=atomic_weight * _MN,
+        rn=rn,
+    )
+
+
 def helmfactor(er, tm='Si'):
     """
     The analytic nuclear form factor via the Helm approximation.
@@ -150,22 +231,13 @@ def helmfactor(er, tm='Si'):
     er = np.atleast_1d(er)
 
     hbarc = constants.hbar * constants.c / constants.e * 1e-6 * 1e15 # [MeV fm]
-    mn = constants.atomic_mass * constants.c**2 / constants.e * 1e-9 # 1 amu in [GeV]
-    atomic_weight = mendeleev.element(tm).atomic_weight
+    target = get_target_material(tm)
 
     # dimensionless momentum transfer
-    q = np.sqrt(2 * mn * atomic_weight * er) # [MeV]
-
-    # using the parameters defined in L&S
-    s = 0.9 # [fm]
-    a = 0.52 # [fm]
-    c = 1.23 * atomic_weight**(1 / 3) - 0.60 # [fm]
-
-    # approximation of rn [Eq. 4.11 of L&S]
-    rn = np.sqrt(c**2 + 7 / 3 * np.pi**2 * a**2 - 5 * s**2)
+    q = np.sqrt(2 * target.mtarget * er) # [MeV]
 
-    qrn = q * rn / hbarc
-    qs = q * s / hbarc
+    qrn = q * target.rn / hbarc
+    qs = q * _HELM_S / hbarc
 
     # Helm approximation of form facter [Eq. 4.7 of L&S]
     ffactor2 = (3 * special.spherical_jn(1, qrn) / qrn * np.exp(-qs**2 / 2))**2 
@@ -182,12 +254,14 @@ def drde(q, m_dm, sig0, tm='Si'):
     q : array_like
         The recoil energies at which to calculate the dark matter differential
         event rate. Expected units are keV.
-    m_dm : float
+    m_dm : float, array_like
         The dark matter mass at which to calculate the expected differential
-        event rate. Expected units are GeV.
-    sig0 : float
+        event rate. Expected units are GeV. If an array of masses is passed, then
+        the rates of all of the masses are calculated at once.
+    sig0 : float, array_like
         The dark matter cross section at which to calculate the expected differential
-        event rate. Expected units are cm^2.
+        event rate. Expected units are cm^2. If an array is passed, then it should have
+        the same shape as `m_dm`, giving the cross section of each mass.
     tm : str, int, optional
         The target material of the detector. Can be passed as either the atomic symbol, the
         atomic number, or the full name of the element. Default is 'Si'.
@@ -197,7 +271,8 @@ def drde(q, m_dm, sig0, tm='Si'):
     rate : ndarray
         The expected dark matter differential event rate for the inputted recoil energies,
         dark matter mass, and dark matter cross section. Units are events/keV/kg/day, 
-        or "DRU".
+        or "DRU". If `m_dm` is a scalar, then this has the shape of `q`. Otherwise, this
+        has the shape of `m_dm` followed by the shape of `q`, e.g. (nmass, nenergy).
 
     Notes
     -----
@@ -219,45 +294,61 @@ def drde(q, m_dm, sig0, tm='Si'):
 
     q = np.atleast_1d(q) # convert to recoil energy in keV
 
+    if not np.isscalar(m_dm):
+        # add axes to the masses (and cross sections) to broadcast them against the energies
+        m_dm = np.asarray(m_dm, dtype=float)
+        m_dm = m_dm.reshape(m_dm.shape + (1,) * q.ndim)
+
+        if not np.isscalar(sig0):
+            sig0 = np.asarray(sig0, dtype=float).reshape(m_dm.shape)
+
     v0 = constants.v0_sun # sun velocity about galactic center [m/s]
     ve = constants.ve_orbital # mean orbital velocity of Earth [m/s]
     vesc = constants.vesc_galactic # galactic escape velocity [m/s]
     rho0 = constants.rho0_dm # local DM density [GeV/cm^3]
 
-    a = mendeleev.element(tm).atomic_weight
-    mn = constants.atomic_mass * constants.c**2 / constants.e * 1e-9 # nucleon mass (1 amu) [GeV]
-    mtarget = a * mn # nucleon mass for tm [GeV]
+    target = get_target_material(tm)
+    a = target.atomic_weight
+    mn = _MN # nucleon mass (1 amu) [GeV]
+    mtarget = target.mtarget # nucleon mass for tm [GeV]
     r = 4 * m_dm * mtarget / (m_dm + mtarget)**2 # unitless reduced mass parameter
     e0 = 0.5 * m_dm * (v0 / constants.c)**2 * 1e6 # kinetic energy of dark matter [keV]
     vmin = np.sqrt(q / (e0 * r)) * v0 # DM velocity for smallest particle energy to give recoil energy q
 
-    form_factor = helmfactor(q, tm=tm)
+    # the form factor only depends on the energy, so it is shared by all of the masses (the rate is
+    # zero for nonpositive energies, where the form factor is not defined)
+    form_factor = np.where(q > 0, helmfactor(q, tm=tm), 0)
 
-    # spin-independent cross section on entire nucleus
-    sigma = form_factor * sig0 * a**2 * (mtarget/(m_dm + mtarget))**2 / (mn / (m_dm + mn))**2
+    # spin-independent cross section on entire nucleus, without the form factor
+    sigma = sig0 * a**2 * (mtarget/(m_dm + mtarget))**2 / (mn / (m_dm + mn))**2
 
-    # event rate per unit mass for ve= 0 and vesc = infinity [Eq. 3.1 of L&S]
+    # event rate per unit mass for ve= 0 and vesc = infinity [Eq. 3.1 of L&S], without the form factor
     r0con = 2 * constants.N_A / np.sqrt(np.pi) * 1e5 * constants.day
     r0 = r0con * sigma * rho0 * v0 / (a * m_dm)
 
     # ratio of k0/k1 [Eq. 2.2 of L&S]
-    k0_over_k1 = 1 / (special.erf(vesc / v0) - 2 / np.sqrt(np.pi) * vesc / v0 * np.exp(-(vesc / v0)**2))
+    exp_vesc = np.exp(-(vesc / v0)**2)
+    k0_over_k1 = 1 / (special.erf(vesc / v0) - 2 / np.sqrt(np.pi) * vesc / v0 * exp_vesc)
+
+    # the terms of the rates that only depend on the mass
+    coeff_inf = r0 * np.sqrt(np.pi) * v0 / (4 * e0 * r * ve)
+    coeff_vesc = r0 / (e0 * r) * exp_vesc
+    erf_low = special.erf((vmin - ve) / v0)
 
     # rate integrated to infinity [Eq. 3.12 of L&S]
-    rate_inf = r0 * np.sqrt(np.pi) * v0 / (4 * e0 * r * ve) * (special.erf((vmin + ve) / v0) - special.erf((vmin - ve) / v0))
+    rate_inf = coeff_inf * (special.erf((vmin + ve) / v0) - erf_low)
     # rate integrated to vesc [Eq. 3.13 of L&S]
-    rate_vesc = k0_over_k1 * (rate_inf - r0 / (e0 * r) * np.exp(-(vesc / v0)**2))
+    rate_vesc = k0_over_k1 * (rate_inf - coeff_vesc)
 
     # rate calculation correction to L&S for `vmin` in range (`vesc` - `ve`, `vesc` + `ve`) [Eq. 22 of Schnee]
-    rate_inf2 = r0 * np.sqrt(np.pi) * v0 / (4 * e0 * r * ve) * (special.erf(vesc / v0) - special.erf((vmin - ve) / v0))
-    rate_high_vmin = k0_over_k1 * (rate_inf2 - r0 / (e0 * r) * (vesc + ve - vmin) / (2 * ve) * np.exp(-(vesc / v0)**2))
+    rate_inf2 = coeff_inf * (special.erf(vesc / v0) - erf_low)
+    rate_high_vmin = k0_over_k1 * (rate_inf2 - coeff_vesc * (vesc + ve - vmin) / (2 * ve))
 
     # combine the calculations based on their regions of validity
-    rate = np.zeros(q.shape)
-    rate[(vmin < vesc - ve) & (vmin > 0)] = rate_vesc[(vmin < vesc - ve) & (vmin > 0)]
-    rate[(vmin > vesc - ve) & (vmin < vesc + ve)] = rate_high_vmin[(vmin > vesc - ve) & (vmin < vesc + ve)]
+    rate = np.where((vmin < vesc - ve) & (vmin > 0), rate_vesc, 0)
+    rate = np.where((vmin > vesc - ve) & (vmin < vesc + ve), rate_high_vmin, rate)
 
-    return rate
+    return rate * form_factor
 
 
 def drde_max_q(m_dm, tm='Si'):
@@ -267,7 +358,7 @@ def drde_max_q(m_dm, tm='Si'):
 
     Parameters
     ----------
-    m_dm : float, ndarray
+    m_dm : float, array_like
         The dark matter mass at which to calculate the expected differential
         event rate. Expected units are GeV.
     tm : str, int, optional
@@ -282,16 +373,50 @@ def drde_max_q(m_dm, tm='Si'):
 
     """
 
-    a = mendeleev.element(tm).atomic_weight
-    mn = constants.atomic_mass * constants.c**2 / constants.e * 1e-9 # nucleon mass (1 amu) [GeV]
-    mtarget = a * mn # nucleon mass for tm [GeV]
+    if not np.isscalar(m_dm):
+        m_dm = np.asarray(m_dm, dtype=float)
+
+    mtarget = get_target_material(tm).mtarget # nucleon mass for tm [GeV]
     r = 4 * m_dm * mtarget / (m_dm + mtarget)**2 # unitless reduced mass parameter
     e0 = 0.5 * m_dm * (constants.v0_sun / constants.c)**2 * 1e6 # kinetic energy of dark matter [keV]
     qmax = e0 * r * ((constants.vesc_galactic + constants.ve_orbital) / constants.v0_sun)**2
 
     return qmax
 
-def gauss_smear(x, f, res, nres=1e5, gauss_width=10):
+def _lininterp(xnew, xp, fp):
+    """
+    Helper function for linearly interpolating `fp` from the increasing values `xp` to `xnew`
+    (which should be in the range of `xp`) along the last axis, such that many arrays (e.g. one
+    per dark matter mass) can be interpolated at once.
+
+    """
+
+    inds = np.clip(np.searchsorted(xp, xnew, side="right") - 1, 0, len(xp) - 2)
+    w = (xnew - xp[inds]) / (xp[inds + 1] - xp[inds])
+
+    return fp[..., inds] * (1 - w) + fp[..., inds + 1] * w
+
+
+def _resolution_bands(res, res_tol):
+    """
+    Helper function for splitting energy-dependent resolutions into bands, where the resolutions
+    in each band are within a relative tolerance of each other. Returns the band of each resolution
+    and the resolution used for each band, which is the geometric mean of the extremes of the band.
+
+    """
+
+    logres = np.log(res)
+    bands = np.floor((logres - logres.min()) / np.log1p(res_tol)).astype(int)
+
+    bandres = {}
+    for band in np.unique(bands):
+        inband = res[bands == band]
+        bandres[band] = np.sqrt(inband.min() * inband.max())
+
+    return bands, bandres
+
+
+def gauss_smear(x, f, res, nres=1e5, gauss_width=10, method="auto", res_tol=0.05):
     """
     Function for smearing an array of values by a Gaussian.
 
@@ -300,36 +425,85 @@ def gauss_smear(x, f, res, nres=1e5, gauss_width=10):
     x : array_like
         The x-values of the array `f` that will be smeared.
     f : array_like
-        The array of value to smear via a Gaussian distribution.
-    res : float
+        The array of value to smear via a Gaussian distribution. Can be a 2-dimensional
+        array, in which case each row is smeared (e.g. the rates of many dark matter masses),
+        where the last axis corresponds to `x`.
+    res : float, array_like, FunctionType
         The width of the Gaussian (1 standard deviation) that will be
         used to smear the inputted array. Should have the same units as `x`.
+        For an energy-dependent resolution, this can be an array of the width at
+        each value of `x`, or a function that returns the width when inputted `x`.
     nres : float, optional
         The size of the array that the Gaussian distribution will be saved to.
         Default is 1e5.
     gauss_width : float, optional
         The number of standard deviations of the Gaussian distribution that the
         smearing will go out to. Default is 10.
+    method : str, optional
+        The method used for the convolution with the Gaussian, either "direct", "fft",
+        or "auto". If "auto", then the direct convolution is used for short Gaussian
+        kernels, and the FFT convolution is used otherwise. Default is "auto".
+    res_tol : float, optional
+        For an energy-dependent resolution, the relative tolerance of the widths in each
+        band of `x` that is smeared by the same Gaussian. Each band is smeared by the geometric
+        mean of the smallest and largest widths in the band. Default is 0.05.
 
     Returns
     -------
     sx : ndarray
         The inputted array `f` after being smeared by the Gaussian distribution.
 
+    Raises
+    ------
+    ValueError
+        If `method` is not one of "direct", "fft", or "auto".
+
     """
 
-    x2 = np.linspace(min(x), max(x), num=int(nres))
-    spacing = np.mean(np.diff(x2))
-    f2 = interpolate.interp1d(x, f)
+    if method not in ["direct", "fft", "auto"]:
+        raise ValueError("method should be one of 'direct', 'fft', or 'auto'.")
+
+    x = np.asarray(x, dtype=float)
+    f = np.asarray(f, dtype=float)
+
+    if callable(res):
+        res = res(x)
+    res = np.broadcast_to(np.asarray(res, dtype=float), x.shape)
+
+    order = np.argsort(x)
+    x2 = np.linspace(x[order[0]], x[order[-1]], num=int(nres))
+    spacing = x2[1] - x2[0]
+    f2 = _lininterp(x2, x[order], f[..., order])
 
-    xgauss = np.arange(-gauss_width*res, gauss_width*res, spacing)
-    gauss = stats.norm.pdf(xgauss, scale=res)
+    bands, bandres = _resolution_bands(res, res_tol)
+    halfwidths = {band: int(gauss_width * r / spacing) for band, r in bandres.items()}
 
-    sce = signal.convolve(f2(x2), gauss, mode="full", method="direct") * spacing
-    e_conv = np.arange(-gauss_width * res + x2[0], gauss_width * res + x2[-1], spacing)
-    s = interpolate.interp1d(e_conv, sce)
+    # the rate spectra are nonnegative, so the roundoff of the FFT convolution is clipped
+    lgcnonneg = np.all(f2 >= 0)
+    nfft = fftpack.next_fast_len(len(x2) + 2 * max(halfwidths.values()))
+    f2_fft = None
 
-    return s(x)
+    sx = np.zeros(f.shape)
+
+    for band, r in bandres.items():
+        half = halfwidths[band]
+        gauss = stats.norm.pdf(spacing * np.arange(-half, half + 1), scale=r) * spacing
+
+        if method == "direct" or (method == "auto" and len(gauss) <= _MAX_DIRECT_KERNEL):
+            sce = np.apply_along_axis(np.convolve, -1, f2, gauss)
+        else:
+            if f2_fft is None:
+                # the FFT of the spectra is shared by the bands
+                f2_fft = np.fft.rfft(f2, n=nfft, axis=-1)
+            sce = np.fft.irfft(f2_fft * np.fft.rfft(gauss, n=nfft), n=nfft, axis=-1)
+            if lgcnonneg:
+                sce = np.clip(sce, 0, None)
+
+        # the smeared values at x2 are offset by the half width of the Gaussian
+        inband = bands == band
+        sx[..., inband] = _lininterp(x[inband], x2, sce[..., half:half + len(x2)])
+
+    return sx
 
 
 def optimuminterval(eventenergies, effenergies, effs, masslist, exposure,
@@ -357,10 +531,12 @@ def optimuminterval(eventenergies, effenergies, effs, masslist, exposure,
         between 0.00001 and 0.99999. However, the algorithm requires less than 100 upper
         limit events when outside the range 0.8 to 0.995 in order to work, so an error may
         be raised.
-    res : float, NoneType, optional
+    res : float, FunctionType, NoneType, optional
         The detector resolution in units of keV. If passed, then the differential event
         rate of the dark matter is convoluted with a Gaussian with width `res`, which results
-        in a smeared spectrum. If left as None, no smearing is performed.
+        in a smeared spectrum. For an energy-dependent resolution, this can be a function that
+        returns the resolution when inputted energies in keV, see `rqpy.limit.gauss_smear`.
+        If left as None, no smearing is performed.
     gauss_width : float, optional
         If `res` is not None, this is the number of standard deviations of the Gaussian
         distribution that the smearing will go out to. Default is 10.
@@ -413,62 +589,94 @@ def optimuminterval(eventenergies, effenergies, effs, masslist, exposure,
         effenergies, exp, kind="linear", bounds_error=False, fill_value=(0, exp[-1]),
     )
 
+    exp_interp = curr_exp(en_interp)[inlim]
+    en_inlim = en_interp[inlim]
+    event_inlim = eventenergies[event_inds]
+
+    masslist = np.asarray(masslist, dtype=float)
+
     sigma = np.ones(len(masslist)) * np.inf
     oi_energy0 = np.zeros(len(masslist))
     oi_energy1 = np.zeros(len(masslist))
 
-    for ii, mass in enumerate(masslist):
-        if verbose:
-            print(f"On mass {ii+1} of {len(masslist)}.")
+    # the rates are calculated for chunks of masses at once
+    nchunk = max(1, _MAX_RATE_SIZE // len(en_interp))
+
+    for start in range(0, len(masslist), nchunk):
+        masses = masslist[start:start + nchunk]
 
-        init_rate = drde(en_interp, mass, sigma0, tm=tm)
+        init_rates = drde(en_interp, masses, sigma0, tm=tm)
 
         if res is not None:
-            init_rate = gauss_smear(en_interp, init_rate, res, gauss_width=gauss_width)
+            init_rates = gauss_smear(en_interp, init_rates, res, gauss_width=gauss_width)
 
-        rate = init_rate * curr_exp(en_interp)
+        rates = init_rates[:, inlim] * exp_interp
 
-        integ_rate = integrate.cumtrapz(rate[inlim], x=en_interp[inlim], initial=0)
+        integ_rates = integrate.cumtrapz(rates, x=en_inlim, axis=-1, initial=0)
 
-        tot_rate = integ_rate[-1]
+        for ii, integ_rate in enumerate(integ_rates, start=start):
+            if verbose:
+                print(f"On mass {ii+1} of {len(masslist)}.")
 
-        x_val_fcn = interpolate.interp1d(
-            en_interp[inlim],
-            integ_rate,
-            kind="linear",
-            bounds_error=False,
-            fill_value=(0, tot_rate),
-        )
+            sigma[ii], oi_energy0[ii], oi_energy1[ii] = _optimuminterval_mass(
+                integ_rate, en_inlim, event_inlim, sigma0, cl,
+            )
 
-        x_vals = x_val_fcn(eventenergies[event_inds])
+    return sigma, oi_energy0, oi_energy1
 
-        if tot_rate != 0:
-            fc = x_vals/tot_rate
-            fc[fc > 1] = 1
 
-            cdf_max = 1 - 1e-6
-            possiblewimp = fc <= cdf_max
-            fc = fc[possiblewimp]
+def _optimuminterval_mass(integ_rate, en_inlim, eventenergies, sigma0, cl):
+    """
+    Helper function for running the Optimum Interval code for a single mass in `optimuminterval`,
+    given the cumulative integral of its rate, which returns the cross section of the sensitivity
+    and the energies of the optimum interval (or inf, 0, and 0 if the limit could not be calculated).
 
-            if len(fc) == 0:
-                fc = np.asarray([0, 1])
+    """
 
-            try:
-                uloutput, endpoint0, endpoint1 = upper(fc, cl=cl)
+    sigma = np.inf
+    oi_energy0 = 0
+    oi_energy1 = 0
 
-                sigma[ii] = (sigma0 / tot_rate) * uloutput
+    tot_rate = integ_rate[-1]
 
-                oi_energy0[ii] = eventenergies[event_inds][possiblewimp][endpoint0]
+    x_val_fcn = interpolate.interp1d(
+        en_inlim,
+        integ_rate,
+        kind="linear",
+        bounds_error=False,
+        fill_value=(0, tot_rate),
+    )
 
-                if endpoint1 < len(fc):
-                    oi_energy1[ii] = eventenergies[event_inds][possiblewimp][endpoint1]
-                else:
-                    oi_energy1[ii] = eventenergies[event_inds][possiblewimp][-1]
-            except:
-                pass
+    x_vals = x_val_fcn(eventenergies)
+
+    if tot_rate != 0:
+        fc = x_vals/tot_rate
+        fc[fc > 1] = 1
+
+        cdf_max = 1 - 1e-6
+        possiblewimp = fc <= cdf_max
+        fc = fc[possiblewimp]
+
+        if len(fc) == 0:
+            fc = np.asarray([0, 1])
+
+        try:
+            uloutput, endpoint0, endpoint1 = upper(fc, cl=cl)
+
+            sigma = (sigma0 / tot_rate) * uloutput
+
+            oi_energy0 = eventenergies[possiblewimp][endpoint0]
+
+            if endpoint1 < len(fc):
+                oi_energy1 = eventenergies[possiblewimp][endpoint1]
+            else:
+                oi_energy1 = eventenergies[possiblewimp][-1]
+        except:
+            pass
 
     return sigma, oi_energy0, oi_energy1
 
+
 def _norm2d(x0, x1, mu, cov, return_ellipse=False):
     """
     Two-dimensional normal probability density function.
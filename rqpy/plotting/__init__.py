@@ -2,3 +2,7 @@ from ._core_plotting import *
 from ._energy_cal_plotting import *
 from ._fitting_plotting import *
 from ._iv_didv_tools_plotting import *
+
+# load seaborn colormaps
+from seaborn import cm
+del cm
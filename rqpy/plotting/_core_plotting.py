@@ -918,10 +918,11 @@ class RatePlot(RQpyPlot):
             atomic number, or the full name of the element. Default is 'Si'.
         npoints : int, optional
             The number of points to use in the dR/dE plot. Default is 1000.
-        res : float, NoneType, optional
+        res : float, FunctionType, NoneType, optional
             The width of the gaussian (1 standard deviation) to be used to smear differential
-            scatter rate in the plot. Should have units of keV. None by default, in which no
-            smearing is done.
+            scatter rate in the plot. Should have units of keV. Can also be a function of energy
+            for an energy-dependent resolution, see `rqpy.limit.gauss_smear`. None by default,
+            in which no smearing is done.
         gauss_width : float, optional
             If `res` is not None, this is the number of standard deviations of the Gaussian
             distribution that the smearing will go out to. Default is 10.
@@ -948,11 +949,14 @@ class RatePlot(RQpyPlot):
 
         xvals = np.linspace(self._energy_range[0], self._energy_range[1], npoints)
 
-        for m, sig in zip(masses, sigmas):
-            drde = rp.limit.drde(xvals, m, sig, tm=tm)
+        # the rates of all of the masses are calculated (and smeared) at once
+        drdes = rp.limit.drde(xvals, masses, sigmas, tm=tm)
+        if res is not None:
+            drdes = rp.limit.gauss_smear(xvals, drdes, res, gauss_width=gauss_width)
+
+        for m, sig, drde in zip(masses, sigmas, drdes):
             label = f"DM Mass = {m:.2f} GeV, σ = {sig:.2e} cm$^2$"
             if res is not None:
-                drde = rp.limit.gauss_smear(xvals, drde, res, gauss_width=gauss_width)
                 label += f"\nWith {gauss_width}$\sigma_E$ Smearing"
 
             self.ax.plot(
@@ -1,3 +1,4 @@
 from ._process_rq import *
 from ._process_iv_didv import *
 from ._trigger import *
+from ._online_trigger import *
@@ -0,0 +1,404 @@
+import numpy as np
+from scipy.signal import correlate
+from collections import deque
+from bisect import bisect_right
+import socket
+import time
+
+from rqpy.process._trigger import OptimumFiltKernel, _getchangeslessthanthresh
+
+
+__all__ = ["OnlineTrigger", "filetail_chunks", "socket_chunks"]
+
+
+class OnlineTrigger(object):
+    """
+    Class for running the optimum filter trigger on a stream of data chunks as they are acquired, e.g.
+    for live monitoring during data taking. The same filter as `rqpy.process.OptimumFilt` is used, and
+    the end of each chunk is kept in a buffer, such that the filtered stream is the same as if the whole
+    stream had been filtered at once. Events are emitted to a callback and/or a queue as soon as the data
+    needed to save their traces has arrived.
+
+    Attributes
+    ----------
+    kernel : rqpy.process.OptimumFiltKernel
+        The definition of the optimum filter used for the trigger, which contains the time-domain filter `phi`, its
+        normalization `norm`, the expected energy resolution `resolution`, and the `pulse_range`.
+    fs : float
+        The sample rate of the data (Hz).
+    tracelength : int
+        The length (in bins) of the trace saved for each event.
+    thresh : float
+        The number of standard deviations of the energy resolution to use as the threshold for which events
+        will be detected as a pulse.
+    positivepulses : bool
+        Boolean flag for which direction the pulses go in the traces.
+    callback : NoneType, callable
+        Function that is called with each event.
+    eventqueue : NoneType, queue.Queue, asyncio.Queue
+        Queue that each event is put into (without blocking).
+    convtoamps : float
+        Correction factor to convert the data to Amps.
+    t0 : float
+        The absolute time (in s) of the first sample of the stream.
+    nsamples : int
+        The number of samples of the stream that have been received.
+    nevents : int
+        The number of events that have been emitted.
+    latencies : list
+        The latency (in s) of each emitted event, defined as the time between the arrival of the chunk
+        containing the pulse trigger time and the emission of the event.
+    proctime : float
+        The total time (in s) spent processing the chunks.
+
+    """
+
+    def __init__(self, fs, template, noisepsd, tracelength, thresh, positivepulses=True, callback=None,
+                 eventqueue=None, convtoamps=1, t0=0):
+        """
+        Initialization of the online trigger.
+
+        Parameters
+        ----------
+        fs : float
+            The sample rate of the data (Hz)
+        template : ndarray
+            The pulse template to be used when creating the optimum filter (assumed to be normalized)
+        noisepsd : ndarray
+            The two-sided power spectral density in units of A^2/Hz
+        tracelength : int
+            The desired trace length (in bins) to be saved when triggering on events.
+        thresh : float
+            The number of standard deviations of the energy resolution to use as the threshold for which events
+            will be detected as a pulse.
+        positivepulses : boolean, optional
+            Boolean flag for which direction the pulses go in the traces. If they go in the positive direction,
+            then this should be set to True. If they go in the negative direction, then this should be set to False.
+            Default is True.
+        callback : NoneType, callable, optional
+            Function that is called with each event, which is a dictionary with the keys "pulsetime", "pulseamp",
+            "trace", and "latency". If left as None, then no function is called.
+        eventqueue : NoneType, queue.Queue, asyncio.Queue, optional
+            Queue that each event is put into using `put_nowait`. If left as None, then no queue is used.
+        convtoamps : float, optional
+            Correction factor to convert the data to Amps. The chunks are multiplied by this factor. Default is 1.
+        t0 : float, optional
+            The absolute time (in s) of the first sample of the stream. Default is 0.
+
+        """
+
+        self.kernel = OptimumFiltKernel.cached(fs, template, noisepsd)
+        self.fs = fs
+        self.tracelength = tracelength
+        self.thresh = thresh
+        self.positivepulses = positivepulses
+        self.callback = callback
+        self.eventqueue = eventqueue
+        self.convtoamps = convtoamps
+        self.t0 = t0
+
+        # the bins near the edges of the buffer that cannot be searched, as in `OptimumFilt`
+        self._cut_len = np.max([len(self.kernel.phi), tracelength])
+
+        # the buffer of data that is still needed, and the stream index of its first sample
+        self._buffer = None
+        self._bufstart = 0
+        # the stream index of the first sample that has not been searched for events
+        self._nextsample = self._cut_len//2
+        # the stream index of the first sample and the arrival time of each chunk in the buffer
+        self._arrivals = deque()
+
+        self.nsamples = 0
+        self.nevents = 0
+        self.latencies = []
+        self.proctime = 0.0
+
+    def process(self, chunk):
+        """
+        Method to add a chunk of data to the stream, filtering it and emitting the events that
+        have been found.
+
+        Parameters
+        ----------
+        chunk : ndarray
+            The next chunk of the stream, of shape (# of channels, # of bins), or (# of bins,) for
+            a single channel. The channels are summed before filtering.
+
+        """
+
+        arrival = time.perf_counter()
+
+        chunk = np.asarray(chunk, dtype=float) * self.convtoamps
+        if chunk.ndim==1:
+            chunk = chunk[np.newaxis]
+
+        self._arrivals.append((self.nsamples, arrival))
+        self.nsamples += chunk.shape[-1]
+
+        if self._buffer is None:
+            buf = chunk
+        else:
+            buf = np.concatenate((self._buffer, chunk), axis=-1)
+
+        cut_len = self._cut_len
+        start = self._nextsample - self._bufstart
+        stop = buf.shape[-1] - cut_len//2 + (cut_len+1)%2
+        end = max(start, stop)
+
+        if stop > start:
+            filt = correlate(np.sum(buf, axis=0), self.kernel.phi, mode="same")/self.kernel.norm
+            sig = filt if self.positivepulses else -filt
+
+            evts = np.where(sig[start:stop] > self.thresh*self.kernel.resolution)[0] + start
+            ranges = _getchangeslessthanthresh(evts, self.kernel.pulse_range)[0]
+
+            # if the last event could continue into the next chunk, defer it until the next chunk has arrived,
+            # even if it was already deferred, such that events longer than a chunk are not split
+            if len(evts) > 0 and evts[-1] >= stop - self.kernel.pulse_range:
+                end = evts[ranges[-1][0]]
+                ranges = ranges[:-1]
+
+            for evt_range in ranges:
+                if evt_range[1]>evt_range[0]:
+                    evt_inds = evts[evt_range[0]:evt_range[1]]
+                    evt_ind = evt_inds[np.argmax(sig[evt_inds])]
+                    self._emit(buf, filt, evt_ind)
+
+        # keep only the data needed for the unsearched samples
+        keep = max(end - cut_len//2, 0)
+        self._buffer = buf[:, keep:]
+        self._bufstart += keep
+        self._nextsample = self._bufstart + end - keep
+
+        while len(self._arrivals) > 1 and self._arrivals[1][0] <= self._bufstart:
+            self._arrivals.popleft()
+
+        self.proctime += time.perf_counter() - arrival
+
+    def _emit(self, buf, filt, evt_ind):
+        """
+        Helper method for emitting an event to the callback and/or queue.
+
+        Parameters
+        ----------
+        buf : ndarray
+            The current buffer of the stream.
+        filt : ndarray
+            The filtered buffer.
+        evt_ind : int
+            The bin in the buffer of the event.
+
+        """
+
+        sample = self._bufstart + evt_ind
+        chunkind = bisect_right([a[0] for a in self._arrivals], sample) - 1
+
+        evt = {
+            "pulsetime" : self.t0 + sample/self.fs,
+            "pulseamp" : filt[evt_ind],
+            "trace" : buf[:, evt_ind - self.tracelength//2:evt_ind + self.tracelength//2 + self.tracelength%2].copy(),
+            "latency" : time.perf_counter() - self._arrivals[chunkind][1],
+        }
+
+        self.nevents += 1
+        self.latencies.append(evt["latency"])
+
+        if self.callback is not None:
+            self.callback(evt)
+        if self.eventqueue is not None:
+            self.eventqueue.put_nowait(evt)
+
+    def stats(self):
+        """
+        Method to report the latency and throughput of the online trigger.
+
+        Returns
+        -------
+        stats : dict
+            Dictionary with the number of samples ("nsamples") and events ("nevents") processed, the
+            processing time ("proctime"), the throughput in samples per second of processing time
+            ("throughput"), the ratio of the stream duration to the processing time ("realtimefactor"),
+            and the 50th, 90th, and 99th percentiles and maximum of the event latencies in s ("latency50",
+            "latency90", "latency99", "latencymax").
+
+        """
+
+        if len(self.latencies) > 0:
+            percentiles = np.percentile(self.latencies, [50, 90, 99, 100])
+        else:
+            percentiles = np.full(4, np.nan)
+
+        if self.proctime > 0:
+            throughput = self.nsamples/self.proctime
+        else:
+            throughput = np.nan
+
+        return {
+            "nsamples" : self.nsamples,
+            "nevents" : self.nevents,
+            "proctime" : self.proctime,
+            "throughput" : throughput,
+            "realtimefactor" : throughput/self.fs,
+            "latency50" : percentiles[0],
+            "latency90" : percentiles[1],
+            "latency99" : percentiles[2],
+            "latencymax" : percentiles[3],
+        }
+
+    def run(self, chunks):
+        """
+        Method to run the online trigger on all of the chunks of a stream.
+
+        Parameters
+        ----------
+        chunks : iterable
+            Iterable (e.g. a generator such as `rqpy.process.filetail_chunks`) of the chunks of the stream.
+
+        Returns
+        -------
+        stats : dict
+            The latency and throughput of the online trigger, see `OnlineTrigger.stats`.
+
+        """
+
+        for chunk in chunks:
+            self.process(chunk)
+
+        return self.stats()
+
+    async def run_async(self, queue):
+        """
+        Coroutine to run the online trigger on the chunks of a stream from an asyncio queue, until
+        None is received.
+
+        Parameters
+        ----------
+        queue : asyncio.Queue
+            The queue that the chunks of the stream are put into by the producer. The producer
+            should put None into the queue at the end of the stream.
+
+        Returns
+        -------
+        stats : dict
+            The latency and throughput of the online trigger, see `OnlineTrigger.stats`.
+
+        """
+
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            self.process(chunk)
+
+        return self.stats()
+
+
+def _bytes_to_chunk(data, nchan, dtype):
+    """
+    Helper function for converting interleaved samples to a chunk of shape (# of channels, # of bins).
+
+    """
+
+    nbins = len(data)//(np.dtype(dtype).itemsize*nchan)
+
+    return np.frombuffer(data, dtype=dtype, count=nbins*nchan).reshape(nbins, nchan).T
+
+
+def filetail_chunks(path, nchan, chunksize, dtype=np.int16, poll=0.1, timeout=1.0):
+    """
+    Generator that follows a binary file as it is being written, yielding chunks of the data, e.g.
+    as a producer for `rqpy.process.OnlineTrigger`. The file is assumed to contain interleaved samples
+    of each channel, with no header.
+
+    Parameters
+    ----------
+    path : str
+        Absolute path to the file to follow.
+    nchan : int
+        The number of channels in the file.
+    chunksize : int
+        The number of bins in each chunk.
+    dtype : numpy.dtype, optional
+        The data type of the samples in the file. Default is np.int16.
+    poll : float, optional
+        The time (in s) to wait before checking the file for new data. Default is 0.1.
+    timeout : float, NoneType, optional
+        The time (in s) without new data after which the stream is assumed to have ended. If left
+        as None, then the file is followed forever. Default is 1.0.
+
+    Yields
+    ------
+    chunk : ndarray
+        The next chunk of data, of shape (# of channels, # of bins). The last chunk may be shorter.
+
+    """
+
+    nbytes = chunksize*nchan*np.dtype(dtype).itemsize
+    data = b""
+    lastdata = time.monotonic()
+
+    with open(path, "rb") as f:
+        while True:
+            new = f.read(nbytes - len(data))
+
+            if new:
+                data += new
+                lastdata = time.monotonic()
+                if len(data)==nbytes:
+                    yield _bytes_to_chunk(data, nchan, dtype)
+                    data = b""
+            elif timeout is not None and time.monotonic() - lastdata > timeout:
+                break
+            else:
+                time.sleep(poll)
+
+    chunk = _bytes_to_chunk(data, nchan, dtype)
+    if chunk.shape[-1] > 0:
+        yield chunk
+
+
+def socket_chunks(address, nchan, chunksize, dtype=np.int16):
+    """
+    Generator that reads data from a TCP socket, yielding chunks of the data, e.g. as a producer
+    for `rqpy.process.OnlineTrigger`. The data is assumed to be interleaved samples of each channel,
+    and the stream ends when the connection is closed.
+
+    Parameters
+    ----------
+    address : tuple
+        The (host, port) of the server to connect to.
+    nchan : int
+        The number of channels in the stream.
+    chunksize : int
+        The number of bins in each chunk.
+    dtype : numpy.dtype, optional
+        The data type of the samples in the stream. Default is np.int16.
+
+    Yields
+    ------
+    chunk : ndarray
+        The next chunk of data, of shape (# of channels, # of bins). The last chunk may be shorter.
+
+    """
+
+    nbytes = chunksize*nchan*np.dtype(dtype).itemsize
+
+    with socket.create_connection(address) as sock:
+        while True:
+            data = bytearray(nbytes)
+            view = memoryview(data)
+            nread = 0
+
+            while nread < nbytes:
+                n = sock.recv_into(view[nread:])
+                if n==0:
+                    break
+                nread += n
+
+            if nread==nbytes:
+                yield _bytes_to_chunk(data, nchan, dtype)
+            else:
+                chunk = _bytes_to_chunk(data[:nread], nchan, dtype)
+                if chunk.shape[-1] > 0:
+                    yield chunk
+                break
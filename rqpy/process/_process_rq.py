@@ -2087,7 +2087,8 @@ def _calc_rq(traces, channels, det, setup, readout_inds=None):
 
     return rq_dict
 
-def _rq(file, channels, det, setup, convtoamps, savepath, lgcsavedumps, filetype):
+def _rq(file, channels, det, setup, convtoamps, savepath, lgcsavedumps, filetype, saveformat="pickle",
+        writer=None):
     """
     Helper function for processing raw data to calculate RQs for single files.
 
@@ -2111,8 +2112,14 @@ def _rq(file, channels, det, setup, convtoamps, savepath, lgcsavedumps, filetype
         Useful for saving data as the processing routine is run, allowing checks of the data during
         run time.
     filetype : str
-        The string that corresponds to the file type that will be opened. Supports two 
-        types -"mid.gz" and "npz".
+        The string that corresponds to the file type that will be opened. Supports three 
+        types -"mid.gz", "npz", and "rqd".
+    saveformat : str, optional
+        The format that each dump is saved in, if lgcsavedumps is set to True, see `rq`.
+        Default is "pickle".
+    writer : NoneType, rqpy.io.AsyncWriter, optional
+        The writer to save the DataFrame with in the background. If left as None, then the
+        DataFrame is saved before returning.
 
     Returns
     -------
@@ -2121,14 +2128,14 @@ def _rq(file, channels, det, setup, convtoamps, savepath, lgcsavedumps, filetype
 
     """
 
-    if filetype == "npz" and any(setup.do_trigsim):
-        raise ValueError("setup.do_trigsim was set to True for filetype npz. " +\
+    if filetype in ["npz", "rqd"] and any(setup.do_trigsim):
+        raise ValueError(f"setup.do_trigsim was set to True for filetype {filetype}. " +\
                          "The trigger simulation is only meant for filetype mid.gz")
 
     if filetype == "mid.gz":
         seriesnum = file.split('/')[-2]
         dump = file.split('/')[-1].split('_')[-1].split('.')[0]
-    elif filetype == "npz":
+    elif filetype in ["npz", "rqd"]:
         seriesnum = file.split('/')[-1].split('.')[0]
         dump = f"{int(seriesnum.split('_')[-1]):04d}"
 
@@ -2149,6 +2156,8 @@ def _rq(file, channels, det, setup, convtoamps, savepath, lgcsavedumps, filetype
                                                          lgcskip_empty=False, lgcreturndict=True)
     elif filetype == "npz":
         traces, info_dict = io.get_traces_npz([file])
+    elif filetype == "rqd":
+        traces, info_dict = io.get_traces_rqd(file)
 
     data = {}
 
@@ -2170,7 +2179,7 @@ def _rq(file, channels, det, setup, convtoamps, savepath, lgcsavedumps, filetype
         convtoamps_arr = convtoamps_arr[np.newaxis,:,np.newaxis]
 
         traces = traces_unscaled * convtoamps_arr
-    elif filetype == "npz":
+    elif filetype in ["npz", "rqd"]:
         readout_inds = None
 
     rq_dict = _calc_rq(traces, channels, det, setup, readout_inds=readout_inds)
@@ -2180,19 +2189,22 @@ def _rq(file, channels, det, setup, convtoamps, savepath, lgcsavedumps, filetype
     rq_df = pd.DataFrame.from_dict(data)
 
     if lgcsavedumps:
-        rq_df.to_pickle(f'{savepath}rq_df_{seriesnum}_d{dump}.pkl')   
+        _save_rq_df(rq_df, savepath, f'rq_df_{seriesnum}_d{dump}', saveformat, writer=writer)
 
     return rq_df
 
 
-def rq(filelist, channels, setup, det="Z1", savepath='', lgcsavedumps=False, nprocess=1, filetype="mid.gz"):
+def rq(filelist, channels, setup, det="Z1", savepath='', lgcsavedumps=False, nprocess=1, filetype="mid.gz",
+       chunksize=1000, saveformat="pickle"):
     """
     Function for processing raw data to calculate RQs. Supports multiprocessing.
 
     Parameters
     ----------
-    filelist : list
-        List of paths to each file that should be opened and processed
+    filelist : list, rqpy.io.Dataset
+        List of paths to each file that should be opened and processed. Alternatively, a `rqpy.io.Dataset`,
+        which is processed in chunks of `chunksize` events (in which case `filetype` is ignored, and the
+        channels and conversion to Amps of the dataset are used when reading the traces).
     channels : str, list of str
         List of the channel names that will be processed. Used when naming RQs. When filetype is "mid.gz", 
         this is also used when reading the traces from each file.
@@ -2213,8 +2225,16 @@ def rq(filelist, channels, setup, det="Z1", savepath='', lgcsavedumps=False, npr
     nprocess : int, optional
         The number of processes that should be used when multiprocessing. The default is 1.
     filetype : str, optional
-        The string that corresponds to the file type that will be opened. Supports two 
-        types -"mid.gz" and "npz". "mid.gz" is the default.
+        The string that corresponds to the file type that will be opened. Supports three 
+        types -"mid.gz", "npz", and "rqd". "mid.gz" is the default.
+    chunksize : int, optional
+        The number of events to process at a time if `filelist` is a `rqpy.io.Dataset`, which sets the
+        memory used. Default is 1000.
+    saveformat : str, optional
+        The format to save each dump in, if lgcsavedumps is set to True. If "pickle" (default), then
+        each DataFrame is pickled to `savepath`. If "parquet", then the DataFrames are saved to a
+        Parquet store in `savepath` that is partitioned by series, see `rqpy.io.save_rqs`, from which
+        selected RQs and events can be loaded with `rqpy.io.load_rqs`. Requires pyarrow.
 
     Returns
     -------
@@ -2235,24 +2255,56 @@ def rq(filelist, channels, setup, det="Z1", savepath='', lgcsavedumps=False, npr
     if len(det)!=len(channels):
         raise ValueError("channels and det should have the same length")
 
+    if saveformat not in ["pickle", "parquet"]:
+        raise ValueError("saveformat should be 'pickle' or 'parquet'.")
+
+    if isinstance(filelist, io.Dataset):
+        if any(setup.do_trigsim):
+            raise ValueError("setup.do_trigsim was set to True, but the trigger simulation cannot be "
+                             "run on a Dataset, as it needs the untruncated traces of each dump.")
+
+        if nprocess == 1:
+            results = []
+            start = 0
+            # the dumps are streamed in order, such that the events do not have to be counted first, and
+            # the chunks are saved in the background while the next chunk is processed
+            with io.AsyncWriter() as writer:
+                for chunk in filelist.iter_chunks(chunksize, lgcreturndict=True):
+                    stop = start + len(chunk[0])
+                    results.append(_rq_chunk(filelist, start, stop, channels, det, setup, savepath, lgcsavedumps, 
+                                             saveformat, writer=writer, chunk=chunk))
+                    start = stop
+        else:
+            starts = range(0, len(filelist), chunksize)
+            args = [(filelist, start, min(start + chunksize, len(filelist)), channels, det, setup, savepath, 
+                     lgcsavedumps, saveformat) for start in starts]
+
+            with multiprocessing.Pool(processes = nprocess) as pool:
+                results = pool.starmap(_rq_chunk, args)
+
+        return pd.concat(results, ignore_index = True)
+
     folder = os.path.split(filelist[0])[0]
 
     if filetype == "mid.gz":
         convtoamps = []
         for ch, d in zip(channels, det):
             convtoamps.append(io.get_trace_gain(folder, ch, d)[0])
-    elif filetype == "npz":
+    elif filetype in ["npz", "rqd"]:
         convtoamps = [1]*len(channels)
 
     if nprocess == 1:
         results = []
-        for f in filelist:
-            results.append(_rq(f, channels, det, setup, convtoamps, savepath, lgcsavedumps, filetype))
+        # the dumps are saved in the background while the next dump is processed
+        with io.AsyncWriter() as writer:
+            for f in filelist:
+                results.append(_rq(f, channels, det, setup, convtoamps, savepath, lgcsavedumps, filetype,
+                                   saveformat, writer=writer))
     else:
         pool = multiprocessing.Pool(processes = nprocess)
         results = pool.starmap(_rq, zip(filelist, repeat(channels), repeat(det), repeat(setup), 
                                         repeat(convtoamps), repeat(savepath), repeat(lgcsavedumps),
-                                        repeat(filetype)))
+                                        repeat(filetype), repeat(saveformat)))
         pool.close()
         pool.join()
 
@@ -2260,3 +2312,91 @@ def rq(filelist, channels, setup, det="Z1", savepath='', lgcsavedumps=False, npr
 
     return rq_df
 
+
+def _rq_chunk(dataset, start, stop, channels, det, setup, savepath, lgcsavedumps, saveformat="pickle",
+              writer=None, chunk=None):
+    """
+    Helper function for calculating the RQs of a chunk of the events of a `rqpy.io.Dataset`.
+
+    Parameters
+    ----------
+    dataset : rqpy.io.Dataset
+        The dataset to process.
+    start : int
+        The index of the first event of the chunk.
+    stop : int
+        The index of the event at which the chunk stops.
+    channels : list of str
+        List of the channel names that will be processed. Used when naming RQs.
+    det : list of str
+        The detector ID of each channel.
+    setup : SetupRQ
+        A SetupRQ class object.
+    savepath : str
+        The path to where the DataFrame of the chunk should be saved, if lgcsavedumps is set to True.
+    lgcsavedumps : bool
+        Boolean flag for whether or not the DataFrame of the chunk should be saved.
+    saveformat : str, optional
+        The format that the chunk is saved in, if lgcsavedumps is set to True, see `rq`.
+        Default is "pickle".
+    writer : NoneType, rqpy.io.AsyncWriter, optional
+        The writer to save the DataFrame with in the background. If left as None, then the
+        DataFrame is saved before returning.
+    chunk : NoneType, tuple, optional
+        The (traces, info_dict) of the chunk, if they have already been read, e.g. by
+        `rqpy.io.Dataset.iter_chunks`. If left as None, then the chunk is read from the dataset.
+
+    Returns
+    -------
+    rq_df : pandas.DataFrame
+        A pandas DataFrame object that contains all of the RQs for the chunk.
+
+    """
+
+    print(f"On events: {start} to {stop}")
+
+    if chunk is None:
+        chunk = dataset.read(slice(start, stop))
+
+    traces, info_dict = chunk
+
+    data = {}
+
+    data.update(info_dict)
+
+    if dataset.filetype == "mid.gz":
+        readout_inds = []
+        for d in set(det):
+            readout_inds.append(np.array(data[f'readoutstatus{d}'])==1)
+        readout_inds = np.logical_and.reduce(readout_inds)
+    else:
+        readout_inds = None
+
+    rq_dict = _calc_rq(traces, channels, det, setup, readout_inds=readout_inds)
+
+    data.update(rq_dict)
+
+    rq_df = pd.DataFrame.from_dict(data)
+
+    if lgcsavedumps:
+        _save_rq_df(rq_df, savepath, f'rq_df_events_{start:010d}_{stop:010d}', saveformat, writer=writer)
+
+    return rq_df
+
+
+def _save_rq_df(rq_df, savepath, savename, saveformat, writer=None):
+    """
+    Helper function for saving the DataFrame of a dump or chunk, either as a pickle file or
+    to the partitioned Parquet store in `savepath`, in the background if a writer is passed.
+
+    """
+
+    if saveformat == "parquet":
+        func, args = io.save_rqs, (rq_df, savepath, savename)
+    else:
+        func, args = rq_df.to_pickle, (f'{savepath}{savename}.pkl',)
+
+    if writer is None:
+        func(*args)
+    else:
+        writer.submit(func, *args)
@@ -1,14 +1,19 @@
 import numpy as np
 from scipy.signal import correlate
-from numpy.fft import ifft, fft, fftfreq, rfft, rfftfreq
+from numpy.fft import ifft, fft, fftfreq, rfft, rfftfreq, irfft
+from scipy.fftpack import next_fast_len
 from numpy.random import choice
-from collections import Counter
+from numpy.lib.stride_tricks import as_strided
 from math import log10, floor
 from rqpy import io
 import datetime
+import hashlib
+import tempfile
+import multiprocessing
+from collections import OrderedDict
 
 
-__all__ = ["rand_sections", "OptimumFilt", "acquire_randoms", "acquire_pulses"]
+__all__ = ["rand_sections", "OptimumFiltKernel", "OptimumFilt", "OptimumFiltBank", "acquire_randoms", "acquire_pulses", "threshold_scan"]
 
 
 def _getchangeslessthanthresh(x, threshold):
@@ -54,6 +59,127 @@ def _getchangeslessthanthresh(x, threshold):
 
     return ranges, vals
 
+def _threshscan_counts(peaks, trigpeaks, thresholds, trigthresholds, livetime):
+    """
+    Helper function for converting the peak values of each candidate event into the number of events
+    that would be detected for a grid of thresholds, i.e. a cumulative histogram of the peak values.
+
+    Parameters
+    ----------
+    peaks : ndarray
+        The peak optimum amplitude of each candidate event, in units of the energy resolution.
+    trigpeaks : ndarray, NoneType
+        The peak amplitude of the trigger channel for each candidate event. If None, then
+        only the pulse triggers are counted.
+    thresholds : array_like
+        The thresholds (in units of the energy resolution) at which to count the events.
+    trigthresholds : array_like, NoneType
+        The thresholds (in units of the trigger channel) at which to count the ttl triggers.
+        If None, then only the pulse triggers are counted.
+    livetime : float
+        The total time (in s) that was searched for events, used to convert counts to rates.
+
+    Returns
+    -------
+    scan : dict
+        Dictionary containing the results of the threshold scan. The keys are as follows.
+            'thresholds' : The inputted thresholds.
+            'trigthresholds' : The inputted trigger thresholds (None if not inputted).
+            'livetime' : The total time searched for events, in s.
+            'nevents' : The number of events detected for each threshold. Has shape
+                (number of thresholds,) or (number of thresholds, number of trigger thresholds).
+            'rates' : The corresponding event rate in Hz.
+            'npulseonly' : The number of events that only had a pulse trigger.
+            'nttlonly' : The number of events that only had a ttl trigger.
+            'nboth' : The number of events that had both a pulse and a ttl trigger.
+
+    """
+
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=float))
+    sorted_peaks = np.sort(peaks)
+    npulse = len(sorted_peaks) - np.searchsorted(sorted_peaks, thresholds, side="right")
+
+    if trigthresholds is None or trigpeaks is None:
+        nevents = npulse
+        npulseonly = npulse
+        nttlonly = np.zeros(len(thresholds), dtype=int)
+        nboth = np.zeros(len(thresholds), dtype=int)
+    else:
+        trigthresholds = np.atleast_1d(np.asarray(trigthresholds, dtype=float))
+        nboth = np.zeros((len(thresholds), len(trigthresholds)), dtype=int)
+        nttl = np.zeros(len(trigthresholds), dtype=int)
+
+        for jj, trigthresh in enumerate(trigthresholds):
+            cttl = trigpeaks > trigthresh
+            nttl[jj] = np.sum(cttl)
+            sorted_both = np.sort(peaks[cttl])
+            nboth[:, jj] = len(sorted_both) - np.searchsorted(sorted_both, thresholds, side="right")
+
+        npulseonly = npulse[:, np.newaxis] - nboth
+        nttlonly = nttl[np.newaxis, :] - nboth
+        nevents = npulseonly + nttlonly + nboth
+
+    scan = {
+        "thresholds": thresholds,
+        "trigthresholds": trigthresholds,
+        "livetime": livetime,
+        "nevents": nevents,
+        "rates": nevents / livetime if livetime > 0 else np.zeros(nevents.shape),
+        "npulseonly": npulseonly,
+        "nttlonly": nttlonly,
+        "nboth": nboth,
+    }
+
+    return scan
+
+def _rand_sorted_distinct(groups, nvals):
+    """
+    Helper function for drawing random integers, such that each element of `groups` is assigned a value
+    uniformly chosen from `range(nvals)`, without replacement within each group.
+
+    Parameters
+    ----------
+    groups : ndarray
+        Sorted array of the group that each value belongs to.
+    nvals : ndarray
+        The number of possible values to choose from for each element of `groups`. Must be
+        the same for all elements in the same group.
+
+    Returns
+    -------
+    vals : ndarray
+        The chosen values, which are distinct and sorted within each group.
+
+    """
+
+    vals = np.zeros(len(groups), dtype=int)
+    nvals = np.asarray(nvals)
+
+    # count how many values are needed from each group, if a group is densely sampled,
+    # use sampling without replacement, as the rejection sampling would be slow
+    _, first, counts = np.unique(groups, return_index=True, return_counts=True)
+    dense = 2*counts > nvals[first]
+
+    for ind, count in zip(first[dense], counts[dense]):
+        vals[ind:ind + count] = choice(nvals[ind], size=count, replace=False)
+
+    sparse = ~np.repeat(dense, counts)
+    vals[sparse] = np.random.randint(0, nvals[sparse])
+
+    # redraw any duplicated values within a group until all values are distinct, each redraw is
+    # uniform over the unused values, so the chosen sets are uniformly distributed
+    while True:
+        vals = vals[np.lexsort((vals, groups))]
+        dup = np.zeros(len(vals), dtype=bool)
+        dup[1:] = (vals[1:] == vals[:-1]) & (groups[1:] == groups[:-1])
+
+        if not np.any(dup):
+            break
+
+        vals[dup] = np.random.randint(0, nvals[dup])
+
+    return vals
+
 def rand_sections(x, n, l, t=None, fs=1.0):
     """
     Return random, non-overlapping sections of a 1 or 2 dimensional array.
@@ -110,45 +236,196 @@ def rand_sections(x, n, l, t=None, fs=1.0):
             raise ValueError(f"x is {len(x.shape)}-dimensional, t should be an array")
         elif len(x) != len(t):
             raise ValueError("x and t have different lengths")
-            
-        tup = ((n,),x.shape[1:-1],(l,))
-        sz = sum(tup,())
-        
-        res = np.zeros(sz)
-        evttimes = np.zeros(n)
-        j=0
-        
+
+        t = np.asarray(t)
         nmax = int(x.shape[-1]/l)
         
         if x.shape[0]*nmax<n:
             raise ValueError("Either n or l is too large, trying to find more random sections than are possible.")
-        
-        choicelist = list(range(len(x))) * nmax
-        np.random.shuffle(choicelist)
-        rows = np.array(choicelist[:n])
-        counts = Counter(rows)
 
-        for key in counts.keys():
-            offset = 0
-            ncounts = counts[key]
-            inds = np.arange(x.shape[-1] - (l-1)*ncounts)
-            
-            for ind in sorted(choice(inds, size=ncounts, replace=False)):
-                ind += offset
-                res[j] = x[key, ..., ind:ind + l]
-                evttimes[j] = t[key] + (ind+l//2)/fs
-                j += 1
-                offset += l - 1
+        # number of sections to take from each row, equivalent to shuffling nmax copies of each row index
+        counts = _sample_group_counts(n, x.shape[0], nmax)
+        rows = np.repeat(np.arange(x.shape[0]), counts)
+        rank = np.arange(n) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        # choose the offsets from the shrunk index range, then spread them out such that the sections
+        # do not overlap, as is done for the 1-dimensional case
+        offsets = _rand_sorted_distinct(rows, x.shape[-1] - (l-1)*counts[rows])
+        inds = offsets + rank*(l - 1)
+
+        # strided view of every possible section of each row, which allows the sections to be
+        # extracted with a single gather
+        windows = as_strided(
+            x,
+            shape=x.shape[:-1] + (x.shape[-1] - l + 1, l),
+            strides=x.strides + (x.strides[-1],),
+            writeable=False,
+        )
+
+        res = windows[rows, ..., inds, :].astype(float, copy=False)
+        evttimes = t[rows] + (inds + l//2)/fs
     
     return evttimes, res
 
 
+# least recently used cache of the filter kernels, from least to most recently used
+_KERNEL_CACHE = OrderedDict()
+_KERNEL_CACHE_SIZE = 32
+
+# the maximum number of elements of the (traces, outputs, bins) arrays of `OptimumFiltBank.filtertraces`,
+# which bounds the memory used when a block of traces is filtered in one batched FFT pass
+_MAX_BANK_SIZE = 2**23
+
+
+def _arraykey(arr):
+    """
+    Helper function for creating a hashable key of the contents of an array, for caching.
+    
+    """
+    
+    if arr is None:
+        return None
+    
+    arr = np.ascontiguousarray(arr, dtype=float)
+    
+    return arr.shape, hashlib.sha1(arr.tobytes()).hexdigest()
+
+
+def _readonly(arr):
+    """
+    Helper function for returning a read-only copy of an array.
+    
+    """
+    
+    if arr is None:
+        return None
+    
+    arr = np.array(arr, dtype=float)
+    arr.setflags(write=False)
+    
+    return arr
+
+
+class OptimumFiltKernel(object):
+    """
+    Class for the definition of a time-domain optimum filter, which only depends on the sample rate, 
+    the template, and the noise PSD. The kernel is immutable and its arrays are read-only, such that a 
+    single kernel can be shared by many `OptimumFilt` objects, e.g. one for each file, and can be sent
+    to worker processes.
+    
+    Attributes
+    ----------
+    fs : float
+        The sample rate of the data (Hz).
+    template : ndarray
+        The template that is used for the Optimum Filter.
+    noisepsd : ndarray
+        The two-sided noise PSD that is used to create the Optimum Filter.
+    phi : ndarray 
+        The optimum filter in time-domain, equal to the inverse FT of (FT of the template/power 
+        spectral density of noise)
+    norm : float
+        The normalization of the optimal amplitude.
+    resolution : float
+        The expected energy resolution in Amps given by the template and the noisepsd, calculated
+        from the Optimum Filter.
+    pulse_range : int
+        If detected events are this far away from one another (in bins), 
+        then they are to be treated as the same event.
+    trigtemplate : NoneType, ndarray
+        The template for the trigger channel pulse.
+    trignorm : NoneType, float
+        The normalization of the trigger channel filter.
+    
+    """
+    
+    def __init__(self, fs, template, noisepsd, trigtemplate=None):
+        """
+        Initialization of the filter definition.
+        
+        Parameters
+        ----------
+        fs : float
+            The sample rate of the data (Hz)
+        template : ndarray
+            The pulse template to be used when creating the optimum filter (assumed to be normalized)
+        noisepsd : ndarray
+            The two-sided power spectral density in units of A^2/Hz
+        trigtemplate : NoneType, ndarray, optional
+            The template for the trigger channel pulse. If left as None, then the trigger channel will not
+            be analyzed.
+        
+        """
+        
+        d = self.__dict__
+        
+        d["fs"] = fs
+        d["template"] = _readonly(template)
+        d["noisepsd"] = _readonly(noisepsd)
+        
+        # calculate the time-domain optimum filter
+        phi = ifft(fft(self.template)/self.noisepsd).real
+        # calculate the normalization of the optimum filter
+        d["norm"] = np.dot(phi, self.template)
+        d["phi"] = _readonly(phi)
+        
+        # calculate the expected energy resolution
+        d["resolution"] = 1/(self.norm/self.fs)**0.5
+        
+        # calculate pulse_range as the distance (in bins) between the max of the template and 
+        # the next value that is half of the max value
+        tmax_ind = np.argmax(self.template)
+        half_pulse_ind = np.argmin(abs(self.template[tmax_ind:]- self.template[tmax_ind]/2))+tmax_ind
+        d["pulse_range"] = half_pulse_ind-tmax_ind
+        
+        # set the trigger ttl template value
+        d["trigtemplate"] = _readonly(trigtemplate)
+        
+        # calculate the normalization of the trigger optimum filter
+        if trigtemplate is not None:
+            d["trignorm"] = np.dot(self.trigtemplate, self.trigtemplate)
+        else:
+            d["trignorm"] = None
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("OptimumFiltKernel objects are immutable")
+    
+    def __setstate__(self, state):
+        # the arrays are writeable again after unpickling
+        for value in state.values():
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+        self.__dict__.update(state)
+        
+    @classmethod
+    def cached(cls, fs, template, noisepsd, trigtemplate=None):
+        """
+        Method for getting the filter definition from the cache of the most recently used kernels,
+        creating it if it does not exist. See `OptimumFiltKernel.__init__` for the parameters.
+        
+        """
+        
+        key = (float(fs), _arraykey(template), _arraykey(noisepsd), _arraykey(trigtemplate))
+        
+        if key in _KERNEL_CACHE:
+            _KERNEL_CACHE.move_to_end(key)
+        else:
+            if len(_KERNEL_CACHE) >= _KERNEL_CACHE_SIZE:
+                _KERNEL_CACHE.popitem(last=False)
+            _KERNEL_CACHE[key] = cls(fs, template, noisepsd, trigtemplate=trigtemplate)
+        
+        return _KERNEL_CACHE[key]
+
+
 class OptimumFilt(object):
     """
     Class for applying a time-domain optimum filter to a long trace, which can be thought of as an FIR filter.
     
     Attributes
     ----------
+    kernel : OptimumFiltKernel
+        The filter definition, which is shared with other `OptimumFilt` objects using the same template
+        and noise PSD. The attributes below that describe the filter are read-only views of the kernel.
     phi : ndarray 
         The optimum filter in time-domain, equal to the inverse FT of (FT of the template/power 
         spectral density of noise)
@@ -185,18 +462,37 @@ class OptimumFilt(object):
         If we triggered due to ttl, the optimum amplitude at the ttl trigger time. Otherwise this is zero.
     traces : ndarray
         The corresponding trace for each detected event.
+    evtinds : ndarray
+        The index of the trace in `traces` of each detected event.
+    evtbins : ndarray
+        The bin in the trace of each detected event, which is at the center of the saved trace.
     trigtypes: ndarray
         Array of boolean vectors each of length 3. The first value indicates if the trace is a random or not.
         The second value indicates if we had a pulse trigger. The third value indicates if we had a ttl trigger.
     lgcoverlap : bool
         If True, then all events are saved when running `eventtrigger`, such that overlapping traces will be saved.
         If False, then `eventtrigger` will skip events that overlap, based on `tracelength`, with the previous event.
-            
+    liveintervals : ndarray
+        The start and end times (in s) of the section of each trace that was searched for events when 
+        running `eventtrigger`, with shape (# of traces, 2). The sections near the edges of the traces 
+        cannot be triggered on.
+    vetointervals : ndarray
+        The start and end times (in s) of the sections of the traces in which events were skipped when 
+        running `eventtrigger` due to overlapping with a previous event, with shape (# of vetoes, 2). This
+        is empty if `lgcoverlap` is True.
+    scanpeaks : ndarray
+        The peak optimum amplitude (in units of the energy resolution) of each candidate event found when
+        running `threshscan`.
+    scantrigpeaks : ndarray
+        The peak trigger channel amplitude of each candidate event found when running `threshscan`. This
+        is None if the trigger channel was not analyzed.
+
     """
 
-    def __init__(self, fs, template, noisepsd, tracelength, trigtemplate=None, lgcoverlap=True):
+    def __init__(self, fs, template, noisepsd, tracelength, trigtemplate=None, lgcoverlap=True, kernel=None):
         """
-        Initialization of the FIR filter.
+        Initialization of the FIR filter. The filter definition is taken from a cache of `OptimumFiltKernel` 
+        objects, such that it is only calculated once for each template and noise PSD.
         
         Parameters
         ----------
@@ -215,37 +511,29 @@ class OptimumFilt(object):
             If True, then all events are saved when running `eventtrigger`, such that overlapping traces will 
             be saved. If False, then `eventtrigger` will skip events that overlap, based on `tracelength`, 
             with the previous event.
+        kernel : NoneType, OptimumFiltKernel, optional
+            The filter definition to use. If passed, then `fs`, `template`, `noisepsd`, and `trigtemplate` are
+            ignored (and can be set to None).
         
         """
         
+        if kernel is None:
+            kernel = OptimumFiltKernel.cached(fs, template, noisepsd, trigtemplate=trigtemplate)
+        
+        self.kernel = kernel
         self.tracelength = tracelength
-        self.fs = fs
-        self.template = template
-        self.noisepsd = noisepsd
         self.lgcoverlap = lgcoverlap
         
-        # calculate the time-domain optimum filter
-        self.phi = ifft(fft(self.template)/self.noisepsd).real
-        # calculate the normalization of the optimum filter
-        self.norm = np.dot(self.phi, self.template)
-        
-        # calculate the expected energy resolution
-        self.resolution = 1/(np.dot(self.phi, self.template)/self.fs)**0.5
-        
-        # calculate pulse_range as the distance (in bins) between the max of the template and 
-        # the next value that is half of the max value
-        tmax_ind = np.argmax(self.template)
-        half_pulse_ind = np.argmin(abs(self.template[tmax_ind:]- self.template[tmax_ind]/2))+tmax_ind
-        self.pulse_range = half_pulse_ind-tmax_ind
-        
-        # set the trigger ttl template value
-        self.trigtemplate = trigtemplate
-        
-        # calculate the normalization of the trigger optimum filter
-        if trigtemplate is not None:
-            self.trignorm = np.dot(trigtemplate, trigtemplate)
-        else:
-            self.trignorm = None
+        # the filter definition is shared (read-only) with the kernel
+        self.fs = kernel.fs
+        self.template = kernel.template
+        self.noisepsd = kernel.noisepsd
+        self.phi = kernel.phi
+        self.norm = kernel.norm
+        self.resolution = kernel.resolution
+        self.pulse_range = kernel.pulse_range
+        self.trigtemplate = kernel.trigtemplate
+        self.trignorm = kernel.trignorm
             
         # set these attributes to None, as they are not known yet
         self.traces = None
@@ -258,8 +546,15 @@ class OptimumFilt(object):
         self.pulseamps = None
         self.trigtimes = None
         self.trigamps = None
-        self.evttraces = None
+        self.evtinds = None
+        self.evtbins = None
         self.trigtypes = None
+        self.liveintervals = None
+        self.vetointervals = None
+        self._evttraces = None
+
+        self.scanpeaks = None
+        self.scantrigpeaks = None
 
 
     def filtertraces(self, traces, times, trig=None):
@@ -282,6 +577,7 @@ class OptimumFilt(object):
         
         # update the traces, times, and ttl attributes
         self.traces = traces
+        self._evttraces = None
         self.times = times
         self.trig = trig
         
@@ -293,10 +589,39 @@ class OptimumFilt(object):
         
         # set the filtered values to zero near the edges, so as not to use the padded values in the analysis
         # also so that the traces that will be saved will be equal to the tracelength
-        cut_len = np.max([len(self.phi),self.tracelength])
+        self._zeroedges(self.filts)
+        
+        self._filtertrig(trig)
+
+    def _zeroedges(self, filts):
+        """
+        Helper method for setting the filtered values near the edges of each trace to zero (in place), 
+        so as not to use the padded values in the analysis and so that the traces that will be saved 
+        will be equal to the tracelength.
+        
+        Parameters
+        ----------
+        filts : ndarray
+            The filtered traces, with the bins as the last axis.
+        
+        """
+        
+        cut_len = np.max([self.phi.shape[-1], self.tracelength])
 
-        self.filts[:, :cut_len//2] = 0.0
-        self.filts[:, -(cut_len//2) + (cut_len+1)%2:] = 0.0
+        filts[..., :cut_len//2] = 0.0
+        filts[..., -(cut_len//2) + (cut_len+1)%2:] = 0.0
+        
+    def _filtertrig(self, trig):
+        """
+        Helper method for filtering the trigger channel traces with the trigtemplate, saving
+        the result to the `trigfilts` attribute.
+        
+        Parameters
+        ----------
+        trig : NoneType, ndarray
+            The trigger channel traces to be filtered using the trigtemplate. If None, then nothing is done.
+        
+        """
         
         if self.trigtemplate is None and trig is not None:
             raise ValueError("trig values have been inputted, but trigtemplate attribute has not been set, cannot filter the trig values")
@@ -306,8 +631,28 @@ class OptimumFilt(object):
 
             # set the filtered values to zero near the edges, so as not to use the padded values in the analysis
             # also so that the traces that will be saved will be equal to the tracelength
-            self.trigfilts[:, :cut_len//2] = 0.0
-            self.trigfilts[:, -(cut_len//2) + (cut_len+1)%2:] = 0.0
+            self._zeroedges(self.trigfilts)
+            
+    def _getamps(self, ii, inds):
+        """
+        Helper method for getting the optimum amplitudes (in Amps) of the filtered trace at
+        the specified bins.
+        
+        Parameters
+        ----------
+        ii : int
+            The index of the filtered trace.
+        inds : int, ndarray
+            The bin(s) of the filtered trace at which to get the optimum amplitude.
+            
+        Returns
+        -------
+        amps : float, ndarray
+            The optimum amplitudes at the specified bins.
+        
+        """
+        
+        return self.filts[ii, inds]
 
     def eventtrigger(self, thresh, trigthresh=None, positivepulses=True):
         """
@@ -335,8 +680,15 @@ class OptimumFilt(object):
         pulsetimes = []
         trigamps = []
         trigtimes = []
-        traces = []
+        evtinds = []
+        evtbins = []
         trigtypes = []
+        vetointervals = []
+
+        # the times in each trace that can be triggered on, i.e. the bins that were not zeroed near the edges
+        start, stop = self._usablebins()
+        times = np.asarray(self.times)
+        liveintervals = np.stack((times + start/self.fs, times + stop/self.fs), axis=1)
 
         # go through each filtered trace and get the events
         for ii, filt in enumerate(self.filts):
@@ -429,6 +781,10 @@ class OptimumFilt(object):
                                 # there is no overlap so update lastevt_ind
                                 # and precede with trigger code
                                 lastevt_ind = evt_ind
+
+                        # events within a tracelength after this event will be skipped, so this time is not live
+                        vetointervals.append([evt_ind/self.fs + self.times[ii], 
+                                              min(evt_ind + self.tracelength, stop)/self.fs + self.times[ii]])
                      
                     
                     if rangetypes[irange][1] and rangetypes[irange][2]:
@@ -439,200 +795,894 @@ class OptimumFilt(object):
                             pulse_ind = evt_inds[np.argmin(filt[evt_inds])]
                         # save trigger times and amplitudes
                         pulsetimes.extend([pulse_ind/self.fs + self.times[ii]])
-                        pulseamps.extend([filt[pulse_ind]])
+                        pulseamps.extend([self._getamps(ii, pulse_ind)])
                         trigtimes.extend([evt_ind/self.fs + self.times[ii]])
-                        trigamps.extend([filt[evt_ind]])
+                        trigamps.extend([self._getamps(ii, evt_ind)])
                     elif rangetypes[irange][2]:
                         # only ttl was triggered, save trigger time and amplitudes
                         pulsetimes.extend([0.0])
                         pulseamps.extend([0.0])
                         trigtimes.extend([evt_ind/self.fs + self.times[ii]])
-                        trigamps.extend([filt[evt_ind]])
+                        trigamps.extend([self._getamps(ii, evt_ind)])
                     else:
                         # only pulse was triggered, save trigger time and amplitudes
                         pulsetimes.extend([evt_ind/self.fs + self.times[ii]])
-                        pulseamps.extend([filt[evt_ind]])
+                        pulseamps.extend([self._getamps(ii, evt_ind)])
                         trigtimes.extend([0.0])
                         trigamps.extend([0.0])
 
                     trigtypes.extend([rangetypes[irange]])
 
-                    # save the traces that correspond to the detected event, including all channels, also with lengths
-                    # specified by the attribute tracelength
-                    traces.extend([self.traces[ii, ..., 
-                                              evt_ind - self.tracelength//2:evt_ind + self.tracelength//2 \
-                                              + (self.tracelength)%2]])
+                    # save the location of the traces that correspond to the detected event, which are
+                    # only copied when needed, see `gettraces`
+                    evtinds.extend([ii])
+                    evtbins.extend([evt_ind])
                     
 
         self.pulsetimes = pulsetimes
         self.pulseamps = pulseamps
         self.trigtimes = trigtimes
         self.trigamps = trigamps
-        self.evttraces = traces
+        self.evtinds = np.array(evtinds, dtype=int)
+        self.evtbins = np.array(evtbins, dtype=int)
         self.trigtypes = trigtypes
-        
+        self._evttraces = None
+        self.liveintervals = liveintervals
+        self.vetointervals = np.array(vetointervals).reshape(-1, 2)
 
-def acquire_randoms(filelist, n, l, datashape=None, iotype="stanford", savepath=None, 
-                    savename=None, dumpnum=1, maxevts=1000, convtoamps=1/1024):
-    """
-    Function for acquiring random traces from a list of files and saving the results
-    to a .npz file for later processing.
-    
-    Parameters
-    ----------
-    filelist : list of strings
-        List of files to be opened to take random sections from (should be full paths)
-    n : int
-        Number of sections to choose
-    l : int
-        Length in bins of sections
-    datashape : tuple, NoneType, optional
-        The shape of the data in each file. If inputted, this should be a tuple that is 
-        (# of traces in a dataset, # of bins in each trace). If left as None, then the first file 
-        in filelist is opened, and the shape of the data in it is used.
-    iotype : string, optional
-        Type of file to open, uses a different IO function. Default is "stanford".
-            "stanford" : Use qetpy.io.loadstanfordfile to open the files
-    savepath : NoneType, str, optional
-        Path to save the events to, if saveevents is True. If this is left as None, then they will
-        be saved in the current working directory.
-    savename : NoneType, str, optional
-        Filename to save the events as. It is recommended that this follows CDMS format, which is 
-        "[code][lasttwodigitsofyear][month][day]_[24hourclocktime]". If this is left as None, then 
-        a dummy filename is used based on the inputted filelist.
-    dumpnum : int, optional
-        The dump number that the file should start saving from and the event number should be 
-        determined by when saving. Default is 1.
-    maxevts : int, optional
-        The maximum number of events that should be stored in each dump when saving. Default
-        is 1000.
-    convtoamps : float, optional
-        Correction factor to convert the data to Amps. The traces are multiplied by this
-        factor, as is the TTL channel (if it exists). Default is 1/1024.
-                
+    @property
+    def evttraces(self):
+        """
+        The corresponding trace for each detected event, with shape = (# of events, # of channels, tracelength). 
+        This is copied from the traces the first time it is accessed after running `eventtrigger`, see 
+        `gettraces` for copying the traces of only some of the events.
         
-    """
-    
-    if savepath is None or not savepath:
-        savepath = "./"
-
-    if not savepath.endswith("/"):
-        savepath+="/"
-    
-    if savename is None:
-        now = datetime.datetime.now()
-        savename = now.strftime("%Y%m%d_%H%M")
+        """
         
-    if isinstance(filelist, str):
-        filelist=[filelist]
-    
-    if datashape is None:
-        # get the shape of data from the first dataset, we assume the shape is the same for all files
-        if iotype=="stanford":
-            traces = io.loadstanfordfile(filelist[0])[0]
-            datashape = (traces.shape[0], traces.shape[-1])
-        else:
-            raise ValueError("Unrecognized iotype inputted.")
-    
-    nmax = int(datashape[-1]/l)
-    choicelist = list(range(len(filelist))) * nmax * datashape[0]
-    np.random.shuffle(choicelist)
-    rows = np.array(choicelist[:n])
-    counts = Counter(rows)
+        if self.evtbins is None:
+            return None
+        
+        if self._evttraces is None:
+            self._evttraces = self.gettraces()
+        
+        return self._evttraces
 
-    evttimes_list = []
-    res_list = []
+    @evttraces.setter
+    def evttraces(self, value):
+        self._evttraces = value
     
-    evt_counter = 0
-
-    for key in counts.keys():
-
-        if iotype=="stanford":
-            traces, t, fs, _ = io.loadstanfordfile(filelist[key], convtoamps=convtoamps)
-        else:
-            raise ValueError("Unrecognized iotype inputted.")
-            
-        et, r = rand_sections(traces, counts[key], l, t=t, fs=fs)
+    def gettraces(self, start=0, stop=None, out=None):
+        """
+        Method to copy the traces that correspond to the detected events, including all channels, with lengths
+        specified by the attribute tracelength. The traces are written directly into `out`, if specified.
         
-        evt_counter += len(et)
-
-        evttimes_list.append(et)
-        res_list.append(r)
+        Parameters
+        ----------
+        start : int, optional
+            The index of the first event to copy the trace of. Default is 0.
+        stop : int, NoneType, optional
+            The index after the last event to copy the trace of. If left as None, then the traces are copied
+            up to the last event.
+        out : ndarray, NoneType, optional
+            The array to write the traces to, e.g. a section of a preallocated or memory-mapped buffer. Should be 
+            of shape (stop - start, # of channels, tracelength). If left as None, then a new array is allocated.
+        
+        Returns
+        -------
+        out : ndarray
+            The traces that correspond to the specified events.
+        
+        """
+        
+        evtinds = self.evtinds[start:stop]
+        evtbins = self.evtbins[start:stop] - self.tracelength//2
+        
+        if out is None:
+            out = np.empty((len(evtinds),) + self.traces.shape[1:-1] + (self.tracelength,), dtype=self.traces.dtype)
+        
+        for ii, (evtind, evtbin) in enumerate(zip(evtinds, evtbins)):
+            out[ii] = self.traces[evtind, ..., evtbin:evtbin + self.tracelength]
+        
+        return out
+
+    def _usablebins(self):
+        """
+        Helper method for getting the range of bins in the filtered traces that are searched for events,
+        i.e. the bins that were not set to zero near the edges of the traces.
+
+        Returns
+        -------
+        start : int
+            The first bin in each filtered trace that is searched for events.
+        stop : int
+            The bin after the last bin in each filtered trace that is searched for events.
+
+        """
+
+        cut_len = np.max([self.phi.shape[-1], self.tracelength])
+        nbins = self.filts.shape[-1]
+
+        return cut_len//2, nbins - cut_len//2 + (cut_len+1)%2
+
+    def _scancandidates(self, lowthresh, lowtrigthresh=None, positivepulses=True):
+        """
+        Helper method for finding the candidate events above the lowest thresholds of a threshold scan,
+        saving the peak amplitudes of each candidate event to the `scanpeaks` and `scantrigpeaks` attributes.
+
+        Parameters
+        ----------
+        lowthresh : float
+            The lowest threshold of the scan, in number of standard deviations of the energy resolution.
+        lowtrigthresh : NoneType, float, optional
+            The lowest threshold of the scan for the trigger channel. If left as None, then only the
+            pulses are analyzed.
+        positivepulses : boolean, optional
+            Boolean flag for which direction the pulses go in the traces. Default is True.
+
+        """
+
+        lgctrig = self.trigfilts is not None and lowtrigthresh is not None
+
+        peaks = []
+        trigpeaks = []
+
+        for ii, filt in enumerate(self.filts):
+            # convert to units of the energy resolution, flipping the sign for negative pulses
+            if positivepulses:
+                sig = filt/self.resolution
+            else:
+                sig = -filt/self.resolution
+
+            evts_mask = sig>lowthresh
+            if lgctrig:
+                evts_mask |= self.trigfilts[ii]>lowtrigthresh
+
+            evts = np.where(evts_mask)[0]
+
+            if len(evts)==0:
+                continue
+
+            # group the candidate events in the same way as `eventtrigger`, keeping the peak of each group
+            ranges = _getchangeslessthanthresh(evts, self.pulse_range)[0]
+            peaks.append(np.maximum.reduceat(sig[evts], ranges[:, 0]))
+
+            if lgctrig:
+                trigpeaks.append(np.maximum.reduceat(self.trigfilts[ii][evts], ranges[:, 0]))
+
+        self.scanpeaks = np.concatenate(peaks) if len(peaks)>0 else np.zeros(0)
+
+        if lgctrig:
+            self.scantrigpeaks = np.concatenate(trigpeaks) if len(trigpeaks)>0 else np.zeros(0)
+        else:
+            self.scantrigpeaks = None
+
+    def threshscan(self, thresholds, trigthresholds=None, positivepulses=True):
+        """
+        Method to calculate the number of events that would be detected for many different thresholds,
+        using a single pass over the filtered traces. The peak amplitude of every candidate event above
+        the lowest threshold is recorded, and the event counts, rates, and trigger types for each threshold
+        are calculated from the cumulative histogram of these peak amplitudes.
+
+        Parameters
+        ----------
+        thresholds : array_like
+            The thresholds, in number of standard deviations of the energy resolution, for which to
+            calculate the number of detected events.
+        trigthresholds : NoneType, array_like, optional
+            The thresholds (in units of the trigger channel) for which to calculate the number of ttl
+            trigger events. If left as None, then only the pulses are analyzed.
+        positivepulses : boolean, optional
+            Boolean flag for which direction the pulses go in the traces. If they go in the positive direction,
+            then this should be set to True. If they go in the negative direction, then this should be set to False.
+            Default is True.
+
+        Returns
+        -------
+        scan : dict
+            Dictionary containing the results of the threshold scan, see `rqpy.process.threshold_scan`.
+
+        Notes
+        -----
+        Candidate events are grouped using the lowest thresholds, such that separate events that would only be
+        resolved at a higher threshold are counted once. Overlapping events are not removed, which corresponds
+        to `lgcoverlap` being set to True.
+
+        """
+
+        lowtrigthresh = np.min(trigthresholds) if trigthresholds is not None else None
+        self._scancandidates(np.min(thresholds), lowtrigthresh=lowtrigthresh, positivepulses=positivepulses)
+
+        start, stop = self._usablebins()
+        livetime = len(self.filts) * (stop - start) / self.fs
+
+        return _threshscan_counts(self.scanpeaks, self.scantrigpeaks, thresholds, trigthresholds, livetime)
+
+
+class OptimumFiltBank(OptimumFilt):
+    """
+    Class for applying a bank of time-domain optimum filters to long multi-channel traces, triggering on
+    the most significant output of the bank. Each channel is filtered with its own template and noise PSD
+    (optionally for several pulse shapes), and the per-channel amplitudes are combined into the outputs
+    of the bank using a matrix of weights. All of the filter outputs of a trace are calculated in a single 
+    batched FFT pass.
+
+    The noise in different channels is assumed to be uncorrelated.
+
+    Attributes
+    ----------
+    phi : ndarray 
+        The optimum filters in time-domain for each pulse shape and channel, with 
+        shape = (# of shapes, # of channels, # of template bins).
+    norms : ndarray
+        The normalization of the optimal amplitude for each pulse shape and channel.
+    weights : ndarray
+        The weights used to combine the per-channel amplitudes into each output of the bank, with
+        shape = (# of shapes, # of outputs, # of channels).
+    resolutions : ndarray
+        The expected energy resolution in Amps of each output of the bank, with 
+        shape = (# of shapes, # of outputs).
+    resolution : float
+        Always equal to 1, as `filts` is in units of the energy resolution of the winning output.
+    filts : ndarray 
+        The significance (optimum amplitude divided by the energy resolution) of the winning output 
+        of the bank for each bin of each of the traces.
+    filtinds : ndarray
+        The flattened index (into `resolutions`) of the winning output of the bank for each bin of 
+        each of the traces.
+    positivepulses : bool
+        Whether the winning output is the one with the largest (True) or smallest (False) significance.
+
+    See `rqpy.process.OptimumFilt` for the remaining attributes.
 
-        if evt_counter >= maxevts:
+    """
+
+    def __init__(self, fs, templates, noisepsds, tracelength, weights=None, trigtemplate=None, 
+                 lgcoverlap=True, positivepulses=True):
+        """
+        Initialization of the bank of FIR filters.
+        
+        Parameters
+        ----------
+        fs : float
+            The sample rate of the data (Hz)
+        templates : ndarray
+            The pulse templates to be used when creating the optimum filters (assumed to be normalized).
+            Should be of shape (# of channels, # of template bins), or of shape (# of shapes, # of channels, 
+            # of template bins) if several pulse shapes are used.
+        noisepsds : ndarray
+            The two-sided power spectral densities in units of A^2/Hz of each channel, should be of
+            shape (# of channels, # of template bins).
+        tracelength : int
+            The desired trace length (in bins) to be saved when triggering on events.
+        weights : NoneType, str, ndarray, optional
+            The weights used to combine the per-channel optimum amplitudes into the outputs of the bank.
+            If "individual", then each channel is an output of the bank. If "optimal", then the only output is
+            the inverse-variance weighted combination of the channels, which is the optimum filter of the
+            multi-channel template. If an ndarray of shape (# of outputs, # of channels), then each row 
+            is the weights of an output, e.g. np.ones((1, nchan)) triggers on the sum of the channel 
+            amplitudes. If left as None, then the outputs are each individual channel and the optimal 
+            combination.
+        trigtemplate : NoneType, ndarray, optional
+            The template for the trigger channel pulse. If left as None, then the trigger channel will not
+            be analyzed.
+        lgcoverlap : bool, optional
+            If True, then all events are saved when running `eventtrigger`, such that overlapping traces will 
+            be saved. If False, then `eventtrigger` will skip events that overlap, based on `tracelength`, 
+            with the previous event.
+        positivepulses : boolean, optional
+            Boolean flag for which direction the pulses go in the traces. If they go in the positive direction, 
+            then this should be set to True. If they go in the negative direction, then this should be set to False.
+            Should match the value passed to `eventtrigger`. Default is True.
+        
+        """
+        
+        templates = np.asarray(templates, dtype=float)
+        noisepsds = np.asarray(noisepsds, dtype=float)
+        
+        if templates.ndim==2:
+            templates = templates[np.newaxis]
+        elif templates.ndim!=3:
+            raise ValueError("templates should be of shape (nchan, nbins) or (nshapes, nchan, nbins)")
             
-            evttimes = np.concatenate(evttimes_list)
-            res = np.vstack(res_list)
-            del evttimes_list
-            del res_list
-            trigtypes = np.zeros((len(evttimes), 3), dtype=bool)
-            trigtypes[:,0] = True
+        if noisepsds.shape!=templates.shape[1:]:
+            raise ValueError("noisepsds should be of shape (nchan, nbins), matching the templates")
+        
+        nshapes, nchan, nbins = templates.shape
+        
+        self.tracelength = tracelength
+        self.fs = fs
+        self.template = templates
+        self.noisepsd = noisepsds
+        self.lgcoverlap = lgcoverlap
+        self.positivepulses = positivepulses
+        
+        # calculate the time-domain optimum filters and their normalizations
+        self.phi = ifft(fft(templates, axis=-1)/noisepsds, axis=-1).real
+        self.norms = np.sum(self.phi*templates, axis=-1)
+        
+        # the variance of the optimum amplitude of each channel
+        chanvars = self.fs/self.norms
+        
+        optweights = self.norms/np.sum(self.norms, axis=-1, keepdims=True)
+        
+        if weights is None:
+            weights = np.concatenate((np.broadcast_to(np.eye(nchan), (nshapes, nchan, nchan)), 
+                                      optweights[:, np.newaxis]), axis=1)
+        elif isinstance(weights, str) and weights=="individual":
+            weights = np.broadcast_to(np.eye(nchan), (nshapes, nchan, nchan))
+        elif isinstance(weights, str) and weights=="optimal":
+            weights = optweights[:, np.newaxis]
+        else:
+            weights = np.asarray(weights, dtype=float)
+            if weights.ndim!=2 or weights.shape[-1]!=nchan:
+                raise ValueError("weights should be None, 'individual', 'optimal', or of shape (noutputs, nchan)")
+            weights = np.broadcast_to(weights, (nshapes,) + weights.shape)
+        
+        self.weights = np.array(weights)
+        
+        # calculate the expected energy resolution of each output
+        self.resolutions = np.sum(self.weights**2 * chanvars[:, np.newaxis], axis=-1)**0.5
+        self.resolution = 1.0
+        
+        # calculate pulse_range for each template, using the smallest so that nearby events are not merged
+        pulse_ranges = []
+        for template in templates.reshape(-1, nbins):
+            tmax_ind = np.argmax(template)
+            half_pulse_ind = np.argmin(abs(template[tmax_ind:]- template[tmax_ind]/2))+tmax_ind
+            pulse_ranges.append(half_pulse_ind-tmax_ind)
+        self.pulse_range = min(pulse_ranges)
+        
+        # set the trigger ttl template value
+        self.trigtemplate = trigtemplate
+        
+        # calculate the normalization of the trigger optimum filter
+        if trigtemplate is not None:
+            self.trignorm = np.dot(trigtemplate, trigtemplate)
+        else:
+            self.trignorm = None
+        
+        # the frequency domain kernels are calculated once the trace length is known
+        self._nfft = None
+        self._kernels = None
             
-            for ii in range(len(evttimes)//maxevts):
-                
-                io.saveevents_npz(randomstimes=evttimes[:maxevts], 
-                                  traces=res[:maxevts], 
-                                  trigtypes=trigtypes[:maxevts], 
-                                  savepath=savepath, 
-                                  savename=savename, 
-                                  dumpnum=dumpnum)
-                dumpnum+=1
-                
-                evttimes = evttimes[maxevts:]
-                res = res[maxevts:]
-                trigtypes = trigtypes[maxevts:]
+        # set these attributes to None, as they are not known yet
+        self.traces = None
+        self.filts = None
+        self.filtinds = None
+        self.times = None
+        self.trig = None
+        self.trigfilts = None
+        
+        self.pulsetimes = None
+        self.pulseamps = None
+        self.trigtimes = None
+        self.trigamps = None
+        self.evtinds = None
+        self.evtbins = None
+        self.trigtypes = None
+        self.liveintervals = None
+        self.vetointervals = None
+        self._evttraces = None
+
+        self.scanpeaks = None
+        self.scantrigpeaks = None
+    
+    def _getkernels(self, nbins):
+        """
+        Helper method for calculating the frequency domain kernels of the bank for traces of the 
+        specified length. The kernels include the normalizations, the combination weights, and the shift
+        that aligns the correlation with `scipy.signal.correlate` in "same" mode.
+        
+        Parameters
+        ----------
+        nbins : int
+            The number of bins in each trace to be filtered.
             
-            if len(evttimes)/maxevts>1:
-                evttimes_list = [evttimes]
-                res_list = [res]
-                evt_counter = len(evttimes)
+        Returns
+        -------
+        kernels : ndarray
+            The kernels of shape (# of outputs, # of channels, # of frequencies) to be multiplied with the 
+            FFTs of the channels of a trace.
+        
+        """
+        
+        ntemp = self.phi.shape[-1]
+        nfft = next_fast_len(nbins + ntemp - 1)
+        
+        if self._nfft!=nfft:
+            phifft = np.conj(rfft(self.phi, n=nfft, axis=-1))/self.norms[..., np.newaxis]
+            shift = np.exp(-2.0j*np.pi*rfftfreq(nfft)*(ntemp//2))
+            
+            kernels = self.weights[..., np.newaxis] * (phifft * shift)[:, np.newaxis]
+            kernels /= self.resolutions[..., np.newaxis, np.newaxis]
+            
+            self._kernels = kernels.reshape(-1, *kernels.shape[2:])
+            self._nfft = nfft
+            
+        return self._kernels
+        
+    def filtertraces(self, traces, times, trig=None):
+        """
+        Method to apply the bank of filters to each trace, saving the significance of the winning output
+        of the bank to the `filts` attribute and its index to the `filtinds` attribute.
+
+        Parameters
+        ----------
+        traces : ndarray
+            All of the traces to be filtered, assumed to be an ndarray of 
+            shape = (# of traces, # of channels, # of trace bins). Should be in units of Amps.
+        times : ndarray
+            The absolute start time of each trace (in s), should be a 1-dimensional ndarray.
+        trig : NoneType, ndarray, optional
+            The trigger channel traces to be filtered using the trigtemplate (if it exists). If
+            left as None, then only the traces are analyzed. If the trigtemplate attribute
+            has not been set, but this was set, then an error is raised.
+        
+        """
+        
+        # update the traces, times, and ttl attributes
+        self.traces = traces
+        self._evttraces = None
+        self.times = times
+        self.trig = trig
+        
+        ntraces, nchan, nbins = traces.shape
+        
+        if nchan!=self.phi.shape[1]:
+            raise ValueError("The number of channels in traces does not match the number of templates")
+        
+        kernels = self._getkernels(nbins)
+        binrange = np.arange(nbins)
+        
+        self.filts = np.zeros((ntraces, nbins))
+        self.filtinds = np.zeros((ntraces, nbins), dtype=np.int16)
+        
+        # the traces are filtered in chunks, such that the outputs of the bank of a chunk fit in memory
+        nchunk = max(1, _MAX_BANK_SIZE//(kernels.shape[0]*self._nfft))
+        
+        for start in range(0, ntraces, nchunk):
+            stop = min(start + nchunk, ntraces)
+            
+            # one FFT of each channel of each trace, then all outputs in units of their energy resolution
+            tracefft = rfft(traces[start:stop], n=self._nfft, axis=-1)
+            outputs = irfft(np.einsum("kcf,tcf->tkf", kernels, tracefft), n=self._nfft, axis=-1)[..., :nbins]
+            
+            if self.positivepulses:
+                inds = np.argmax(outputs, axis=1)
             else:
-                evttimes_list = []
-                res_list = []
-                evt_counter = 0
+                inds = np.argmin(outputs, axis=1)
+                
+            self.filts[start:stop] = outputs[np.arange(stop - start)[:, np.newaxis], inds, binrange]
+            self.filtinds[start:stop] = inds
+        
+        # set the filtered values to zero near the edges, so as not to use the padded values in the analysis
+        # also so that the traces that will be saved will be equal to the tracelength
+        self._zeroedges(self.filts)
+        
+        self._filtertrig(trig)
+        
+    def _getamps(self, ii, inds):
+        """
+        Helper method for getting the optimum amplitudes (in Amps) of the winning output of the bank
+        of the filtered trace at the specified bins.
+        
+        Parameters
+        ----------
+        ii : int
+            The index of the filtered trace.
+        inds : int, ndarray
+            The bin(s) of the filtered trace at which to get the optimum amplitude.
             
-    # clean up the remaining events
-    if evt_counter > 0:
+        Returns
+        -------
+        amps : float, ndarray
+            The optimum amplitudes at the specified bins.
         
-        evttimes = np.concatenate(evttimes_list)
-        res = np.vstack(res_list)
+        """
         
-        del evttimes_list
-        del res_list
+        return self.filts[ii, inds] * self.resolutions.ravel()[self.filtinds[ii, inds]]
+
+
+def _getfilelist(filelist, iotype):
+    """
+    Helper function for getting the list of files to open from a `rqpy.io.Dataset`, checking
+    that its file type matches `iotype`. The files are read as a whole, so the selection and
+    calibration of the dataset cannot be used.
+
+    """
+
+    if isinstance(filelist, io.Dataset):
+        if filelist.filetype != iotype:
+            raise ValueError(f"The inputted dataset has {filelist.filetype} files, but iotype is {iotype}.")
+        attrs = ["channels", "indstart", "indstop", "convtoamps"]
+        setattrs = [attr for attr in attrs if getattr(filelist, attr) is not None]
+        if len(setattrs) > 0:
+            raise ValueError(f"The inputted dataset has {', '.join(setattrs)} set, which cannot be applied "
+                             "when processing its files, the files are always read with all channels and "
+                             "bins, using the inputted convtoamps.")
+        return filelist.files
+
+    return filelist
+
+
+def _sample_group_counts(n, ngroups, groupsize):
+    """
+    Helper function for randomly choosing how many of `n` items are drawn, without replacement, from
+    each of `ngroups` equally-sized groups. This is equivalent to shuffling a list of all of the items
+    and counting how many of the first `n` items are in each group, but the counts are drawn directly
+    from a multivariate hypergeometric distribution, such that the full list is never created.
+
+    Parameters
+    ----------
+    n : int
+        The total number of items to draw.
+    ngroups : int
+        The number of groups to draw the items from.
+    groupsize : int
+        The number of items in each group.
+
+    Returns
+    -------
+    counts : ndarray
+        The number of items drawn from each group, has length `ngroups` and sums to `n`.
+
+    """
+
+    if n > ngroups * groupsize:
+        raise ValueError("Cannot draw more items than the total number of items in all of the groups.")
+
+    counts = np.zeros(ngroups, dtype=int)
+    nleft = n
+
+    # draw the marginal count of each group given the items left, this is exact for sampling
+    # without replacement and only needs one random draw per group
+    for ii in range(ngroups - 1):
+        if nleft == 0:
+            break
+        counts[ii] = np.random.hypergeometric(groupsize, groupsize * (ngroups - ii - 1), nleft)
+        nleft -= counts[ii]
+
+    counts[-1] += nleft
+
+    return counts
+
+def _rand_sections_file(args):
+    """
+    Helper function for opening a single file and taking random sections from it, for use with
+    `rqpy.process.acquire_randoms`.
+
+    Parameters
+    ----------
+    args : tuple
+        Tuple of (f, n, l, iotype, convtoamps, seed), where `f` is the file to open, `n` is
+        the number of sections to take, `l` is the length of the sections in bins, `iotype` is
+        the type of file to open, `convtoamps` is the factor that converts the data to Amps, and
+        `seed` is the random seed to use for choosing the sections (or None to use the current
+        random state).
+
+    Returns
+    -------
+    evttimes : ndarray
+        Array of the corresponding event times for each section
+    res : ndarray
+        Array of the n sections of the traces in the file, each with length l
+
+    """
+
+    f, n, l, iotype, convtoamps, seed = args
+
+    # in worker processes, each file gets its own seed so that the workers do not share a random state
+    if seed is not None:
+        np.random.seed(seed)
+
+    if iotype=="stanford":
+        traces, t, fs, _ = io.loadstanfordfile(f, convtoamps=convtoamps)
+    else:
+        raise ValueError("Unrecognized iotype inputted.")
+
+    return rand_sections(traces, n, l, t=t, fs=fs)
+
+def acquire_randoms(filelist, n, l, datashape=None, iotype="stanford", savepath=None, 
+                    savename=None, dumpnum=1, maxevts=1000, convtoamps=1/1024, nprocess=1):
+    """
+    Function for acquiring random traces from a list of files and saving the results
+    to a .npz file for later processing.
+    
+    Parameters
+    ----------
+    filelist : list of strings, rqpy.io.Dataset
+        List of files to be opened to take random sections from (should be full paths), or
+        a `rqpy.io.Dataset` of the files (for which `channels`, `indstart`, `indstop`, and
+        `convtoamps` must be left as None).
+    n : int
+        Number of sections to choose
+    l : int
+        Length in bins of sections
+    datashape : tuple, NoneType, optional
+        The shape of the data in each file. If inputted, this should be a tuple that is 
+        (# of traces in a dataset, # of bins in each trace). If left as None, then the first file 
+        in filelist is opened, and the shape of the data in it is used.
+    iotype : string, optional
+        Type of file to open, uses a different IO function. Default is "stanford".
+            "stanford" : Use qetpy.io.loadstanfordfile to open the files
+    savepath : NoneType, str, optional
+        Path to save the events to, if saveevents is True. If this is left as None, then they will
+        be saved in the current working directory.
+    savename : NoneType, str, optional
+        Filename to save the events as. It is recommended that this follows CDMS format, which is 
+        "[code][lasttwodigitsofyear][month][day]_[24hourclocktime]". If this is left as None, then 
+        a dummy filename is used based on the inputted filelist.
+    dumpnum : int, optional
+        The dump number that the file should start saving from and the event number should be 
+        determined by when saving. Default is 1.
+    maxevts : int, optional
+        The maximum number of events that should be stored in each dump when saving. Default
+        is 1000.
+    convtoamps : float, optional
+        Correction factor to convert the data to Amps. The traces are multiplied by this
+        factor, as is the TTL channel (if it exists). Default is 1/1024.
+    nprocess : int, optional
+        The number of processes to use to open the files and take the random sections. Only
+        the files that have at least one section chosen are opened. Default is 1.
         
-        trigtypes = np.zeros((len(evttimes), 3), dtype=bool)
-        trigtypes[:,0] = True
+    """
+    
+    if savepath is None or not savepath:
+        savepath = "./"
 
-        for ii in range(np.ceil(len(evttimes)/maxevts).astype(int)):
-            
-            io.saveevents_npz(randomstimes=evttimes[:maxevts], 
-                              traces=res[:maxevts], 
-                              trigtypes=trigtypes[:maxevts], 
-                              savepath=savepath, 
-                              savename=savename, 
-                              dumpnum=dumpnum)
-            dumpnum+=1
+    if not savepath.endswith("/"):
+        savepath+="/"
+    
+    if savename is None:
+        now = datetime.datetime.now()
+        savename = now.strftime("%Y%m%d_%H%M")
+        
+    if isinstance(filelist, str):
+        filelist=[filelist]
+
+    filelist = _getfilelist(filelist, iotype)
+    
+    if datashape is None:
+        # get the shape of data from the first dataset, we assume the shape is the same for all files
+        if iotype=="stanford":
+            traces = io.loadstanfordfile(filelist[0])[0]
+            datashape = (traces.shape[0], traces.shape[-1])
+            del traces
+        else:
+            raise ValueError("Unrecognized iotype inputted.")
+    
+    nmax = int(datashape[-1]/l)
+
+    if len(filelist)*datashape[0]*nmax<n:
+        raise ValueError("Either n or l is too large, trying to find more random sections than are possible.")
+
+    # draw the number of sections to take from each file, without creating the list of all possible sections
+    counts = _sample_group_counts(n, len(filelist), nmax * datashape[0])
+    fileinds = np.flatnonzero(counts)
+
+    if nprocess == 1:
+        # the sections are chosen with the random state of this process, which is not reseeded
+        args = [(filelist[ind], counts[ind], l, iotype, convtoamps, None) for ind in fileinds]
+        _save_rand_sections(map(_rand_sections_file, args), savepath, savename, dumpnum, maxevts)
+    else:
+        seeds = np.random.randint(2**31, size=len(fileinds))
+        args = [(filelist[ind], counts[ind], l, iotype, convtoamps, seed) for ind, seed in zip(fileinds, seeds)]
+
+        with multiprocessing.Pool(processes=nprocess) as pool:
+            _save_rand_sections(pool.imap(_rand_sections_file, args), savepath, savename, dumpnum, maxevts)
+
+def _save_rand_sections(results, savepath, savename, dumpnum, maxevts):
+    """
+    Helper function for saving the random sections from each file in `acquire_randoms` to dumps
+    of `maxevts` events, where full dumps are saved in the background.
+
+    Parameters
+    ----------
+    results : iterable
+        Iterable of the (evttimes, res) tuples returned by `_rand_sections_file` for each file.
+    savepath : str
+        Path to save the events to.
+    savename : str
+        Filename to save the events as.
+    dumpnum : int
+        The dump number that the file should start saving from.
+    maxevts : int
+        The maximum number of events that should be stored in each dump.
+
+    """
+
+    trigtypes = np.zeros((maxevts, 3), dtype=bool)
+    trigtypes[:,0] = True
+
+    evttimes = np.zeros(maxevts)
+    res = None
+    evt_counter = 0
+
+    with io.AsyncWriter() as writer:
+        for et, r in results:
+            if res is None:
+                res = np.zeros((maxevts,) + r.shape[1:])
+
+            nadded = 0
+
+            while nadded < len(et):
+                nadd = min(len(et) - nadded, maxevts - evt_counter)
+
+                evttimes[evt_counter:evt_counter + nadd] = et[nadded:nadded + nadd]
+                res[evt_counter:evt_counter + nadd] = r[nadded:nadded + nadd]
+
+                evt_counter += nadd
+                nadded += nadd
+
+                if evt_counter == maxevts:
+                    writer.submit(io.saveevents_npz,
+                                  randomstimes=evttimes, 
+                                  traces=res, 
+                                  trigtypes=trigtypes, 
+                                  savepath=savepath, 
+                                  savename=savename, 
+                                  dumpnum=dumpnum)
+                    dumpnum+=1
+                    evt_counter = 0
+
+                    # the next dump is assembled in new arrays, as the saved arrays are still being written
+                    evttimes = np.zeros(maxevts)
+                    res = np.empty_like(res)
+
+        # clean up the remaining events
+        if evt_counter > 0:
+            writer.submit(io.saveevents_npz,
+                          randomstimes=evttimes[:evt_counter], 
+                          traces=res[:evt_counter], 
+                          trigtypes=trigtypes[:evt_counter], 
+                          savepath=savepath, 
+                          savename=savename, 
+                          dumpnum=dumpnum)
+
+class _EventBuffer(object):
+    """
+    Helper class for assembling a dump of triggered events in preallocated arrays, such that the event
+    traces are copied directly from the filtered traces into the dump.
+    
+    """
+    
+    def __init__(self, maxevts, nchan, tracelength, scratchpath=None):
+        """
+        Initialization of the buffer, where the arrays are only allocated when the first event is added.
+        
+        Parameters
+        ----------
+        maxevts : int
+            The number of events in each dump.
+        nchan : int
+            The number of channels of the traces.
+        tracelength : int
+            The length (in bins) of the traces.
+        scratchpath : NoneType, str, optional
+            Path to a directory in which the traces are stored in a temporary memory-mapped file. If 
+            left as None, then the traces are stored in memory.
+        
+        """
+        
+        self.maxevts = maxevts
+        self.nchan = nchan
+        self.tracelength = tracelength
+        self.scratchpath = scratchpath
+        self.nevts = 0
+        self.evttraces = None
+        
+    def _allocate(self):
+        """
+        Helper method for allocating the arrays of the buffer.
+        
+        """
+        
+        self.pulsetimes = np.zeros(self.maxevts)
+        self.pulseamps = np.zeros(self.maxevts)
+        self.trigtimes = np.zeros(self.maxevts)
+        self.trigamps = np.zeros(self.maxevts)
+        self.trigtypes = np.zeros((self.maxevts, 3), dtype=bool)
+        
+        shape = (self.maxevts, self.nchan, self.tracelength)
+        
+        if self.scratchpath is None:
+            self.evttraces = np.zeros(shape)
+        else:
+            # the file is deleted once the buffer is garbage collected
+            self._scratchfile = tempfile.TemporaryFile(dir=self.scratchpath)
+            self.evttraces = np.memmap(self._scratchfile, dtype=float, mode="w+", shape=shape)
+    
+    def add(self, filt, start):
+        """
+        Method for adding the triggered events of an `OptimumFilt` object to the buffer, up to
+        the number of events that fit.
+        
+        Parameters
+        ----------
+        filt : OptimumFilt
+            The filter object that has been used to trigger on events.
+        start : int
+            The index of the first event of `filt` to add.
             
-            if ii+1!=np.ceil(len(evttimes)/maxevts).astype(int):
-                evttimes = evttimes[maxevts:]
-                res = res[maxevts:]
-                trigtypes = trigtypes[maxevts:]
+        Returns
+        -------
+        numadded : int
+            The number of events that were added to the buffer.
+        
+        """
+        
+        if self.evttraces is None:
+            self._allocate()
+        
+        numadded = min(len(filt.pulsetimes) - start, self.maxevts - self.nevts)
+        
+        inds = slice(self.nevts, self.nevts + numadded)
+        evts = slice(start, start + numadded)
+        
+        self.pulsetimes[inds] = filt.pulsetimes[evts]
+        self.pulseamps[inds] = filt.pulseamps[evts]
+        self.trigtimes[inds] = filt.trigtimes[evts]
+        self.trigamps[inds] = filt.trigamps[evts]
+        self.trigtypes[inds] = filt.trigtypes[evts]
+        filt.gettraces(start, start + numadded, out=self.evttraces[inds])
+        
+        self.nevts += numadded
+        
+        return numadded
     
+    def save(self, savepath, savename, dumpnum):
+        """
+        Method for saving the events in the buffer to a dump, where a partially filled buffer is
+        padded with zeros to the full length of the dump.
+        
+        Parameters
+        ----------
+        savepath : str
+            Path to save the events to.
+        savename : str
+            Filename to save the events as.
+        dumpnum : int
+            The dump number of the dump.
+        
+        """
+        
+        # only the unfilled part of the buffer needs to be cleared
+        for arr in [self.pulsetimes, self.pulseamps, self.trigtimes, self.trigamps, self.trigtypes, self.evttraces]:
+            arr[self.nevts:] = 0
+        
+        io.saveevents_npz(pulsetimes=self.pulsetimes, 
+                          pulseamps=self.pulseamps, 
+                          trigtimes=self.trigtimes, 
+                          trigamps=self.trigamps, 
+                          traces=self.evttraces, 
+                          trigtypes=self.trigtypes, 
+                          savepath=savepath, 
+                          savename=savename, 
+                          dumpnum=dumpnum)
+
+
 def acquire_pulses(filelist, template, noisepsd, tracelength, thresh, nchan=2, trigtemplate=None, 
                    trigthresh=None, positivepulses=True, iotype="stanford", savepath=None, 
-                   savename=None, dumpnum=1, maxevts=1000, lgcoverlap=True, convtoamps=1/1024):
+                   savename=None, dumpnum=1, maxevts=1000, lgcoverlap=True, convtoamps=1/1024, weights=None,
+                   scratchpath=None):
     """
     Function for running the continuous trigger on many different files and saving the events 
     to .npz files for later processing.
     
     Parameters
     ----------
-    filelist : list of strings
-        List of files to be opened to take random sections from (should be full paths)
+    filelist : list of strings, rqpy.io.Dataset
+        List of files to be opened to search for pulses in (should be full paths), or a 
+        `rqpy.io.Dataset` of the files (for which `channels`, `indstart`, `indstop`, and
+        `convtoamps` must be left as None).
     template : ndarray
-        The pulse template to be used when creating the optimum filter (assumed to be normalized)
+        The pulse template to be used when creating the optimum filter (assumed to be normalized). If
+        this is 1-dimensional, then the trigger is run on the sum of the channels. If this is of shape 
+        (nchan, nbins) or (nshapes, nchan, nbins), then a filter-bank trigger is run using per-channel 
+        templates, see `rqpy.process.OptimumFiltBank`.
     noisepsd : ndarray
-        The two-sided power spectral density in units of A^2/Hz
+        The two-sided power spectral density in units of A^2/Hz. Should be of shape (nchan, nbins)
+        if a filter-bank trigger is run.
     tracelength : int
         The desired trace length (in bins) to be saved when triggering on events.
     thresh : float
@@ -669,6 +1719,22 @@ def acquire_pulses(filelist, template, noisepsd, tracelength, thresh, nchan=2, t
     convtoamps : float, optional
         Correction factor to convert the data to Amps. The traces are multiplied by this
         factor, as is the TTL channel (if it exists). Default is 1/1024.
+    weights : NoneType, str, ndarray, optional
+        The weights used to combine the per-channel amplitudes of the filter-bank trigger. Only
+        used if template is multi-dimensional, see `rqpy.process.OptimumFiltBank`.
+    scratchpath : NoneType, str, optional
+        Path to a directory in which the traces of the dumps are assembled in temporary memory-mapped
+        files, which is useful if a dump of traces does not fit in memory. If left as None, then the 
+        dumps are assembled in memory.
+        
+    Notes
+    -----
+    Next to each dump, a live-time index is saved with the extension ".livetime", which contains the
+    sections of the traces that were searched for events and the sections in which overlapping events 
+    were skipped. The index of each file is saved with the dump that contains the last of its events, 
+    where files without events are saved with the next dump (or the last dump, if no more dumps are 
+    written). If no events are found at all, then an empty dump is saved with the index. The live time 
+    should be calculated over all of the dumps, see `rqpy.io.get_livetime`.
             
     """
     
@@ -684,96 +1750,245 @@ def acquire_pulses(filelist, template, noisepsd, tracelength, thresh, nchan=2, t
     
     if isinstance(filelist, str):
         filelist=[filelist]
+
+    filelist = _getfilelist(filelist, iotype)
     
-    pulsetimes = np.zeros(maxevts)
-    pulseamps = np.zeros(maxevts)
-    trigtimes = np.zeros(maxevts)
-    trigamps = np.zeros(maxevts)
-    evttraces = np.zeros((maxevts, nchan, tracelength))
-    trigtypes = np.zeros((maxevts, 3), dtype=bool)
+    buffers = [_EventBuffer(maxevts, nchan, tracelength, scratchpath=scratchpath) for _ in range(2)]
+    saves = [None, None]
+    ibuf = 0
     
-    evt_counter = 0
+    # the live-time index of the files whose events have all been added to a buffer, but which have
+    # not yet been saved with a dump
+    liveintervals = []
+    vetointervals = []
     
-    for f in filelist:
-        
-        if iotype=="stanford":
-            traces, times, fs, trig = io.loadstanfordfile(f, convtoamps=convtoamps)
+    # the dump number and live-time index of the last dump that was written
+    lastdump = None
+    
+    filt = None
+    
+    if iotype=="stanford":
+        # the files are opened one at a time, reusing the same array for the traces
+        files = io.StanfordFiles(filelist, convtoamps=convtoamps)
+    else:
+        raise ValueError("Unrecognized iotype inputted.")
+
+    # full dumps are saved in the background, while the next dump is assembled in the other buffer
+    with io.AsyncWriter() as writer:
+        for traces, times, fs, trig in files:
+
             if trigtemplate is None:
                 trig = None
-        else:
-            raise ValueError("Unrecognized iotype inputted.")
-            
-        filt = OptimumFilt(fs, template, noisepsd, tracelength, trigtemplate=trigtemplate, lgcoverlap=lgcoverlap)
-        filt.filtertraces(traces, times, trig=trig)
-        filt.eventtrigger(thresh, trigthresh=trigthresh, positivepulses=positivepulses)
-        
-        numevts = len(filt.pulsetimes)
-        
-        evt_counter += numevts
-        
-        if evt_counter < maxevts:
 
-            pulsetimes[evt_counter-numevts:evt_counter] = filt.pulsetimes
-            pulseamps[evt_counter-numevts:evt_counter] = filt.pulseamps
-            trigtimes[evt_counter-numevts:evt_counter] = filt.trigtimes
-            trigamps[evt_counter-numevts:evt_counter] = filt.trigamps
-            evttraces[evt_counter-numevts:evt_counter] = filt.evttraces
-            trigtypes[evt_counter-numevts:evt_counter] = filt.trigtypes
-        
-        elif evt_counter >= maxevts:
-            numextra = evt_counter - maxevts
-            numtoadd = maxevts - (evt_counter - numevts)
-            
-            pulsetimes[evt_counter-numevts:] = filt.pulsetimes[:numtoadd]
-            pulseamps[evt_counter-numevts:] = filt.pulseamps[:numtoadd]
-            trigtimes[evt_counter-numevts:] = filt.trigtimes[:numtoadd]
-            trigamps[evt_counter-numevts:] = filt.trigamps[:numtoadd]
-            evttraces[evt_counter-numevts:] = filt.evttraces[:numtoadd]
-            trigtypes[evt_counter-numevts:] = filt.trigtypes[:numtoadd]
-            
-            for ii in range(numextra//maxevts + 1):
-                
-                io.saveevents_npz(pulsetimes=pulsetimes, 
-                                  pulseamps=pulseamps, 
-                                  trigtimes=trigtimes, 
-                                  trigamps=trigamps, 
-                                  traces=evttraces, 
-                                  trigtypes=trigtypes, 
-                                  savepath=savepath, 
-                                  savename=savename, 
-                                  dumpnum=dumpnum)
-                dumpnum+=1
-                
-                pulsetimes.fill(0)
-                pulseamps.fill(0)
-                trigtimes.fill(0)
-                trigamps.fill(0)
-                evttraces.fill(0)
-                trigtypes.fill(0)
-                
-                numleft = numevts - (numtoadd + ii*maxevts)
-                
-                if numleft > maxevts:
-                    numleft = maxevts
-                
-                if numleft > 0:
-                    pulsetimes[:numleft] = filt.pulsetimes[numtoadd + ii*maxevts:numtoadd + ii*maxevts + numleft]
-                    pulseamps[:numleft] = filt.pulseamps[numtoadd + ii*maxevts:numtoadd + ii*maxevts + numleft]
-                    trigtimes[:numleft] = filt.trigtimes[numtoadd + ii*maxevts:numtoadd + ii*maxevts + numleft]
-                    trigamps[:numleft] = filt.trigamps[numtoadd + ii*maxevts:numtoadd + ii*maxevts + numleft]
-                    evttraces[:numleft] = filt.evttraces[numtoadd + ii*maxevts:numtoadd + ii*maxevts + numleft]
-                    trigtypes[:numleft] = filt.trigtypes[numtoadd + ii*maxevts:numtoadd + ii*maxevts + numleft]
-                
-            evt_counter = np.sum((pulsetimes!=0) | (trigtimes!=0))
-    
-    # clean up the rest of the events
-    if evt_counter > 0:
-        io.saveevents_npz(pulsetimes=pulsetimes, 
-                          pulseamps=pulseamps, 
-                          trigtimes=trigtimes, 
-                          trigamps=trigamps, 
-                          traces=evttraces, 
-                          trigtypes=trigtypes, 
+            # the filter definition is only calculated once, unless the sample rate changes
+            if filt is not None and filt.fs == fs:
+                pass
+            elif np.ndim(template) > 1:
+                filt = OptimumFiltBank(fs, template, noisepsd, tracelength, weights=weights, trigtemplate=trigtemplate, 
+                                       lgcoverlap=lgcoverlap, positivepulses=positivepulses)
+            else:
+                kernel = OptimumFiltKernel(fs, template, noisepsd, trigtemplate=trigtemplate)
+                filt = OptimumFilt(fs, None, None, tracelength, lgcoverlap=lgcoverlap, kernel=kernel)
+            filt.filtertraces(traces, times, trig=trig)
+            filt.eventtrigger(thresh, trigthresh=trigthresh, positivepulses=positivepulses)
+
+            numevts = len(filt.pulsetimes)
+            numadded = 0
+            lgcindexed = False
+
+            while numadded < numevts:
+                numadded += buffers[ibuf].add(filt, numadded)
+
+                if buffers[ibuf].nevts == maxevts:
+                    saves[ibuf] = writer.submit(buffers[ibuf].save, savepath, savename, dumpnum)
+
+                    # the index of this file is kept with the dump that receives the last of its events
+                    if numadded == numevts:
+                        liveintervals.append(filt.liveintervals)
+                        vetointervals.append(filt.vetointervals)
+                        lgcindexed = True
+
+                    lastdump = (dumpnum, liveintervals, vetointervals)
+                    if len(liveintervals) > 0:
+                        writer.submit(io.savelivetime,
+                                      np.concatenate(liveintervals), 
+                                      np.concatenate(vetointervals), 
+                                      savepath=savepath, 
+                                      savename=savename, 
+                                      dumpnum=dumpnum)
+                        liveintervals = []
+                        vetointervals = []
+
+                    dumpnum+=1
+
+                    # switch to the other buffer, once it has been saved
+                    ibuf = 1 - ibuf
+                    if saves[ibuf] is not None:
+                        saves[ibuf].result()
+                        saves[ibuf] = None
+                    buffers[ibuf].nevts = 0
+
+            if not lgcindexed:
+                liveintervals.append(filt.liveintervals)
+                vetointervals.append(filt.vetointervals)
+
+        # clean up the rest of the events
+        if buffers[ibuf].nevts > 0:
+            writer.submit(buffers[ibuf].save, savepath, savename, dumpnum)
+        elif len(liveintervals) > 0:
+            if lastdump is None:
+                # no events were found at all, an empty dump is saved such that the live time is kept
+                writer.submit(io.saveevents_npz, 
+                              traces=np.zeros((0, nchan, tracelength)), 
+                              trigtypes=np.zeros((0, 3), dtype=bool), 
+                              savepath=savepath, 
+                              savename=savename, 
+                              dumpnum=dumpnum)
+            else:
+                # the remaining files had no events, so their index is added to that of the last dump
+                dumpnum, lastlive, lastveto = lastdump
+                liveintervals = lastlive + liveintervals
+                vetointervals = lastveto + vetointervals
+
+        # save the live-time index of the remaining files, even if they had no events
+        if len(liveintervals) > 0:
+            writer.submit(io.savelivetime,
+                          np.concatenate(liveintervals), 
+                          np.concatenate(vetointervals), 
                           savepath=savepath, 
                           savename=savename, 
                           dumpnum=dumpnum)
+
+def _threshscan_file(args):
+    """
+    Helper function for finding the candidate events of a threshold scan in a single file, see 
+    `rqpy.process.threshold_scan`.
+    
+    Parameters
+    ----------
+    args : tuple
+        The file, template, noise PSD, trace length, lowest threshold, trigger template, lowest trigger 
+        threshold, pulse direction, IO type, and conversion factor to Amps.
+        
+    Returns
+    -------
+    scanpeaks : ndarray
+        The peak optimum amplitude (in units of the energy resolution) of each candidate event.
+    scantrigpeaks : ndarray, NoneType
+        The peak trigger channel amplitude of each candidate event.
+    livetime : float
+        The time (in s) that was searched for events.
+    
+    """
+    
+    f, template, noisepsd, tracelength, lowthresh, trigtemplate, lowtrigthresh, positivepulses, iotype, convtoamps = args
+
+    if iotype=="stanford":
+        traces, times, fs, trig = io.loadstanfordfile(f, convtoamps=convtoamps)
+        if trigtemplate is None:
+            trig = None
+    else:
+        raise ValueError("Unrecognized iotype inputted.")
+
+    filt = OptimumFilt(fs, template, noisepsd, tracelength, trigtemplate=trigtemplate)
+    filt.filtertraces(traces, times, trig=trig)
+    filt._scancandidates(lowthresh, lowtrigthresh=lowtrigthresh, positivepulses=positivepulses)
+
+    start, stop = filt._usablebins()
+    livetime = len(filt.filts) * (stop - start) / fs
+
+    return filt.scanpeaks, filt.scantrigpeaks, livetime
+
+
+def threshold_scan(filelist, template, noisepsd, tracelength, thresholds, trigtemplate=None,
+                   trigthresholds=None, positivepulses=True, iotype="stanford", convtoamps=1/1024, nprocess=1):
+    """
+    Function for calculating the event counts and rates of the continuous trigger on many different
+    files for a grid of thresholds. Each file is only filtered once, and the peak amplitudes of all
+    of the candidate events above the lowest threshold are used to calculate the number of events
+    for every threshold.
+    
+    Parameters
+    ----------
+    filelist : list of strings, rqpy.io.Dataset
+        List of files to be opened to run the threshold scan on (should be full paths), or
+        a `rqpy.io.Dataset` of the files (for which `channels`, `indstart`, `indstop`, and
+        `convtoamps` must be left as None).
+    template : ndarray
+        The pulse template to be used when creating the optimum filter (assumed to be normalized)
+    noisepsd : ndarray
+        The two-sided power spectral density in units of A^2/Hz
+    tracelength : int
+        The trace length (in bins) that would be saved when triggering on events.
+    thresholds : array_like
+        The thresholds, in number of standard deviations of the energy resolution, for which to
+        calculate the number of detected events.
+    trigtemplate : NoneType, ndarray, optional
+        The template for the trigger channel pulse. If left as None, then the trigger channel will not
+        be analyzed.
+    trigthresholds : NoneType, array_like, optional
+        The thresholds (in units of the trigger channel) for which to calculate the number of ttl
+        trigger events. If left as None, then only the pulses are analyzed.
+    positivepulses : boolean, optional
+        Boolean flag for which direction the pulses go in the traces. If they go in the positive direction, 
+        then this should be set to True. If they go in the negative direction, then this should be set to False.
+        Default is True.
+    iotype : string, optional
+        Type of file to open, uses a different IO function. Default is "stanford".
+            "stanford" : Use qetpy.io.loadstanfordfile to open the files
+    convtoamps : float, optional
+        Correction factor to convert the data to Amps. The traces are multiplied by this
+        factor, as is the TTL channel (if it exists). Default is 1/1024.
+    nprocess : int, optional
+        The number of processes to use to filter the files. Each process calculates the filter
+        definition once and reuses it for all of its files. Default is 1.
+
+    Returns
+    -------
+    scan : dict
+        Dictionary containing the results of the threshold scan. The keys are as follows.
+            'thresholds' : The inputted thresholds.
+            'trigthresholds' : The inputted trigger thresholds (None if not inputted).
+            'livetime' : The total time searched for events, in s.
+            'nevents' : The number of events detected for each threshold. Has shape
+                (number of thresholds,) or (number of thresholds, number of trigger thresholds).
+            'rates' : The corresponding event rate in Hz.
+            'npulseonly' : The number of events that only had a pulse trigger.
+            'nttlonly' : The number of events that only had a ttl trigger.
+            'nboth' : The number of events that had both a pulse and a ttl trigger.
+        If none of the files have candidate events, then the counts and rates are all zero.
+
+    Raises
+    ------
+    ValueError
+        If `filelist` is empty.
+
+    """
+
+    if isinstance(filelist, str):
+        filelist=[filelist]
+
+    filelist = _getfilelist(filelist, iotype)
+
+    if len(filelist) == 0:
+        raise ValueError("No files found in filelist, cannot run the threshold scan.")
+
+    lowtrigthresh = np.min(trigthresholds) if trigthresholds is not None else None
+
+    args = [(f, template, noisepsd, tracelength, np.min(thresholds), trigtemplate, lowtrigthresh, 
+             positivepulses, iotype, convtoamps) for f in filelist]
+
+    if nprocess == 1:
+        results = list(map(_threshscan_file, args))
+    else:
+        with multiprocessing.Pool(processes=int(nprocess)) as pool:
+            results = pool.map(_threshscan_file, args)
+
+    peaks = [res[0] for res in results]
+    trigpeaks = [res[1] for res in results if res[1] is not None]
+    livetime = sum(res[2] for res in results)
+
+    peaks = np.concatenate(peaks)
+    trigpeaks = np.concatenate(trigpeaks) if len(trigpeaks)>0 else None
+
+    return _threshscan_counts(peaks, trigpeaks, thresholds, trigthresholds, livetime)
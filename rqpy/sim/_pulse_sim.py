@@ -1,20 +1,15 @@
 import numpy as np
 import pandas as pd
 import os
+from copy import deepcopy
 from glob import glob
 from math import log10, floor
 from scipy import stats
 
-import deepdish as dd
 import rqpy as rp
 from rqpy import io
 from rqpy import HAS_RAWIO
 
-if HAS_RAWIO:
-    from rawio.IO import getDetectorSettings
-
-pd.io.pytables._tables()
-
 __all__ = ["PulseSim", "buildfakepulses"]
 
 
@@ -63,10 +58,16 @@ class PulseSim(object):
         be passed, where each ndarray corresponds to the taurises of the corresponding pulse.
         This will supersede the `templates` attribute if used. `taurises` must also be
         specified to use this.
+    index : NoneType, str, rqpy.io.EventIndex
+        The event index of the dataset (or the path to a saved index), which is used to only read
+        the traces in the cut, see `rqpy.io.EventIndex`.
+    cache : NoneType, rqpy.io.TraceCache
+        The cache of decompressed traces that is used when reading the traces in the cut, see
+        `rqpy.io.getrandevents`.
 
     """
 
-    def __init__(self, rq, basepath, filetype, templates, fs, cut=None):
+    def __init__(self, rq, basepath, filetype, templates, fs, cut=None, index=None, cache=None):
         """
         Initialization of the PulseSim class.
 
@@ -74,9 +75,10 @@ class PulseSim(object):
         ----------
         rq : pandas.DataFrame
             A pandas DataFrame object that contains all of the RQs for the dataset specified.
-        basepath : str
+        basepath : str, rqpy.io.Dataset
             The base path to the directory that contains the folders that the event dumps
-            are in. The folders in this directory should be the series numbers.
+            are in. The folders in this directory should be the series numbers. Alternatively,
+            a `rqpy.io.Dataset` of the dumps, whose index is then used if `index` is None.
         filetype : str
             The string that corresponds to the file type that will be opened. Supports two
             types: "mid.gz" and "npz". "mid.gz" is the default.
@@ -91,9 +93,21 @@ class PulseSim(object):
         cut : array_like of bool, NoneType, optional
             A boolean array for the cut that selects the traces that will be loaded from the dump
             files. These traces serve as the underlying data to which a template is added.
+        index : NoneType, str, rqpy.io.EventIndex, optional
+            The event index of the dataset (or the path to a saved index), which is used to only read
+            the traces in the cut, see `rqpy.io.EventIndex`. If left as None, then the dumps are searched
+            for in `basepath`.
+        cache : NoneType, rqpy.io.TraceCache, optional
+            A cache of decompressed traces to use when reading the traces in the cut, which can be shared
+            with other calls of `rqpy.io.getrandevents`. If left as None, then no cache is used.
 
         """
 
+        if isinstance(basepath, io.Dataset):
+            if index is None:
+                index = basepath.index
+            basepath = basepath.basepath
+
         self.rq = rq
         self.basepath = basepath
         self.fs = fs
@@ -103,6 +117,8 @@ class PulseSim(object):
 
         self.filetype = filetype
         self.cut = cut
+        self.index = index
+        self.cache = cache
 
         self.ntraces = self.cut.sum() if self.cut is not None else None
 
@@ -389,7 +405,7 @@ class PulseSim(object):
         val.append(sim_data)
 
     def run_sim(self, savefilepath, convtoamps=None, channel=None, det=None, 
-                relcal=None, neventsperdump=1000, basedumpnum=0):
+                relcal=None, neventsperdump=1000, basedumpnum=0, saveconvtoamps=None):
         """
         Method for running the pulse simulation after the data has been generated.
 
@@ -411,6 +427,10 @@ class PulseSim(object):
             The base value for the `dumpnum` variable. When saving dumps, the first dump
             will start with this value. Should be an integer of value zero or greater.
             Default is 0.
+        saveconvtoamps : NoneType, float, list of floats, optional
+            If filetype is "npz", the conversion factor from ADC bins to Amps to use when 
+            saving the simulated traces as integer ADC bins. If left as None, then the 
+            simulated traces are saved as floats.
 
         """
 
@@ -439,12 +459,16 @@ class PulseSim(object):
             lgcsavefile=True,
             savefilepath=savefilepath,
             basedumpnum=basedumpnum,
+            index=self.index,
+            saveconvtoamps=saveconvtoamps,
+            cache=self.cache,
         )
 
 
 def buildfakepulses(rq, cut, templates, amplitudes, tdelay, basepath, taurises=None, taufalls=None,
                     channels="PDS1", det="Z1", relcal=None, convtoamps=1, fs=625e3, neventsperdump=1000,
-                    basedumpnum=0, filetype="mid.gz", lgcsavefile=False, savefilepath=None):
+                    basedumpnum=0, filetype="mid.gz", lgcsavefile=False, savefilepath=None, index=None,
+                    saveconvtoamps=None, cache=None):
     """
     Function for building fake pulses by adding a template, scaled to certain amplitudes and
     certain time delays, to an existing trace (typically a random).
@@ -472,9 +496,10 @@ def buildfakepulses(rq, cut, templates, amplitudes, tdelay, basepath, taurises=N
         Bin interpolation is implemented for values that are not a multiple the reciprocal of
         the digitization rate. A list of ndarray can be passed, where each ndarray corresponds to
         the tdelays of the corresponding template in the list of templates.
-    basepath : str
+    basepath : str, rqpy.io.Dataset
         The base path to the directory that contains the folders that the event dumps
-        are in. The folders in this directory should be the series numbers.
+        are in. The folders in this directory should be the series numbers. Alternatively,
+        a `rqpy.io.Dataset` of the dumps, whose index is then used if `index` is None.
     channels : str, list of str, optional
         A list of strings that contains all of the channels that should be loaded. Only used if
         filetype=='mid.gz'.
@@ -504,6 +529,17 @@ def buildfakepulses(rq, cut, templates, amplitudes, tdelay, basepath, taurises=N
         A boolean flag for whether or not to save the fake data to a file.
     savefilepath : str, optional
         The string that corresponds to the file path where the data will be saved.
+    index : NoneType, str, rqpy.io.EventIndex, optional
+        The event index of the dataset (or the path to a saved index), which is used to only read
+        the traces in the cut, see `rqpy.io.EventIndex`. If left as None, then the dumps are searched
+        for in `basepath`.
+    saveconvtoamps : NoneType, float, list of floats, optional
+        If filetype is "npz", the conversion factor (for each channel) from ADC bins to Amps to use
+        when saving the fake pulses, such that they are stored as integer ADC bins, see
+        `rqpy.io.saveevents_npz`. If left as None, then the fake pulses are saved as floats.
+    cache : NoneType, rqpy.io.TraceCache, optional
+        A cache of decompressed traces to use when reading the traces in the cut, which can be shared
+        with other calls of `rqpy.io.getrandevents`. If left as None, then no cache is used.
 
     Returns
     -------
@@ -535,6 +571,14 @@ def buildfakepulses(rq, cut, templates, amplitudes, tdelay, basepath, taurises=N
     if isinstance(taufalls, np.ndarray):
         taufalls = [taufalls]
 
+    if isinstance(index, str):
+        index = io.EventIndex.load(index)
+
+    if isinstance(basepath, io.Dataset):
+        if index is None:
+            index = basepath.index
+        basepath = basepath.basepath
+
     if not len(tdelay) == len(amplitudes) == len(templates):
         raise ValueError(
             "The lists of tdelay, amplitudes, and templates must have the "
@@ -578,64 +622,72 @@ def buildfakepulses(rq, cut, templates, amplitudes, tdelay, basepath, taurises=N
     if last_dump_ind is not None:
         split_inds.append(indices[last_dump_ind:])
 
-    for ii, c in enumerate(split_inds):
-        cut_seg = np.zeros(cutlen, dtype=bool)
-        cut_seg[nonzerocutinds[c]] = True
+    # the dumps are saved in the background while the next dump is built
+    with io.AsyncWriter() as writer:
+        for ii, c in enumerate(split_inds):
+            cut_seg = np.zeros(cutlen, dtype=bool)
+            cut_seg[nonzerocutinds[c]] = True
 
-        split_amplitudes = [a[c] for a in amplitudes]
-        split_tdelay = [t[c] for t in tdelay]
+            split_amplitudes = [a[c] for a in amplitudes]
+            split_tdelay = [t[c] for t in tdelay]
 
-        if taurises is not None and taufalls is not None:
-            split_taurises = [tr[c] for tr in taurises]
-            split_taufalls = [tf[c] for tf in taufalls]
-        else:
-            split_taurises = None
-            split_taufalls = None
-
-        _buildfakepulses_seg(
-            rq,
-            cut_seg,
-            templates,
-            split_amplitudes,
-            split_tdelay,
-            basepath,
-            taurises=split_taurises,
-            taufalls=split_taufalls,
-            channels=channels,
-            relcal=relcal,
-            det=det,
-            convtoamps=convtoamps,
-            fs=fs,
-            dumpnum=ii + 1 + basedumpnum,
-            filetype=filetype,
-            lgcsavefile=lgcsavefile,
-            savefilepath=savefilepath,
-        )
+            if taurises is not None and taufalls is not None:
+                split_taurises = [tr[c] for tr in taurises]
+                split_taufalls = [tf[c] for tf in taufalls]
+            else:
+                split_taurises = None
+                split_taufalls = None
+
+            _buildfakepulses_seg(
+                rq,
+                cut_seg,
+                templates,
+                split_amplitudes,
+                split_tdelay,
+                basepath,
+                taurises=split_taurises,
+                taufalls=split_taufalls,
+                channels=channels,
+                relcal=relcal,
+                det=det,
+                convtoamps=convtoamps,
+                fs=fs,
+                dumpnum=ii + 1 + basedumpnum,
+                filetype=filetype,
+                lgcsavefile=lgcsavefile,
+                savefilepath=savefilepath,
+                index=index,
+                saveconvtoamps=saveconvtoamps,
+                writer=writer,
+                cache=cache,
+            )
 
-    if lgcsavefile:
-        _save_truth_info(
-            savefilepath,
-            basepath=basepath,
-            basedumpnum=basedumpnum,
-            seriesnumber=rq.seriesnumber[cut],
-            eventnumber=rq.eventnumber[cut],
-            templates=templates,
-            amplitudes=amplitudes,
-            tdelay=tdelay,
-            taurises=taurises,
-            taufalls=taufalls,
-            channels=channels,
-            relcal=relcal,
-            det=det,
-            convtoamps=convtoamps,
-            fs=fs,
-            filetype=filetype,
-        )
+        if lgcsavefile:
+            writer.submit(
+                _save_truth_info,
+                savefilepath,
+                basepath=basepath,
+                basedumpnum=basedumpnum,
+                seriesnumber=rq.seriesnumber[cut],
+                eventnumber=rq.eventnumber[cut],
+                templates=templates,
+                amplitudes=amplitudes,
+                tdelay=tdelay,
+                taurises=taurises,
+                taufalls=taufalls,
+                channels=channels,
+                relcal=relcal,
+                det=det,
+                convtoamps=convtoamps,
+                fs=fs,
+                filetype=filetype,
+            )
 
 
 def _buildfakepulses_seg(rq, cut, templates, amplitudes, tdelay, basepath, taurises=None, taufalls=None,
                          channels="PDS1", relcal=None, det="Z1", convtoamps=1, fs=625e3, dumpnum=1,
-                         filetype="mid.gz", lgcsavefile=False, savefilepath=None):
+                         filetype="mid.gz", lgcsavefile=False, savefilepath=None, index=None,
+                         saveconvtoamps=None, writer=None, cache=None):
     """
     Hidden helper function for building fake pulses.
 
@@ -692,6 +744,16 @@ def _buildfakepulses_seg(rq, cut, templates, amplitudes, tdelay, basepath, tauri
         A boolean flag for whether or not to save the fake data to a file.
     savefilepath : str, optional
         The string that corresponds to the file path that will be saved.
+    index : NoneType, str, rqpy.io.EventIndex, optional
+        The event index of the dataset, see `rqpy.io.getrandevents`.
+    saveconvtoamps : NoneType, float, list of floats, optional
+        The conversion factor to use when saving the fake pulses as ADC bins, see
+        `rqpy.sim.buildfakepulses`.
+    writer : NoneType, rqpy.io.AsyncWriter, optional
+        The writer to save the fake data with in the background. If left as None, then the
+        fake data is saved before returning.
+    cache : NoneType, rqpy.io.TraceCache, optional
+        The cache of decompressed traces, see `rqpy.io.getrandevents`.
 
     Returns
     -------
@@ -713,6 +775,8 @@ def _buildfakepulses_seg(rq, cut, templates, amplitudes, tdelay, basepath, tauri
         fs=fs,
         ntraces=ntraces,
         filetype=filetype,
+        index=index,
+        cache=cache,
     )
 
     nchan = traces.shape[1]
@@ -745,6 +809,9 @@ def _buildfakepulses_seg(rq, cut, templates, amplitudes, tdelay, basepath, tauri
                 fakepulses[ii, jj] = newtrace/(relcal[jj]*nchan)
 
     if lgcsavefile:
+        # without a writer, the fake data is saved before returning
+        submit = writer.submit if writer is not None else lambda func, **kwargs: func(**kwargs)
+
         if filetype=='npz':
             savefilename = f"{seriesnumber:010}"
             savefilename = savefilename[:6] + '_' + savefilename[6:]
@@ -754,7 +821,15 @@ def _buildfakepulses_seg(rq, cut, templates, amplitudes, tdelay, basepath, tauri
             truthtdelay = np.stack(tdelay, axis=1)
             trigtypes = np.zeros((ntraces, 3), dtype=bool)
 
-            io.saveevents_npz(
+            adcdtype = "int16"
+            if saveconvtoamps is not None:
+                # the fake pulses are not limited to the range of the ADC
+                adcmax = np.max(np.abs(fakepulses), axis=(0, -1)) / np.abs(saveconvtoamps)
+                if np.any(adcmax >= np.iinfo(np.int16).max):
+                    adcdtype = "int32"
+
+            submit(
+                io.saveevents_npz,
                 traces=fakepulses,
                 trigtypes=trigtypes,
                 truthamps=truthamps,
@@ -762,6 +837,8 @@ def _buildfakepulses_seg(rq, cut, templates, amplitudes, tdelay, basepath, tauri
                 savepath=savefilepath,
                 savename=savefilename,
                 dumpnum=dumpnum,
+                convtoamps=saveconvtoamps,
+                adcdtype=adcdtype,
             )
 
         elif filetype=="mid.gz":
@@ -774,9 +851,10 @@ def _buildfakepulses_seg(rq, cut, templates, amplitudes, tdelay, basepath, tauri
             else:
                 snum_str = seriesnumber
 
-            full_settings_dict = getDetectorSettings(f"{basepath}{snum_str}", "")
+            full_settings_dict = io.get_detector_settings(f"{basepath}{snum_str}")
 
-            settings_dict = {d: full_settings_dict[d] for d in det}
+            # copy the settings, as the cached settings should not be modified
+            settings_dict = {d: deepcopy(full_settings_dict[d]) for d in det}
 
             for ch, d in zip(channels, det):
                 settings_dict[d]["detectorType"] = 710
@@ -795,7 +873,8 @@ def _buildfakepulses_seg(rq, cut, templates, amplitudes, tdelay, basepath, tauri
                 dumpnum,
             )
 
-            io.saveevents_midgz(
+            submit(
+                io.saveevents_midgz,
                 events=events_list,
                 settings=settings_dict,
                 savepath=savefilepath,
@@ -852,6 +931,10 @@ def _save_truth_info(savefilepath, **kwargs):
         savefilename = savefilename[:8] + '_' + savefilename[8:]
 
     basedumpnum = kwargs['basedumpnum']
+    # pytables is initialized through pandas before deepdish, which is only imported when it is needed
+    pd.io.pytables._tables()
+    import deepdish as dd
+
     dd.io.save(f"{savefilepath}{savefilename}_truth_info_{basedumpnum:04d}.h5", kwargs)
 
 
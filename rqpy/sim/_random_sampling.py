@@ -1,8 +1,6 @@
 import numpy as np
 from scipy import integrate, interpolate
 import types
-from sklearn.neighbors import KernelDensity
-from sklearn.model_selection import GridSearchCV
 
 
 __all__ = [
@@ -83,6 +81,10 @@ def _sample_from_kde(data, xrange, kernel, bw_method, bandwidths, cv, npoints, p
 
     ndata = len(data)
 
+    # scikit-learn is slow to import, so it is only imported when it is needed
+    from sklearn.neighbors import KernelDensity
+    from sklearn.model_selection import GridSearchCV
+
     if bw_method == 'scott':
         bandwidth = ndata**(-1 / 5) * np.std(data, ddof=1)
     elif bw_method == 'silverman':
@@ -107,6 +109,8 @@ def _sample_from_kde(data, xrange, kernel, bw_method, bandwidths, cv, npoints, p
     cdf /= cdf[-1]
 
     if plot_pdf:
+        import matplotlib.pyplot as plt
+
         fig, ax = plt.subplots(figsize=(10, 6))
         ax.plot(x_interp, pdf, color='k', label='Estimated PDF')
         ax.hist(
@@ -142,6 +146,8 @@ def _sample_from_hist(data, xrange, nbins, plot_pdf):
     hist, bin_edges = np.histogram(data, bins=nbins, density=True, range=xrange)
 
     if plot_pdf:
+        import matplotlib.pyplot as plt
+
         fig, ax = plt.subplots(figsize=(10, 6))
         ax.hist(
             data,
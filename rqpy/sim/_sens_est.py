@@ -3,7 +3,6 @@ import matplotlib.pyplot as plt
 from scipy import stats, special
 
 import rqpy as rp
-import mendeleev
 
 
 __all__ = [
@@ -38,7 +37,7 @@ def calculate_substrate_mass(vol, tm):
 
     conv_factor = rp.constants.centi**3 * rp.constants.kilo
     # density in kg/m^3
-    rho = mendeleev.element(tm).density / conv_factor
+    rho = rp.limit.get_target_material(tm).density / conv_factor
     mass = rho * vol
 
     return mass
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from rqpy.io import (ADCTraces, saveevents_npz, saveevents_rqd, get_traces_npz, get_traces_rqd,
+                     load_h5_dump)
+from rqpy.io._save import _write_h5
+
+
+_CONVTOAMPS = np.array([1/1024, 3/1024])
+
+
+def _traces(seed=1):
+    """Helper function for making traces that are exactly representable as int16 ADC bins."""
+
+    rng = np.random.default_rng(seed)
+    adc = rng.integers(-2**15, 2**15, size=(20, 2, 64))
+
+    return adc * _CONVTOAMPS[:, np.newaxis]
+
+
+def _save(filetype, path, traces):
+    """Helper function for saving the traces as int16 ADC bins to each file type."""
+
+    savepath = str(path) + "/"
+    savename = "123456_7890"
+
+    if filetype == "npz":
+        saveevents_npz(traces=traces, trigtypes=np.zeros((len(traces), 3), dtype=bool), savepath=savepath,
+                       savename=savename, dumpnum=1, convtoamps=_CONVTOAMPS, adcdtype="int16")
+        return f"{savepath}{savename}_0001.npz"
+
+    if filetype == "rqd":
+        saveevents_rqd(traces=traces, trigtypes=np.zeros((len(traces), 3), dtype=bool), savepath=savepath,
+                       savename=savename, dumpnum=1, convtoamps=_CONVTOAMPS, adcdtype="int16")
+        return f"{savepath}{savename}_0001.rqd"
+
+    # the same layout as saved by `rqpy.io.convert_midgz_to_h5` with adcdtype="int16"
+    filename = f"{savepath}{savename}_0001.h5"
+    _write_h5(filename, {"traces" : np.rint(traces / _CONVTOAMPS[:, np.newaxis]).astype(np.int16),
+                         "convtoamps" : _CONVTOAMPS,
+                         "eventnumber" : np.arange(len(traces))})
+    return filename
+
+
+def _load(filetype, filename, **kwargs):
+    """Helper function for loading the traces of each file type."""
+
+    if filetype == "npz":
+        return get_traces_npz([filename], **kwargs)[0]
+    if filetype == "rqd":
+        return get_traces_rqd(filename, **kwargs)[0]
+    return load_h5_dump(filename, lgcskip_empty=False, **kwargs)
+
+
+@pytest.mark.parametrize("filetype", ["npz", "rqd", "h5"])
+def test_adc_round_trip(filetype, tmp_path):
+    traces = _traces()
+    filename = _save(filetype, tmp_path, traces)
+
+    loaded = _load(filetype, filename)
+
+    # the traces are returned as an array in Amps by default
+    assert isinstance(loaded, np.ndarray)
+    assert loaded.dtype == np.float64
+    assert np.array_equal(loaded, traces)
+    assert np.array_equal(loaded * 2 - 1, traces * 2 - 1)
+    assert np.array_equal(loaded.mean(axis=0), traces.mean(axis=0))
+
+    loaded32 = _load(filetype, filename, dtype=np.float32)
+
+    assert isinstance(loaded32, np.ndarray)
+    assert loaded32.dtype == np.float32
+    assert np.allclose(loaded32, traces)
+
+    lazy = _load(filetype, filename, lgcadc=True)
+
+    assert isinstance(lazy, ADCTraces)
+    assert lazy.adc.dtype == np.int16
+    assert np.array_equal(lazy[3:7, 1], traces[3:7, 1])
+    assert np.array_equal(np.asarray(lazy), traces)
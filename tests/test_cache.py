@@ -0,0 +1,86 @@
+import numpy as np
+
+from rqpy.io import TraceCache, ADCTraces
+
+
+def _block(value, nbytes=800):
+    """Helper function for making a block of float64 traces with the specified number of bytes."""
+
+    return np.full((nbytes // 80, 1, 10), float(value))
+
+
+def test_hits_and_misses():
+    cache = TraceCache(maxbytes=10000)
+    loads = []
+
+    def loader(value):
+        loads.append(value)
+        return _block(value)
+
+    first = cache.get("a", lambda: loader(1))
+    second = cache.get("a", lambda: loader(2))
+    cache.get("b", lambda: loader(3))
+
+    assert second is first
+    assert loads == [1, 3]
+    assert cache.hits == 1
+    assert cache.misses == 2
+    assert cache.stats["hitrate"] == 1 / 3
+    assert cache.stats["nblocks"] == 2
+    assert cache.nbytes == 1600
+    assert "a" in cache and "c" not in cache
+
+
+def test_least_recently_used_block_is_evicted_at_maxbytes():
+    cache = TraceCache(maxbytes=2000)
+
+    cache.put("a", _block(1))
+    cache.put("b", _block(2))
+    # "a" is used, so "b" is the least recently used block
+    cache.get("a", lambda: None)
+    cache.put("c", _block(3))
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.evictions == 1
+    assert cache.nbytes == 1600
+    assert len(cache) == 2
+
+    # blocks larger than the limit are not cached at all
+    cache.put("d", _block(4, nbytes=4000))
+
+    assert "d" not in cache
+    assert cache.nbytes == 1600
+
+
+def test_evicted_blocks_are_spilled(tmp_path):
+    cache = TraceCache(maxbytes=1000, scratchpath=str(tmp_path), maxspillbytes=1600)
+
+    adc = ADCTraces(np.arange(320, dtype=np.int16).reshape(8, 1, 40), [0.5])
+    cache.put("adc", adc)
+    cache.put("a", _block(1))
+
+    # the ADC block was spilled with its conversion factors
+    assert cache.stats["nspilled"] == 1
+    assert cache.nbytes == 800
+
+    spilled = cache.get("adc", lambda: None)
+
+    assert cache.spillhits == 1
+    assert isinstance(spilled, ADCTraces)
+    assert isinstance(spilled.adc, np.memmap)
+    assert np.array_equal(spilled[...], adc[...])
+
+    cache.put("b", _block(2))
+    cache.put("c", _block(3))
+
+    # "a" and "b" were spilled, past which the least recently used spilled block is deleted
+    assert cache.stats["nspilled"] == 2
+    assert cache.stats["spillbytes"] <= 1600
+    assert "adc" not in cache
+    assert np.array_equal(cache.get("a", lambda: None), _block(1))
+
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.stats["spillbytes"] == 0
+    assert cache.hits == 0
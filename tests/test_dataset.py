@@ -0,0 +1,52 @@
+import numpy as np
+
+from rqpy.io import Dataset, saveevents_npz
+
+
+def _dumps(path, nevents=(7, 5, 9)):
+    """Helper function for saving npz dumps with the specified numbers of events."""
+
+    rng = np.random.default_rng(1)
+    savepath = str(path) + "/"
+    files = []
+
+    for ii, nevts in enumerate(nevents):
+        saveevents_npz(traces=rng.normal(size=(nevts, 2, 16)), trigtypes=np.zeros((nevts, 3), dtype=bool),
+                       savepath=savepath, savename="123456_7890", dumpnum=ii + 1)
+        files.append(f"{savepath}123456_7890_{ii + 1:04d}.npz")
+
+    return files
+
+
+def test_iter_chunks_matches_read(tmp_path):
+    files = _dumps(tmp_path)
+
+    traces, info_dict = Dataset(files, filetype="npz").read(slice(None))
+
+    dataset = Dataset(files, filetype="npz", channels=[1], indstart=2, indstop=10)
+    chunks = list(dataset.iter_chunks(4, lgcreturndict=True))
+
+    assert [len(chunk[0]) for chunk in chunks] == [4, 4, 4, 4, 4, 1]
+    assert np.array_equal(np.concatenate([chunk[0] for chunk in chunks]), traces[:, [1], 2:10])
+    for key in info_dict:
+        assert np.array_equal(np.concatenate([chunk[1][key] for chunk in chunks]), info_dict[key])
+
+    assert list(dataset.nevents) == [7, 5, 9]
+
+
+def test_iter_chunks_counts_dumps_as_they_are_read(tmp_path):
+    files = _dumps(tmp_path)
+    dataset = Dataset(files, filetype="npz")
+
+    counted = []
+    count = dataset._count
+    dataset._count = lambda file: counted.append(file) or count(file)
+
+    chunks = dataset.iter_chunks(4)
+    next(chunks)
+
+    assert counted == files[:1]
+
+    list(chunks)
+
+    assert counted == files
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from rqpy.limit import gauss_smear
+
+
+def _spectra():
+    """Helper function for making a few nonnegative spectra on an unevenly spaced grid."""
+
+    x = np.sort(np.random.default_rng(1).uniform(0, 10, size=300))
+    f = np.stack([np.exp(-x / scale) for scale in [0.5, 2, 5]])
+    f[2, x > 7] = 0
+
+    return x, f
+
+
+def test_gauss_smear_direct_matches_fft():
+    x, f = _spectra()
+
+    # wide enough that "auto" uses the FFT convolution
+    direct = gauss_smear(x, f[0], 0.2, nres=1e4, method="direct")
+    fft = gauss_smear(x, f[0], 0.2, nres=1e4, method="fft")
+    auto = gauss_smear(x, f[0], 0.2, nres=1e4, method="auto")
+
+    assert np.allclose(direct, fft, rtol=0, atol=1e-10 * direct.max())
+    assert np.allclose(auto, fft, rtol=0, atol=1e-10 * direct.max())
+
+
+@pytest.mark.parametrize("method", ["direct", "fft"])
+def test_gauss_smear_2d_matches_rows(method):
+    x, f = _spectra()
+
+    smeared = gauss_smear(x, f, 0.2, nres=1e4, method=method)
+
+    assert smeared.shape == f.shape
+    for row, frow in zip(smeared, f):
+        assert np.allclose(row, gauss_smear(x, frow, 0.2, nres=1e4, method=method), rtol=1e-12, atol=0)
+
+
+def test_gauss_smear_constant_callable_res_matches_scalar():
+    x, f = _spectra()
+
+    expected = gauss_smear(x, f, 0.2, nres=1e4)
+
+    assert np.allclose(gauss_smear(x, f, lambda e: np.full(np.shape(e), 0.2), nres=1e4), expected)
+    assert np.allclose(gauss_smear(x, f, np.full(x.shape, 0.2), nres=1e4), expected)
+
+
+def test_gauss_smear_bad_method():
+    x, f = _spectra()
+
+    with pytest.raises(ValueError):
+        gauss_smear(x, f, 0.2, method="bad")
@@ -0,0 +1,33 @@
+import json
+import subprocess
+import sys
+
+
+# the dependencies that should only be imported when the functions that use them are called, this
+# does not include matplotlib, iminuit, and pyarrow, which are imported by qetpy and pandas themselves
+_HEAVY_MODULES = [
+    "seaborn",
+    "sklearn",
+    "skimage",
+    "lmfit",
+    "mendeleev",
+    "deepdish",
+    "tables",
+]
+
+
+def test_import_is_lazy():
+    code = (
+        "import json, sys\n"
+        "import rqpy\n"
+        "import rqpy.io\n"
+        "import rqpy.process\n"
+        "import rqpy.sim\n"
+        f"print(json.dumps([name for name in {_HEAVY_MODULES!r} if name in sys.modules]))\n"
+    )
+
+    output = subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.PIPE)
+
+    imported = json.loads(output.stdout.decode().strip().splitlines()[-1])
+
+    assert imported == []
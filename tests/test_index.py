@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+import pytest
+
+from rqpy.io import EventIndex, TraceCache, saveevents_npz, get_traces_npz
+
+
+_DUMPS = [("123456_7890", 1, 6), ("123456_7890", 12, 4), ("123456_7891", 1, 5), ("123456_7891", 2, 7)]
+
+
+def _dataset(path):
+    """
+    Helper function for saving npz dumps of two series, where the last dump is compressed. Returns the
+    path of each dump.
+
+    """
+
+    rng = np.random.default_rng(1)
+    files = []
+
+    for series, dumpnum, nevts in _DUMPS:
+        savepath = os.path.join(str(path), series, "")
+        os.makedirs(savepath, exist_ok=True)
+
+        traces = rng.normal(size=(nevts, 2, 32))
+        trigtypes = np.zeros((nevts, 3), dtype=bool)
+        saveevents_npz(traces=traces, trigtypes=trigtypes, savepath=savepath, savename=series, dumpnum=dumpnum)
+
+        filename = f"{savepath}{series}_{dumpnum:04d}.npz"
+
+        if dumpnum == 2:
+            with np.load(filename) as data:
+                arrays = {key: data[key] for key in data.files}
+            np.savez_compressed(filename, **arrays)
+
+        files.append(filename)
+
+    return files
+
+
+def _events():
+    """Helper function for the series and event numbers of scattered events, in no particular order."""
+
+    seriesnumbers = np.array([1234567891, 1234567890, 1234567890, 1234567891, 1234567890, 1234567891])
+    eventnumbers = np.array([20007, 120004, 10001, 10003, 10006, 20001])
+
+    return seriesnumbers, eventnumbers
+
+
+def _expected(files, seriesnumbers, eventnumbers):
+    """Helper function for reading the events by slicing the full dumps."""
+
+    traces = []
+
+    for snum, evtnum in zip(seriesnumbers, eventnumbers):
+        series = f"{snum:010}"
+        series = series[:6] + "_" + series[6:]
+        file = [f for f in files if f.endswith(f"{series}_{evtnum // 10000:04d}.npz")][0]
+        traces.append(get_traces_npz([file])[0][evtnum % 10000 - 1])
+
+    return np.stack(traces)
+
+
+def _check(index, files):
+    seriesnumbers, eventnumbers = _events()
+    expected = _expected(files, seriesnumbers, eventnumbers)
+
+    assert np.array_equal(index.read(seriesnumbers, eventnumbers), expected)
+
+    cache = TraceCache()
+    for _ in range(2):
+        assert np.array_equal(index.read(seriesnumbers, eventnumbers, cache=cache), expected)
+
+    # only the compressed dump is cached, and it is only decompressed once
+    assert cache.misses == 1
+    assert cache.hits == 1
+
+    locfiles, offsets, recordsize = index.locate(seriesnumbers, eventnumbers)
+
+    for file, offset, size, trace in zip(locfiles, offsets, recordsize, expected):
+        if file.endswith("_0002.npz"):
+            assert offset == -1
+            continue
+
+        with open(file, "rb") as f:
+            f.seek(offset)
+            assert np.array_equal(np.frombuffer(f.read(size), dtype=float).reshape(trace.shape), trace)
+
+    assert index.getfiles(seriesnumbers[:2], eventnumbers[:2]) == sorted([files[3], files[1]])
+
+
+def test_event_index_build_read_and_locate(tmp_path):
+    files = _dataset(tmp_path)
+    index = EventIndex.build(str(tmp_path), filetype="npz")
+
+    assert len(index) == 4
+    assert list(index.files) == sorted(files)
+    assert list(index.nevents) == [nevts for _, _, nevts in _DUMPS]
+    assert list(index.dataoffset >= 0) == [True, True, True, False]
+
+    _check(index, files)
+
+
+def test_event_index_save_and_load(tmp_path):
+    files = _dataset(tmp_path)
+    index = EventIndex.build(files, filetype="npz")
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+
+    loaded = EventIndex.load(path)
+
+    assert loaded.filetype == "npz"
+    for attr in ["files", "seriesnumber", "dumpnumber", "nevents", "dataoffset", "recordsize", "traceshape",
+                 "dtype"]:
+        assert np.array_equal(getattr(loaded, attr), getattr(index, attr)), attr
+
+    _check(loaded, files)
+
+
+def test_event_index_keys(tmp_path):
+    files = _dataset(tmp_path)
+    index = EventIndex.build(files, filetype="npz")
+
+    # the series number and dump number are packed into one key for each dump
+    assert np.array_equal(index._keys, index.seriesnumber * 100000 + index.dumpnumber)
+    assert list(index.dumpnumber) == [1, 12, 1, 2]
+
+    # dump 12 of the first series must not be confused with any dump of the second series
+    rows, evtinds = index._lookup([1234567890, 1234567891], [120001, 10001])
+
+    assert list(rows) == [1, 2]
+    assert list(evtinds) == [0, 0]
+
+    with pytest.raises(KeyError):
+        index._lookup([1234567890], [30001])
+
+    with pytest.raises(KeyError):
+        index._lookup([1234567891], [10006])
+
+    with pytest.raises(IOError):
+        EventIndex.build(files + files[:1], filetype="npz")
@@ -0,0 +1,83 @@
+import numpy as np
+import deepdish as dd
+import pytest
+
+from rqpy.io import load_h5_dump
+from rqpy.io._save import _write_h5
+
+
+def _dump(seed=1):
+    """Helper function for making a small dump, where some events have a channel that is all zeros."""
+
+    rng = np.random.default_rng(seed)
+
+    nevents = 40
+    traces = rng.normal(size=(nevents, 3, 16))
+    traces[2, 1] = 0
+    traces[7, 0] = 0
+    traces[30, 2] = 0
+
+    info = {
+        "traces" : traces,
+        "eventnumber" : np.arange(nevents),
+        "pulseamps" : rng.normal(size=nevents),
+    }
+
+    return info
+
+
+def _reference(info, evtinds, channels, lgcskip_empty):
+    """Helper function for loading the full dump and then cutting it, as the loader did originally."""
+
+    inds = np.arange(len(info["traces"]))
+    if evtinds is not None:
+        inds = inds[evtinds]
+
+    traces = info["traces"][inds]
+    info_dict = {key: val[inds] for key, val in info.items() if key != "traces"}
+
+    if lgcskip_empty:
+        cut = ~np.any(np.all(traces == 0, axis=-1), axis=-1)
+        traces = traces[cut]
+        info_dict = {key: val[cut] for key, val in info_dict.items()}
+
+    if channels is not None:
+        traces = traces[:, channels]
+
+    return traces, info_dict
+
+
+@pytest.fixture(params=["deepdish", "write_h5"])
+def h5file(request, tmp_path):
+    info = _dump()
+    path = str(tmp_path / "dump.h5")
+
+    if request.param == "deepdish":
+        dd.io.save(path, info)
+    else:
+        # saved with the flag for each event being empty, as done by `rqpy.io.convert_midgz_to_h5`
+        arrays = dict(info, lgcempty=np.any(np.all(info["traces"] == 0, axis=-1), axis=-1))
+        _write_h5(path, arrays, chunkevents=4)
+
+    return path, info
+
+
+mask = np.zeros(40, dtype=bool)
+mask[[1, 2, 7, 20, 39]] = True
+
+
+@pytest.mark.parametrize("evtinds", [None, [30, 2, 5, 30], [-1, -10, 3], mask, slice(5, 35, 3)])
+@pytest.mark.parametrize("channels", [None, [2, 0]])
+@pytest.mark.parametrize("chunksize", [1, 1000])
+@pytest.mark.parametrize("lgcskip_empty", [True, False])
+def test_load_h5_dump_selection(h5file, evtinds, channels, chunksize, lgcskip_empty):
+    path, info = h5file
+
+    traces, info_dict = load_h5_dump(path, lgcskip_empty=lgcskip_empty, lgcreturndict=True,
+                                     channels=channels, evtinds=evtinds, chunksize=chunksize)
+    expected_traces, expected_dict = _reference(info, evtinds, channels, lgcskip_empty)
+
+    assert np.array_equal(np.asarray(traces), expected_traces)
+    assert sorted(info_dict) == sorted(expected_dict)
+    for key in expected_dict:
+        assert np.array_equal(info_dict[key], expected_dict[key])
@@ -0,0 +1,46 @@
+import numpy as np
+
+from rqpy.process import OptimumFilt, OnlineTrigger
+
+
+def _stream(seed=1):
+    """Helper function for simulating a noisy stream with pulses that are longer than the chunks."""
+
+    rng = np.random.default_rng(seed)
+
+    fs = 1e5
+    nbins = 400
+    template = np.zeros(nbins)
+    template[nbins//2:] = np.exp(-np.arange(nbins//2) / 40)
+    noisepsd = np.ones(nbins) * 2e-9
+
+    x = rng.normal(size=(1, 100000)) * np.sqrt(1e-9 * fs / 2)
+    for ind in rng.choice(np.arange(1000, x.shape[-1] - 2000), 80, replace=False):
+        x[:, ind:ind + nbins//2] += rng.uniform(0.05, 2) * np.exp(-np.arange(nbins//2) / 40)
+
+    return fs, template, noisepsd, x
+
+
+def test_online_trigger_matches_whole_stream():
+    fs, template, noisepsd, x = _stream()
+    tracelength = 1000
+    thresh = 3
+
+    filt = OptimumFilt(fs, template, noisepsd, tracelength)
+    filt.filtertraces(x[np.newaxis], np.zeros(1))
+    filt.eventtrigger(thresh)
+    expected = np.asarray(filt.pulsetimes)
+
+    assert len(expected) > 0
+
+    # chunks much shorter than the pulses, and longer than them
+    for chunksize in [7, filt.pulse_range - 1, 100, 10000]:
+        events = []
+        trigger = OnlineTrigger(fs, template, noisepsd, tracelength, thresh, callback=events.append)
+        trigger.run(x[:, ind:ind + chunksize] for ind in range(0, x.shape[-1], chunksize))
+
+        pulsetimes = np.asarray([evt["pulsetime"] for evt in events])
+
+        assert len(pulsetimes) == len(expected), chunksize
+        assert np.allclose(pulsetimes, expected), chunksize
+        assert all(np.allclose(evt["trace"], filt.evttraces[ii]) for ii, evt in enumerate(events)), chunksize
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from rqpy.io import saveevents_npz, saveevents_rqd, convert_to_rqd, get_traces_npz, get_traces_rqd, load_rqd
+from rqpy.io._rqd import _write_rqd
+
+
+def _events(seed=1, nevts=12):
+    """Helper function for making the arrays of a dump of events."""
+
+    rng = np.random.default_rng(seed)
+
+    return dict(
+        pulsetimes=rng.uniform(size=nevts),
+        pulseamps=rng.normal(size=nevts),
+        trigtimes=rng.uniform(size=nevts),
+        trigamps=rng.normal(size=nevts),
+        traces=rng.integers(-1000, 1000, size=(nevts, 2, 50)) / 1024,
+        trigtypes=rng.uniform(size=(nevts, 3)) > 0.5,
+        truthamps=rng.normal(size=(nevts, 2)),
+        truthtdelay=rng.normal(size=(nevts, 2)),
+    )
+
+
+def _assert_dicts_equal(d1, d2):
+    assert sorted(d1) == sorted(d2)
+    for key in d1:
+        assert np.array_equal(d1[key], d2[key]), key
+
+
+@pytest.mark.parametrize("lgcmemmap", [True, False])
+@pytest.mark.parametrize("convtoamps", [None, [1/1024, 1/1024]])
+def test_saveevents_rqd_round_trip(tmp_path, lgcmemmap, convtoamps):
+    events = _events()
+    savepath = str(tmp_path) + "/"
+
+    saveevents_rqd(**events, savepath=savepath, savename="123456_7890", dumpnum=3, convtoamps=convtoamps)
+    saveevents_npz(**events, savepath=savepath, savename="123456_7890", dumpnum=3, convtoamps=convtoamps)
+
+    traces, info_dict = get_traces_rqd(f"{savepath}123456_7890_0003.rqd", lgcmemmap=lgcmemmap)
+    npztraces, npzinfo_dict = get_traces_npz([f"{savepath}123456_7890_0003.npz"])
+
+    assert isinstance(traces, np.memmap) == (lgcmemmap and convtoamps is None)
+    assert np.array_equal(traces, events["traces"])
+    assert np.array_equal(info_dict["eventnumber"], 30001 + np.arange(12))
+    assert np.array_equal(info_dict["seriesnumber"], np.full(12, 1234567890))
+    assert np.array_equal(info_dict["pulseamps"], events["pulseamps"])
+    assert np.array_equal(info_dict["truthamps2"], events["truthamps"][:, 1])
+    assert np.array_equal(traces, npztraces)
+    _assert_dicts_equal(info_dict, npzinfo_dict)
+
+
+@pytest.mark.parametrize("convtoamps", [None, [1/1024, 1/1024]])
+def test_convert_to_rqd_from_npz(tmp_path, convtoamps):
+    savepath = str(tmp_path) + "/"
+
+    saveevents_npz(**_events(), savepath=savepath, savename="123456_7890", dumpnum=1, convtoamps=convtoamps)
+    convert_to_rqd(f"{savepath}123456_7890_0001.npz", savepath)
+
+    npztraces, npzinfo_dict = get_traces_npz([f"{savepath}123456_7890_0001.npz"])
+    traces, info_dict = get_traces_rqd(f"{savepath}123456_7890_0001.rqd")
+
+    assert np.array_equal(traces, npztraces)
+    _assert_dicts_equal(info_dict, npzinfo_dict)
+
+    with np.load(f"{savepath}123456_7890_0001.npz") as data:
+        arrays, _ = load_rqd(f"{savepath}123456_7890_0001.rqd")
+        _assert_dicts_equal(arrays, {key: data[key] for key in data.files})
+
+
+def test_write_rqd_arrays_and_attrs(tmp_path):
+    filename = str(tmp_path / "test.rqd")
+    arrays = {"a" : np.arange(5, dtype=np.int16), "b" : np.ones((3, 7), dtype=">f4"), "empty" : np.zeros((0, 4))}
+
+    _write_rqd(filename, arrays, attrs={"note" : "test"})
+
+    for mmap_mode in ["r", None]:
+        loaded, attrs = load_rqd(filename, mmap_mode=mmap_mode)
+
+        assert attrs == {"note" : "test"}
+        for key, arr in arrays.items():
+            assert loaded[key].dtype == arr.dtype
+            assert np.array_equal(loaded[key], arr)
+
+
+def test_bad_magic_is_rejected(tmp_path):
+    filename = str(tmp_path / "123456_7890_0001.rqd")
+
+    with open(filename, "wb") as f:
+        f.write(b"NOTADUMP" + bytes(100))
+
+    with pytest.raises(IOError, match="not an rqd file"):
+        load_rqd(filename)
+
+    with pytest.raises(IOError, match="not an rqd file"):
+        get_traces_rqd(filename)
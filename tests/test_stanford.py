@@ -0,0 +1,27 @@
+import pytest
+
+from rqpy.io import StanfordFiles, loadstanfordfile
+
+
+def test_unreadable_file_raises_by_default(tmp_path):
+    missing = str(tmp_path / "missing.mat")
+
+    with pytest.raises(FileNotFoundError):
+        list(StanfordFiles([missing]))
+
+    with pytest.raises(FileNotFoundError):
+        loadstanfordfile(missing)
+
+
+def test_unreadable_file_is_skipped_with_flag(tmp_path):
+    missing = str(tmp_path / "missing.mat")
+
+    files = StanfordFiles([missing], lgcskip_failed=True)
+
+    with pytest.warns(UserWarning):
+        assert list(files) == []
+
+    assert list(files.failed) == [missing]
+
+    with pytest.raises(IOError), pytest.warns(UserWarning):
+        loadstanfordfile(missing, lgcskip_failed=True)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from rqpy.process import OptimumFilt
+
+
+def test_evttraces_is_cached_until_next_trigger():
+    rng = np.random.default_rng(1)
+
+    fs = 1e5
+    nbins = 400
+    template = np.zeros(nbins)
+    template[nbins//2:] = np.exp(-np.arange(nbins//2) / 40)
+    noisepsd = np.ones(nbins) * 2e-9
+
+    x = rng.normal(size=(2, 1, 20000)) * np.sqrt(1e-9 * fs / 2)
+    for ind in [3000, 9000, 15000]:
+        x[:, :, ind:ind + nbins//2] += np.exp(-np.arange(nbins//2) / 40)
+
+    filt = OptimumFilt(fs, template, noisepsd, 1000)
+    filt.filtertraces(x, np.zeros(2))
+    filt.eventtrigger(5)
+
+    evttraces = filt.evttraces
+
+    assert len(evttraces) == len(filt.pulsetimes) > 0
+    assert filt.evttraces is evttraces
+    assert np.array_equal(evttraces, filt.gettraces())
+    assert np.array_equal(evttraces[1:3], filt.gettraces(1, 3))
+
+    # the traces are copied again after triggering with a different threshold
+    filt.eventtrigger(50)
+
+    assert filt.evttraces is not evttraces
+    assert len(filt.evttraces) == len(filt.pulsetimes)
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from rqpy.io import AsyncWriter
+
+
+def _fail():
+    raise RuntimeError("write failed")
+
+
+def test_error_is_raised_again_and_queued_writes_are_cancelled():
+    gate = threading.Event()
+    written = []
+
+    writer = AsyncWriter(maxqueue=3)
+    writer.submit(gate.wait)
+    failed = writer.submit(_fail)
+    queued = writer.submit(written.append, 1)
+
+    # the failing write and the write after it are queued behind the slow write
+    gate.set()
+
+    with pytest.raises(RuntimeError, match="write failed"):
+        writer.flush()
+
+    assert isinstance(failed.exception(), RuntimeError)
+    assert queued.cancelled()
+    assert written == []
+
+    with pytest.raises(RuntimeError, match="write failed"):
+        writer.submit(written.append, 2)
+    with pytest.raises(RuntimeError, match="write failed"):
+        writer.flush()
+    with pytest.raises(RuntimeError, match="write failed"):
+        writer.close()
+    with pytest.raises(RuntimeError, match="write failed"):
+        writer.close()
+
+    assert written == []
+
+
+def test_exit_does_not_hide_error_in_with_block():
+    with pytest.raises(KeyError):
+        with AsyncWriter() as writer:
+            writer.submit(_fail).exception()
+            raise KeyError("error in the with block")
+
+
+def test_exit_raises_error_of_write():
+    with pytest.raises(RuntimeError, match="write failed"):
+        with AsyncWriter() as writer:
+            writer.submit(_fail)
+
+
+def test_submit_blocks_when_queue_is_full():
+    started = threading.Event()
+    gate = threading.Event()
+
+    def slow():
+        started.set()
+        gate.wait()
+
+    writer = AsyncWriter(maxqueue=1)
+    writer.submit(slow)
+    started.wait()
+
+    # the slow write is running, so this write fills the queue
+    writer.submit(lambda: None)
+
+    submitter = threading.Thread(target=writer.submit, args=(lambda: None,))
+    submitter.start()
+    submitter.join(timeout=0.2)
+
+    assert submitter.is_alive()
+
+    gate.set()
+    submitter.join(timeout=10)
+
+    assert not submitter.is_alive()
+
+    writer.close()